@@ -0,0 +1,56 @@
+"""
+Hot-path micro-benchmarks, from the repository root:
+
+    python -m benchmarks run [--only NAME ...] [--symbols 10,50] [--session-mins 2,30] [--out PATH]
+                             [--save-baseline] [--compare]
+    python -m benchmarks compare CURRENT [--baseline PATH] [--threshold .1]
+
+compare, and run --compare, exit with 1 if a case regressed against the baseline.
+"""
+import sys
+import argparse
+
+from . import harness
+
+
+def _ints(s):
+    return tuple(int(i) for i in s.split(','))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser('benchmarks')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    run_p = sub.add_parser('run')
+    run_p.add_argument('--only', nargs='+', default=None, help='benchmark names, all if omitted')
+    run_p.add_argument('--symbols', type=_ints, default=harness.SYMBOLS)
+    run_p.add_argument('--session-mins', type=_ints, default=harness.SESSION_MINS)
+    run_p.add_argument('--repeat', type=int, default=harness.REPEAT)
+    run_p.add_argument('--out', default=None, help='results json, in benchmarks/results if omitted')
+    run_p.add_argument('--save-baseline', action='store_true')
+    run_p.add_argument('--compare', action='store_true', help='against the baseline after running')
+    run_p.add_argument('--baseline', default=harness.BASELINE_PATH)
+    run_p.add_argument('--threshold', type=float, default=harness.REGRESSION_THRESHOLD)
+    cmp_p = sub.add_parser('compare')
+    cmp_p.add_argument('current')
+    cmp_p.add_argument('--baseline', default=harness.BASELINE_PATH)
+    cmp_p.add_argument('--threshold', type=float, default=harness.REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.cmd == 'run':
+        report = harness.run(args.only, args.symbols, args.session_mins, args.repeat)
+        print(harness.format_report(report))
+        print('results:', harness.save(report, args.out))
+        if args.save_baseline:
+            print('baseline:', harness.save(report, args.baseline))
+        if not args.compare:
+            return 0
+        current = report
+    else:
+        current = harness.load(args.current)
+    rows = harness.compare(harness.load(args.baseline), current, args.threshold)
+    print(harness.format_comparison(rows))
+    return 1 if any(row[-1] == 'regression' for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
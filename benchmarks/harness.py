@@ -0,0 +1,181 @@
+import os
+import io
+import sys
+import json
+import time
+import types
+import shutil
+import platform
+import datetime
+import tempfile
+import statistics
+import contextlib
+from collections import OrderedDict
+
+from live_trading.logging_ import binarylog, logsegment
+
+SYMBOLS = (10, 50)  # symbols in play, e.g. scanner rows
+SESSION_MINS = (2, 30)  # minutes of the session simulated per case
+REPEAT = 5
+REGRESSION_THRESHOLD = .1  # slower than the baseline by more than this fraction
+RUNTIME_TM = datetime.datetime(2021, 3, 15, 9, 30)  # run the benchmarked methods log under
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'results')
+BASELINE_PATH = os.path.join(RESULTS_DIR, 'baseline.json')
+
+benchmarks = OrderedDict()  # name: fn(n_symbols, session_mins) -> (run, n_ops)
+
+
+def benchmark(name):
+    """
+    Registers fn(n_symbols, session_mins) as a benchmark. fn sets up a case and
+    returns (run, n_ops): run does the timed work, n_ops the number of calls of
+    the benchmarked method in it. fn is called anew for every repetition, so run
+    may consume its set-up.
+    """
+    def decorator(fn):
+        benchmarks[name] = fn
+        return fn
+    return decorator
+
+
+def case_key(name, n_symbols, session_mins):
+    return '{}[symbols={},session_mins={}]'.format(name, n_symbols, session_mins)
+
+
+def time_case(fn, n_symbols, session_mins, repeat=REPEAT):
+    """
+    :return: timings of the case, per op from the fastest repetition
+    """
+    secs = []
+    n_ops = 0
+    for _ in range(repeat):
+        run_, n_ops = fn(n_symbols, session_mins)
+        # warnings printed by the benchmarked methods would flood the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            run_()
+            secs.append(time.perf_counter() - t0)
+    return OrderedDict([('n_symbols', n_symbols),
+                        ('session_mins', session_mins),
+                        ('n_ops', n_ops),
+                        ('min_secs', min(secs)),
+                        ('median_secs', statistics.median(secs)),
+                        ('us_per_op', round(min(secs) / max(n_ops, 1) * 1e6, 3))])
+
+
+def _stub_reporting():
+    """
+    live_trading.reporting is not in every checkout; the strategy modules import it
+    through FundamentalData, but none of the benchmarked methods uses it.
+    :return: True if a stub was put in its place
+    """
+    try:
+        import live_trading.reporting
+        return False
+    except ImportError:
+        reporting = types.ModuleType('live_trading.reporting')
+        reporting.Reporting = type('Reporting', (), {'__init__': lambda self, *args, **kwargs: None})
+        sys.modules['live_trading.reporting'] = reporting
+        return True
+
+
+def run(names=None, symbols=SYMBOLS, session_mins=SESSION_MINS, repeat=REPEAT):
+    """
+    Runs every case of the named benchmarks, all registered ones if None. Log lines
+    of the benchmarked methods go to a temporary LOG_DIR, live_trading.reporting is
+    stubbed if missing. A benchmark whose module cannot be imported is recorded as
+    skipped with the reason.
+    :return: {'meta': ..., 'results': {case_key: timings}}
+    """
+    from . import hotpaths  # registers the benchmarks
+    reporting_stubbed = _stub_reporting()
+    results = OrderedDict()
+    log_dir = binarylog.LOG_DIR
+    tmp = tempfile.mkdtemp()
+    binarylog.LOG_DIR = tmp
+    try:
+        for name in names or list(benchmarks.keys()):
+            fn = benchmarks[name]
+            for n_symbols in symbols:
+                for mins in session_mins:
+                    key = case_key(name, n_symbols, mins)
+                    try:
+                        results[key] = time_case(fn, n_symbols, mins, repeat)
+                    except ImportError as e:
+                        results[key] = OrderedDict([('skipped', str(e))])
+    finally:
+        logsegment.close_writer(int(time.mktime(RUNTIME_TM.timetuple())))
+        binarylog.LOG_DIR = log_dir
+        shutil.rmtree(tmp, ignore_errors=True)
+    meta = OrderedDict([('created', datetime.datetime.now().isoformat(timespec='seconds')),
+                        ('python', platform.python_version()),
+                        ('platform', platform.platform()),
+                        ('repeat', repeat),
+                        ('reporting_stubbed', reporting_stubbed)])
+    return OrderedDict([('meta', meta), ('results', results)])
+
+
+def save(report, path=None):
+    """
+    :param path: RESULTS_DIR/<created>.json if None
+    :return: path written to
+    """
+    if path is None:
+        path = os.path.join(RESULTS_DIR, '{}.json'.format(report['meta']['created'].replace(':', '')))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Compares the fastest repetitions of the cases both reports have.
+    :return: [case_key, baseline min_secs, current min_secs, ratio, status] per case of current,
+        status 'regression' if slower than the baseline by more than threshold, 'improvement'
+        if faster by more than it, else 'ok'; 'new' or 'skipped' where there is nothing to compare
+    """
+    rows = []
+    for key, case in current['results'].items():
+        base = baseline['results'].get(key)
+        if 'skipped' in case or (base is not None and 'skipped' in base):
+            rows.append([key, None, None, None, 'skipped'])
+            continue
+        if base is None:
+            rows.append([key, None, case['min_secs'], None, 'new'])
+            continue
+        ratio = case['min_secs'] / base['min_secs'] if base['min_secs'] > 0 else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append([key, base['min_secs'], case['min_secs'], round(ratio, 3), status])
+    return rows
+
+
+def format_report(report):
+    lines = []
+    for key, case in report['results'].items():
+        if 'skipped' in case:
+            lines.append('{:<80} skipped: {}'.format(key, case['skipped']))
+        else:
+            lines.append('{:<80} {:>12.6f} s {:>12.3f} us/op'.format(key, case['min_secs'], case['us_per_op']))
+    return '\n'.join(lines)
+
+
+def format_comparison(rows):
+    lines = []
+    for key, base_secs, curr_secs, ratio, status in rows:
+        if ratio is None:
+            lines.append('{:<80} {}'.format(key, status))
+        else:
+            lines.append('{:<80} {:>12.6f} s -> {:>12.6f} s  x{:<8} {}'.format(key, base_secs, curr_secs, ratio,
+                                                                               status))
+    return '\n'.join(lines)
@@ -0,0 +1,284 @@
+import time
+import queue
+import random
+import datetime
+from collections import OrderedDict
+
+from ib_insync import AccountValue, DOMLevel, Stock, Ticker
+
+from live_trading.utils.clock import VirtualClock
+from .harness import RUNTIME_TM, benchmark
+
+BAR_SIZE_SECS = 10  # as the strategies in run.py
+DEPTH_RANKS = 5
+SEED = 0
+START_TS = time.mktime(RUNTIME_TM.timetuple())
+
+
+def _n_bars(session_mins):
+    return int(session_mins * 60 / BAR_SIZE_SECS)
+
+
+def _symbols(n_symbols):
+    return ['S{:04d}'.format(i) for i in range(n_symbols)]
+
+
+def _tickers(n_symbols, rng):
+    tickers = []
+    for symbol in _symbols(n_symbols):
+        mid = rng.uniform(10, 500)
+        ticker = Ticker(contract=Stock(symbol, 'ISLAND', 'USD'))
+        ticker.domBids = [DOMLevel(round(mid - (r + 1) * .01, 2), rng.randint(1, 50) * 100, '')
+                          for r in range(DEPTH_RANKS)]
+        ticker.domAsks = [DOMLevel(round(mid + (r + 1) * .01, 2), rng.randint(1, 50) * 100, '')
+                          for r in range(DEPTH_RANKS)]
+        tickers.append(ticker)
+    return tickers
+
+
+class _Debugging:
+    dummy_data = False
+    paper_trading = True
+    get_meths = False
+
+
+class _Lt:
+    def __init__(self):
+        self.runtime_tm = RUNTIME_TM
+        self.strat_name = 'benchmark'
+        self.clock = VirtualClock(RUNTIME_TM)
+        self.debugging = _Debugging()
+
+    @staticmethod
+    def _ticker_len_n_type_check(bid_or_ask_li):
+        # LiveTrading's, which cannot be built without TWS
+        return len(bid_or_ask_li) if isinstance(bid_or_ask_li, str) == False else 1
+
+    def add_to_manager(self, *args):
+        pass
+
+
+class _Strat:
+    def __init__(self):
+        self.lt = _Lt()
+        self.runtime_tm = RUNTIME_TM
+        self.strat_name = 'benchmark'
+        self.debugging = _Debugging()
+
+    def add_to_manager(self, *args):
+        pass
+
+
+def _scans(n_symbols, n_iters, rng):
+    """
+    :return: n_iters scans of n_symbols rows, [[symbol], ...] concatenated like find_winners
+        does, drawn from twice as many symbols so factors partly agree
+    """
+    universe = _symbols(2 * n_symbols)
+    rows = []
+    for _ in range(n_iters):
+        rows += [[s] for s in rng.sample(universe, n_symbols)]
+    return rows
+
+
+def _scanners_1(positive_factors):
+    from live_trading.strategies.scannerbased.instrumentselection.scanners1 import Scanners_1
+    from live_trading.strategies.scannerbased.riskmanagement.riskmanagement import RiskManagement
+    from live_trading.utils.consoledisplay import ConsoleDisplay
+    sc = Scanners_1.__new__(Scanners_1)  # __init__ starts scanning
+    sc.strat = _Strat()
+    sc.strat.rm = RiskManagement(sc.strat)
+    sc.positive_factors = positive_factors
+    sc.cons_disp = ConsoleDisplay()
+    return sc
+
+
+@benchmark('Scanners_1.collect_hist_ticks')
+def collect_hist_ticks(n_symbols, session_mins):
+    """
+    Once per symbol and bar: the book into the moving averages.
+    """
+    from live_trading.strategies.scannerbased.instrumentselection.scanners1 import Scanners_1
+    from live_trading.strategies.scannerbased.scannerbased import ITERATION_TIMEOUT_SECS, \
+        N_WILLINGNESS_TO_MOVE_UP_PRICE
+    from live_trading.strategies.scannerbased.signals.simplemovingaverage import SimpleMovingAverage
+    sc = Scanners_1.__new__(Scanners_1)
+    sc.strat = _Strat()
+    sc.strat.iteration_timeout_secs = ITERATION_TIMEOUT_SECS
+    sc.strat.n_willingness_to_move_up_price = N_WILLINGNESS_TO_MOVE_UP_PRICE
+    sc.signals = SimpleMovingAverage(sc.strat, 30, 15)
+    tickers = _tickers(n_symbols, random.Random(SEED))
+    n_bars = _n_bars(session_mins)
+
+    def run():
+        for bar in range(n_bars):
+            unix_ts = START_TS + bar * BAR_SIZE_SECS
+            for ticker in tickers:
+                sc.collect_hist_ticks(ticker, unix_ts)
+    return run, n_bars * n_symbols
+
+
+@benchmark('SimpleMovingAverage.__ma_calc')
+def ma_calc(n_symbols, session_mins):
+    """
+    Once per symbol and bar, on moving averages fed with the whole session's bids.
+    """
+    from live_trading.strategies.scannerbased.signals.simplemovingaverage import SimpleMovingAverage
+    rng = random.Random(SEED)
+    sma = SimpleMovingAverage(_Strat(), 30, 15)
+    tickers = _tickers(n_symbols, rng)
+    n_bars = _n_bars(session_mins)
+    for bar in range(n_bars):
+        for ticker in tickers:
+            sma.on_tick(ticker.contract.symbol, START_TS + bar * BAR_SIZE_SECS, 1, 0, rng.uniform(10, 500),
+                        rng.randint(1, 50) * 100)
+    ma_calc_ = sma._SimpleMovingAverage__ma_calc
+
+    def run():
+        for _ in range(n_bars):
+            for ticker in tickers:
+                ma_calc_('collected', ticker)
+    return run, n_bars * n_symbols
+
+
+@benchmark('Scanners_1._relevance_discarding')
+def relevance_discarding(n_symbols, session_mins):
+    """
+    Once on two factors scanned every minute of the session, n_symbols rows each,
+    like the last match_f of find_winners.
+    """
+    from live_trading.strategies.scannerbased.instrumentselection.scanners1 import Scanners_1
+    rng = random.Random(SEED)
+    factors = OrderedDict((f, _scans(n_symbols, session_mins, rng)) for f in ('trade_rate', 'chg'))
+
+    def run():
+        Scanners_1._relevance_discarding(factors, session_mins, RUNTIME_TM)
+    return run, 1
+
+
+@benchmark('Scanners_1.match_f')
+def match_f(n_symbols, session_mins):
+    """
+    Once on two positive and one negative factor scanned every minute of the session,
+    n_symbols rows each, like the last match_f of find_winners.
+    """
+    rng = random.Random(SEED)
+    positive_factors = OrderedDict((f, ['scanner', 'scanner']) for f in ('trade_rate', 'chg'))
+    sc = _scanners_1(positive_factors)
+    positive_instr = OrderedDict((f, _scans(n_symbols, session_mins, rng)) for f in positive_factors)
+    negative_instr = OrderedDict([('chg_overnight', _scans(n_symbols, session_mins, rng))])
+
+    def run():
+        sc.match_f(positive_instr, negative_instr, session_mins)
+    return run, 1
+
+
+@benchmark('Logging.log')
+def logging_log(n_symbols, session_mins):
+    """
+    Once per symbol and bar, a Logging set up and logging three values.
+    """
+    from live_trading.logging_ import logging_
+    rng = random.Random(SEED)
+    symbols = _symbols(n_symbols)
+    n_bars = _n_bars(session_mins)
+
+    def run():
+        for _ in range(n_bars):
+            for symbol in symbols:
+                log = logging_.Logging(RUNTIME_TM, datetime.datetime.now(), 'Benchmark,log')
+                log.log(symbol, rng.uniform(10, 500), rng.randint(1, 50) * 100)
+    return run, n_bars * n_symbols
+
+
+@benchmark('HeartbeatMonitor.monitor_from_q')
+def monitor_from_q(n_symbols, session_mins):
+    """
+    Once per heartbeat of the session: draining what two strategies published for
+    n_symbols symbols since the last one into the table and rendering it, the prints
+    and the sleep of monitor_from_q left out.
+    """
+    from live_trading.utils.heartbeatmonitor import HEARTBEAT_SECS, HeartbeatMonitor
+    strats = OrderedDict((s, None) for s in ('strat_a', 'strat_b'))
+    hbm = HeartbeatMonitor.__new__(HeartbeatMonitor)  # __init__ runs the display loop
+    hbm.strats = strats
+    hbm.monitor_lines = ['curr_meth', '__winners', 'cnt_trades_per_instr_per_day', 'n loops update_trade_flow']
+    hbm._monitor_lines = set(hbm.monitor_lines)
+    hbm.values = {}
+    hbm.table = OrderedDict()
+    hbm._table_str = None
+    hbm.metrics_board = None
+    symbols = _symbols(n_symbols)
+    n_heartbeats = int(session_mins * 60 / HEARTBEAT_SECS)
+    n_bars_per_heartbeat = max(int(HEARTBEAT_SECS / BAR_SIZE_SECS), 1)
+    qs = []
+    n_loops = 0
+    for _ in range(n_heartbeats):
+        q_ = queue.Queue()
+        for _ in range(n_bars_per_heartbeat):
+            n_loops += 1
+            for strat in strats:
+                for i, symbol in enumerate(symbols):
+                    q_.put([strat, 'curr_meth', 'Scanners_1,collect_hist_ticks'])
+                    q_.put([strat, 'cnt_trades_per_instr_per_day', {s: n_loops % 3 for s in symbols[:i + 1]}])
+                q_.put([strat, '__winners', symbols[n_loops % n_symbols:]])
+                q_.put([strat, 'n loops update_trade_flow', n_loops])
+        qs.append(q_)
+
+    def run():
+        for q_ in qs:
+            hbm.q_ = q_
+            hbm.update(hbm.get_q())
+            hbm.render()
+    return run, n_heartbeats
+
+
+@benchmark('CashManagement.available_funds')
+def available_funds(n_symbols, session_mins):
+    """
+    Once per symbol and bar, on an account with a value per tag and currency.
+    """
+    from live_trading.cashmanagement import CashManagement
+
+    class Pnl:
+        def __init__(self, values):
+            self.values = values
+
+        def __iter__(self):
+            return iter(self.values)
+
+    tags = ['AccruedCash', 'AvailableFunds', 'BuyingPower', 'CashBalance', 'EquityWithLoanValue',
+            'ExcessLiquidity', 'GrossPositionValue', 'InitMarginReq', 'MaintMarginReq', 'NetLiquidation',
+            'RealizedPnL', 'TotalCashValue', 'UnrealizedPnL', 'NetLiquidationByCurrency']
+    pnl = Pnl([AccountValue('DU0000000', tag, '1000000.00', curr, '')
+               for tag in tags for curr in ('DKK', 'USD', 'BASE')])
+    cm = CashManagement(_Debugging())
+    n_bars = _n_bars(session_mins)
+
+    def run():
+        for _ in range(n_bars * n_symbols):
+            cm.available_funds(pnl, 'DKK')
+    return run, n_bars * n_symbols
+
+
+@benchmark('FinRatios.mkt_cap')
+def mkt_cap(n_symbols, session_mins):
+    """
+    Once per symbol, on fake TWS snapshot and statement reports. Screened once per
+    session, so session_mins does not change the work.
+    """
+    from live_trading.faketws import RandomWalkData
+    from live_trading.strategies.generalmiscfactors.fundamentaldata import FinRatios
+    data = RandomWalkData(SEED)
+    symbols = _symbols(n_symbols)
+    reports = {(s, r): data.fundamentals(s, r) for s in symbols for r in ('ReportSnapshot', 'ReportsFinStatements')}
+    lt = _Lt()
+    lt.hlprs = lt
+    lt.req_fundamental_data = lambda contract, report_type: reports[(contract.symbol, report_type)]
+    fr = FinRatios.__new__(FinRatios)  # __init__ needs a connected LiveTrading
+    fr.lt = lt
+
+    def run():
+        for symbol in symbols:
+            fr.mkt_cap(symbol, '100M')
+    return run, n_symbols
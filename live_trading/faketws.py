@@ -0,0 +1,470 @@
+import asyncio
+import random
+import struct
+import threading
+import time
+import datetime
+import zlib
+from collections import OrderedDict, deque
+
+FAKE_TWS_HOST, FAKE_TWS_PORT = '127.0.0.1', 7497  # where LiveTrading connects to TWS
+SERVER_VERSION = 157  # within what ib_insync 0.9 accepts, below the versions adding fields to errors
+ACCOUNT_ID = 'DU0000000'
+DEPTH_ROWS = 5
+DEPTH_UPDATE_SECS = .25
+MAX_MKT_DEPTH_REQS = 3  # TWS default for simultaneous depth requests, error 309 beyond it
+HIST_PACING_REQS, HIST_PACING_SECS = 60, 600  # error 162 beyond it
+DEFAULT_SYMBOLS = ('AAPL', 'AMZN', 'GOOG', 'MSFT', 'NVDA', 'TSLA', 'META', 'NFLX', 'INTC', 'AMD')
+
+ERR_MAX_MKT_DEPTH = 309
+ERR_HIST_PACING = 162
+ERR_MSGS = {ERR_MAX_MKT_DEPTH: 'Max number (3) of market depth requests has been reached',
+            ERR_HIST_PACING: 'Historical Market Data Service error message:Historical data request pacing violation'}
+
+# client -> server message ids of the IB API subset used by the project
+PLACE_ORDER, CANCEL_ORDER, REQ_OPEN_ORDERS, REQ_ACCOUNT_UPDATES, REQ_EXECUTIONS, REQ_IDS = 3, 4, 5, 6, 7, 8
+REQ_MKT_DEPTH, CANCEL_MKT_DEPTH, REQ_HISTORICAL_DATA = 10, 11, 20
+REQ_SCANNER_SUBSCRIPTION, CANCEL_SCANNER_SUBSCRIPTION = 22, 23
+REQ_CURRENT_TIME, REQ_FUNDAMENTAL_DATA, REQ_POSITIONS, REQ_ACCOUNT_SUMMARY = 49, 52, 61, 62
+START_API, REQ_ACCOUNT_UPDATES_MULTI, REQ_COMPLETED_ORDERS = 71, 76, 99
+
+# server -> client message ids
+ORDER_STATUS, ERR_MSG, ACCT_VALUE, NEXT_VALID_ID, MKT_DEPTH_L2, MANAGED_ACCTS = 3, 4, 6, 9, 13, 15
+HISTORICAL_DATA, SCANNER_DATA, CURRENT_TIME, FUNDAMENTAL_DATA = 17, 20, 49, 51
+POSITION_END, ACCT_DOWNLOAD_END, OPEN_ORDER_END, EXECUTION_DATA_END = 62, 54, 53, 55
+ACCOUNT_SUMMARY, ACCOUNT_SUMMARY_END, ACCOUNT_UPDATE_MULTI, ACCOUNT_UPDATE_MULTI_END = 63, 64, 73, 74
+COMPLETED_ORDERS_END = 102
+
+ASK_SIDE, BID_SIDE = 0, 1
+INSERT, UPDATE = 0, 1
+
+SNAPSHOT_XML = ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<ReportSnapshot Major="1" Minor="0" Revision="1"><Ratios PriceCurrency="USD">'
+                '<Group ID="Price and Volume"><Ratio FieldName="NPRICE" Type="N">{px:.2f}</Ratio>'
+                '<Ratio FieldName="NHIG" Type="N">{high:.2f}</Ratio></Group>'
+                '<Group ID="Income Statement"><Ratio FieldName="MKTCAP" Type="N">{mkt_cap:.2f}</Ratio>'
+                '<Ratio FieldName="TTMREV" Type="N">0.0</Ratio></Group></Ratios></ReportSnapshot>')
+FIN_STATEMENTS_XML = ('<?xml version="1.0" encoding="UTF-8"?>'
+                      '<ReportFinancialStatements Major="1" Minor="0" Revision="1"><FinancialStatements>'
+                      '<COAMap><mapItem coaItem="SREV" statementType="INC" lineID="10" precision="1">Revenue</mapItem>'
+                      '<mapItem coaItem="QTCO" statementType="BAL" lineID="20" precision="2">'
+                      'Total Common Shares Outstanding</mapItem></COAMap>'
+                      '<AnnualPeriods>{period}{period}</AnnualPeriods></FinancialStatements></ReportFinancialStatements>')
+FISCAL_PERIOD_XML = ('<FiscalPeriod Type="Annual"><Statement Type="INC"><lineItem coaCode="SREV">0.0</lineItem>'
+                     '<lineItem coaCode="ETOI">0.0</lineItem></Statement>'
+                     '<Statement Type="BAL"><lineItem coaCode="ATOT">0.0</lineItem>'
+                     '<lineItem coaCode="QTCO">{shares_m:.3f}</lineItem></Statement></FiscalPeriod>')
+
+
+class RandomWalkData:
+    def __init__(self, seed=0, symbols=DEFAULT_SYMBOLS, start_px=100., tick=.01, depth_rows=DEPTH_ROWS):
+        """
+        Market generated by a seeded random walk per symbol, the same seed giving the
+        same books, scans, bars and fundamentals.
+        """
+        self.seed = seed
+        self.symbols = list(symbols)
+        self.tick = tick
+        self.depth_rows = depth_rows
+        self.rngs = {s: random.Random(seed ^ zlib.crc32(s.encode())) for s in self.symbols}
+        self.pxs = OrderedDict((s, round(start_px * self.rngs[s].uniform(.2, 5.), 2)) for s in self.symbols)
+        self.scan_rng = random.Random(seed)
+
+    def _rng(self, symbol):
+        if symbol not in self.rngs:
+            self.rngs[symbol] = random.Random(self.seed ^ zlib.crc32(symbol.encode()))
+            self.pxs[symbol] = round(100. * self.rngs[symbol].uniform(.2, 5.), 2)
+        return self.rngs[symbol]
+
+    def step(self, symbol):
+        rng = self._rng(symbol)
+        self.pxs[symbol] = max(round(self.pxs[symbol] + rng.choice((-1, 0, 1)) * self.tick, 2), self.tick)
+        return self.pxs[symbol]
+
+    def book(self, symbol):
+        """
+        :return: bids, asks as [(price, size)] best first, around the next step of the walk
+        """
+        mid = self.step(symbol)
+        rng = self._rng(symbol)
+        bids = [(round(mid - (i + 1) * self.tick, 2), rng.randint(1, 50) * 100) for i in range(self.depth_rows)]
+        asks = [(round(mid + (i + 1) * self.tick, 2), rng.randint(1, 50) * 100) for i in range(self.depth_rows)]
+        return bids, asks
+
+    def scan(self, scan_code, n_rows):
+        symbols = list(self.symbols)
+        self.scan_rng.shuffle(symbols)
+        return symbols[:n_rows]
+
+    def fundamentals(self, symbol, report_type):
+        px = self.pxs.get(symbol) or self.step(symbol)
+        shares_m = zlib.crc32(symbol.encode()) % 5000 + 50.  # millions, precision 2 in the COAMap
+        if report_type == 'ReportSnapshot':
+            return SNAPSHOT_XML.format(px=px, high=px * 1.1, mkt_cap=px * shares_m)
+        if report_type == 'ReportsFinStatements':
+            return FIN_STATEMENTS_XML.format(period=FISCAL_PERIOD_XML.format(shares_m=shares_m))
+        return ''
+
+    def bars(self, symbol, n_bars, bar_size_secs=60, end=None):
+        """
+        :return: [(date, open, high, low, close, volume, average, bar_count)] oldest first
+        """
+        end = end or datetime.datetime.now().replace(microsecond=0)
+        rng = self._rng(symbol)
+        bars = []
+        for i in range(n_bars):
+            date = end - datetime.timedelta(seconds=(n_bars - i) * bar_size_secs)
+            open_ = self.pxs[symbol]
+            close = self.step(symbol)
+            bars.append((date.strftime('%Y%m%d  %H:%M:%S'), open_, max(open_, close), min(open_, close), close,
+                         rng.randint(1, 100) * 100, round((open_ + close) / 2, 4), rng.randint(1, 50)))
+        return bars
+
+    def account_values(self):
+        """
+        :return: [(tag, value, currency)]
+        """
+        return [('NetLiquidation', '1000000.00', 'USD'), ('TotalCashValue', '1000000.00', 'USD'),
+                ('AvailableFunds', '1000000.00', 'USD'), ('BuyingPower', '4000000.00', 'USD'),
+                ('CashBalance', '1000000.00', 'BASE'), ('NetLiquidationByCurrency', '1000000.00', 'BASE')]
+
+
+class FakeTws:
+    def __init__(self, data=None, host=FAKE_TWS_HOST, port=FAKE_TWS_PORT, latency_secs=0.,
+                 depth_update_secs=DEPTH_UPDATE_SECS, fill_secs=0., max_mkt_depth_reqs=MAX_MKT_DEPTH_REQS,
+                 hist_pacing=(HIST_PACING_REQS, HIST_PACING_SECS)):
+        """
+        Local stand-in for TWS speaking the subset of the IB API wire protocol the
+        strategies use, so they connect with IB().connect unchanged and can be run
+        under load without an IB account: market depth, scanners, fundamental data,
+        historical bars, orders and account values. Errors TWS answers with are
+        raised the same way, 309 beyond max_mkt_depth_reqs depth requests of a
+        connection, 162 beyond the historical data pacing window, any other through
+        inject_error.
+        :param data: generator of the market, RandomWalkData() if None
+        :param port: 0 for any free one, see self.port once started
+        :param latency_secs: delay of every message sent, in order
+        :param fill_secs: delay between an order's Submitted and Filled status
+        :param hist_pacing: (n requests, within secs)
+        """
+        self.data = data if data is not None else RandomWalkData()
+        self.host = host
+        self.port = port
+        self.latency_secs = latency_secs
+        self.depth_update_secs = depth_update_secs
+        self.fill_secs = fill_secs
+        self.max_mkt_depth_reqs = max_mkt_depth_reqs
+        self.hist_pacing = hist_pacing
+        self.injected = {}  # msg_id: deque of (code, msg)
+        self.n_msgs_in = 0
+        self.n_msgs_out = 0
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    def inject_error(self, msg_id, code, msg='', n=1):
+        """
+        The next n requests with client message id msg_id, e.g. REQ_MKT_DEPTH, are
+        answered by error code instead of being served.
+        """
+        with self._lock:
+            self.injected.setdefault(msg_id, deque()).extend([(code, msg or ERR_MSGS.get(code, 'injected'))] * n)
+
+    def _pop_injected(self, msg_id):
+        with self._lock:
+            errs = self.injected.get(msg_id)
+            return errs.popleft() if errs else None
+
+    async def start(self):
+        self.loop = asyncio.get_event_loop()
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_thread(self):
+        """
+        Serves on its own event loop in a daemon thread, for clients in this process.
+        :return: port served on
+        """
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            loop.run_forever()
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name='FakeTws', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self.port
+
+    def stop(self):
+        if self.loop is None:
+            return
+
+        def close():
+            self._server.close()
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.call_soon(self.loop.stop)
+
+        self.loop.call_soon_threadsafe(close)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    async def _serve(self, reader, writer):
+        conn = _Connection(self, reader, writer)
+        try:
+            await conn.run()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            conn.close()
+
+
+class _Connection:
+    def __init__(self, tws, reader, writer):
+        self.tws = tws
+        self.reader = reader
+        self.writer = writer
+        self.client_id = -1
+        self.next_order_id = 1
+        self.depth = OrderedDict()  # req_id: [symbol, n_rows published]
+        self.hist_ts = deque()
+        self.orders = {}  # order_id: status
+        self._out = asyncio.Queue()
+        self._tasks = []
+
+    async def run(self):
+        await self._handshake()
+        self._tasks = [asyncio.ensure_future(self._write_loop()), asyncio.ensure_future(self._depth_loop())]
+        while True:
+            fields = await self._read_msg()
+            self.tws.n_msgs_in += 1
+            self.handle(fields)
+
+    def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self.writer.close()
+
+    async def _read_msg(self):
+        size = struct.unpack('>I', await self.reader.readexactly(4))[0]
+        return (await self.reader.readexactly(size)).decode(errors='backslashreplace').split('\0')[:-1]
+
+    async def _handshake(self):
+        assert await self.reader.readexactly(4) == b'API\0', 'not an IB API client'
+        await self._read_msg()  # 'v157..176', no need to negotiate below SERVER_VERSION
+        now = datetime.datetime.now().strftime('%Y%m%d %H:%M:%S')
+        self.writer.write(self._frame((SERVER_VERSION, now)))
+        await self.writer.drain()
+
+    @staticmethod
+    def _frame(fields):
+        msg = ''.join('{}\0'.format('' if f is None else f) for f in fields).encode()
+        return struct.pack('>I', len(msg)) + msg
+
+    def send(self, *fields):
+        self._out.put_nowait((time.monotonic() + self.tws.latency_secs, self._frame(fields)))
+
+    async def _write_loop(self):
+        while True:
+            due, msg = await self._out.get()
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.writer.write(msg)
+            self.tws.n_msgs_out += 1
+            if self._out.empty():
+                await self.writer.drain()
+
+    def error(self, req_id, code, msg=None):
+        self.send(ERR_MSG, 2, req_id, code, msg or ERR_MSGS.get(code, ''))
+
+    def handle(self, fields):
+        msg_id = int(fields[0])
+        req_id = self._req_id(msg_id, fields)
+        injected = self.tws._pop_injected(msg_id)
+        if injected is not None:
+            self.error(req_id, *injected)
+            return
+        handler = HANDLERS.get(msg_id)
+        if handler is not None:
+            handler(self, fields)
+
+    @staticmethod
+    def _req_id(msg_id, fields):
+        if msg_id in (PLACE_ORDER, REQ_HISTORICAL_DATA, REQ_SCANNER_SUBSCRIPTION):
+            return int(fields[1])
+        if msg_id in (REQ_MKT_DEPTH, REQ_FUNDAMENTAL_DATA, REQ_EXECUTIONS, REQ_ACCOUNT_SUMMARY,
+                      REQ_ACCOUNT_UPDATES_MULTI):
+            return int(fields[2])
+        return -1
+
+    # session
+    def start_api(self, fields):
+        self.client_id = int(fields[2])
+        self.send(MANAGED_ACCTS, 1, ACCOUNT_ID)
+        self.send(NEXT_VALID_ID, 1, self.next_order_id)
+
+    def req_ids(self, fields):
+        self.send(NEXT_VALID_ID, 1, self.next_order_id)
+
+    def req_current_time(self, fields):
+        self.send(CURRENT_TIME, 1, int(time.time()))
+
+    def req_positions(self, fields):
+        self.send(POSITION_END, 1)
+
+    def req_open_orders(self, fields):
+        self.send(OPEN_ORDER_END, 1)
+
+    def req_completed_orders(self, fields):
+        self.send(COMPLETED_ORDERS_END)
+
+    def req_executions(self, fields):
+        self.send(EXECUTION_DATA_END, 1, int(fields[2]))
+
+    # account
+    def req_account_updates(self, fields):
+        if fields[2] not in ('1', 'True'):
+            return
+        for tag, value, currency in self.tws.data.account_values():
+            self.send(ACCT_VALUE, 2, tag, value, currency, ACCOUNT_ID)
+        self.send(ACCT_DOWNLOAD_END, 1, ACCOUNT_ID)
+
+    def req_account_updates_multi(self, fields):
+        req_id = int(fields[2])
+        for tag, value, currency in self.tws.data.account_values():
+            self.send(ACCOUNT_UPDATE_MULTI, 1, req_id, ACCOUNT_ID, '', tag, value, currency)
+        self.send(ACCOUNT_UPDATE_MULTI_END, 1, req_id)
+
+    def req_account_summary(self, fields):
+        req_id = int(fields[2])
+        for tag, value, currency in self.tws.data.account_values():
+            self.send(ACCOUNT_SUMMARY, 1, req_id, ACCOUNT_ID, tag, value, currency)
+        self.send(ACCOUNT_SUMMARY_END, 1, req_id)
+
+    # market data
+    def req_mkt_depth(self, fields):
+        req_id, symbol = int(fields[2]), fields[4]
+        if len(self.depth) >= self.tws.max_mkt_depth_reqs:
+            self.error(req_id, ERR_MAX_MKT_DEPTH,
+                       ERR_MSGS[ERR_MAX_MKT_DEPTH].replace('(3)', '({})'.format(self.tws.max_mkt_depth_reqs)))
+            return
+        self.depth[req_id] = [symbol, 0]
+        self._publish_depth(req_id)
+
+    def cancel_mkt_depth(self, fields):
+        self.depth.pop(int(fields[2]), None)
+
+    def _publish_depth(self, req_id):
+        symbol, n_published = self.depth[req_id]
+        bids, asks = self.tws.data.book(symbol)
+        for side, levels in ((BID_SIDE, bids), (ASK_SIDE, asks)):
+            for position, (price, size) in enumerate(levels):
+                operation = UPDATE if position < n_published else INSERT
+                self.send(MKT_DEPTH_L2, 1, req_id, position, '', operation, side, price, size, 0)
+        self.depth[req_id][1] = max(n_published, len(bids), len(asks))
+
+    async def _depth_loop(self):
+        while True:
+            await asyncio.sleep(self.tws.depth_update_secs)
+            for req_id in list(self.depth.keys()):
+                self._publish_depth(req_id)
+
+    def req_scanner_subscription(self, fields):
+        req_id, n_rows, scan_code = int(fields[1]), int(fields[2]), fields[5]
+        n_rows = n_rows if n_rows > 0 else 50
+        symbols = self.tws.data.scan(scan_code, n_rows)
+        rows = []
+        for rank, symbol in enumerate(symbols):
+            rows += [rank, zlib.crc32(symbol.encode()), symbol, 'STK', '', 0., '', 'SMART', 'USD', symbol, 'NMS',
+                     'NMS', '', '', '', '']
+        self.send(SCANNER_DATA, 3, req_id, len(symbols), *rows)
+
+    def req_fundamental_data(self, fields):
+        req_id, symbol, report_type = int(fields[2]), fields[4], fields[10]
+        self.send(FUNDAMENTAL_DATA, 1, req_id, self.tws.data.fundamentals(symbol, report_type))
+
+    def req_historical_data(self, fields):
+        req_id, symbol = int(fields[1]), fields[3]
+        now = time.monotonic()
+        n_reqs, window_secs = self.tws.hist_pacing
+        while self.hist_ts and now - self.hist_ts[0] > window_secs:
+            self.hist_ts.popleft()
+        if len(self.hist_ts) >= n_reqs:
+            self.error(req_id, ERR_HIST_PACING)
+            return
+        self.hist_ts.append(now)
+        bars = self.tws.data.bars(symbol, 30)
+        fields_ = [f for bar in bars for f in bar]
+        start, end = (bars[0][0], bars[-1][0]) if bars else ('', '')
+        self.send(HISTORICAL_DATA, req_id, start, end, len(bars), *fields_)
+
+    # orders
+    def place_order(self, fields):
+        order_id, symbol, action, qty = int(fields[1]), fields[3], fields[16], float(fields[17])
+        order_type, lmt_price = fields[18], fields[19]
+        self.next_order_id = max(self.next_order_id, order_id + 1)
+        if order_type == 'LMT' and lmt_price:
+            price = float(lmt_price)
+        else:
+            bids, asks = self.tws.data.book(symbol)
+            levels = asks if action == 'BUY' else bids
+            price = levels[0][0] if levels else 0.
+        self.orders[order_id] = 'Submitted'
+        self._order_status(order_id, 'Submitted', 0., qty, 0.)
+        self.tws.loop.call_later(self.tws.fill_secs, self._fill, order_id, qty, price)
+
+    def _fill(self, order_id, qty, price):
+        if self.orders.get(order_id) != 'Submitted':
+            return
+        self.orders[order_id] = 'Filled'
+        self._order_status(order_id, 'Filled', qty, 0., price)
+
+    def cancel_order(self, fields):
+        order_id = int(fields[2])
+        if self.orders.get(order_id) == 'Submitted':
+            self.orders[order_id] = 'Cancelled'
+            self._order_status(order_id, 'Cancelled', 0., 0., 0.)
+
+    def _order_status(self, order_id, status, filled, remaining, price):
+        self.send(ORDER_STATUS, order_id, status, filled, remaining, price, order_id, 0, price, self.client_id, '', 0.)
+
+
+HANDLERS = {START_API: _Connection.start_api,
+            REQ_IDS: _Connection.req_ids,
+            REQ_CURRENT_TIME: _Connection.req_current_time,
+            REQ_POSITIONS: _Connection.req_positions,
+            REQ_OPEN_ORDERS: _Connection.req_open_orders,
+            REQ_COMPLETED_ORDERS: _Connection.req_completed_orders,
+            REQ_EXECUTIONS: _Connection.req_executions,
+            REQ_ACCOUNT_UPDATES: _Connection.req_account_updates,
+            REQ_ACCOUNT_UPDATES_MULTI: _Connection.req_account_updates_multi,
+            REQ_ACCOUNT_SUMMARY: _Connection.req_account_summary,
+            REQ_MKT_DEPTH: _Connection.req_mkt_depth,
+            CANCEL_MKT_DEPTH: _Connection.cancel_mkt_depth,
+            REQ_SCANNER_SUBSCRIPTION: _Connection.req_scanner_subscription,
+            REQ_FUNDAMENTAL_DATA: _Connection.req_fundamental_data,
+            REQ_HISTORICAL_DATA: _Connection.req_historical_data,
+            PLACE_ORDER: _Connection.place_order,
+            CANCEL_ORDER: _Connection.cancel_order}
+
+
+def run_fake_tws(port=FAKE_TWS_PORT, **kwargs):
+    """
+    Process target serving a FakeTws until terminated, see run.FAKE_TWS.
+    """
+    asyncio.run(FakeTws(port=port, **kwargs).serve_forever())
+
+
+if __name__ == '__main__':
+    run_fake_tws()
@@ -1,13 +1,27 @@
-import sys
 import datetime
 import time
 #import socket
 #import psutil
 # import traceback
 from .logging_ import logging_
+from .logging_ import instrumentation
+from .logging_.instrumentation import timed
 from .cashmanagement import CashManagement
+from .mktdepthpool import MktDepthPool
+from .ordermanager import OrderManager, FILLED
 from .reporting import Reporting
 from .utils.helpers import ClientSharedMemory, MethodManager_
+from .utils.scheduleadgent.scheduleagent import ScheduleAgent
+from .utils.pacinggovernor import PacingGovernor
+from .utils.sharedmemory import MktDataLineCounter
+from .utils.lineallocator import LineAllocator
+from .utils.heartbeatmonitor import HeartbeatPublisher
+from .utils.metricsboard import MetricsBoard
+from .utils.timezones import exchange_time
+from .utils.clock import RealClock
+from .replay import SessionRecorder, session_path
+from .utils import metricsregistry
+from .utils.metricsregistry import observed
 from .utils import exceptions_
 from .strategies.generalmiscfactors.fundamentaldata import FinRatios
 
@@ -46,35 +60,68 @@ N_TRIES_IF_SIMULT_REQS, SIMULT_REQS_INTERVAL = 5, .5
 MARKET_DATA_LINES = 100
 POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE = 6
 
-HOUR_DAY_BOUNDARY_FAIL_CHECK = 6
-
 ORDER_CANCEL_IF_NOT_FILLED_SECS = 10
-ORDER_FILLED_CHECKED_CYCLE_SECS = .5
 
 
 class LiveTrading(MethodManager_):
-    def __init__(self, strat_name, client_id, runtime_tm, debugging, manager_, heartbeat_q, traded_instr):
+    def __init__(self, strat_name, client_id, runtime_tm, debugging, manager_, heartbeat_q, traded_instr,
+                 pacing_governor=None, mkt_data_lines=None, mkt_data_hub=None, metrics_board=None, ib=None,
+                 line_allocator=None, clock=None, record_session=False):
+        """
+        :param record_session: record what TWS sends for replay.ReplaySession
+        :param clock: utils.clock clock of the session, a VirtualClock runs it faster
+            than real time; the host's, shifted if debugging.dummy_time, if None
+        :param line_allocator: LineAllocator of all strategies, slot client_id
+        :param ib: connected IB shared with other strategies of a StrategyHost, a
+            connection of its own with client_id if None
+        """
         self.strat_name = strat_name
         self.client_id = client_id
         self.runtime_tm = runtime_tm
         self.debugging = debugging
         self.manager_ = manager_
         self.heartbeat_q = heartbeat_q
+        self.heartbeat = HeartbeatPublisher(heartbeat_q, strat_name)
         self.traded_instr = traded_instr
+        # shared across strategy processes if handed in by run.py, process-local otherwise,
+        # with nothing in /dev/shm to clean up
+        self.mkt_data_lines = mkt_data_lines if mkt_data_lines is not None \
+            else MktDataLineCounter(IB_PACING['mkt_data_lines'], POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE, shared=False)
+        self.line_allocator = line_allocator if line_allocator is not None \
+            else LineAllocator(IB_PACING['mkt_data_lines'], client_id + 1, POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE,
+                               shared=False)
+        self.metrics = metrics_board if metrics_board is not None else MetricsBoard([strat_name], shared=False)
+        self.owns_ib = ib is None
+        if self.owns_ib:
+            # one strategy per process, timed methods show up as its curr_meth
+            instrumentation.publish_curr_meth(lambda meth: self.metrics.set_curr_meth(strat_name, meth))
+        self.registry = metricsregistry.Registry({'strat': strat_name})
 
         self.account_curr = ACCOUNT_CURR
         self.tax_rate_account_country = TAX_RATE_ACCOUNT_COUNTRY
         self.simult_reqs_interval = SIMULT_REQS_INTERVAL
         self.potential_mkt_data_lines_already_in_use = POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE
 
-        self.ib = IB()
+        self.ib = IB() if self.owns_ib else ib
         # self.ib.setCallback('error', self.on_ib_error)
         self.ib.errorEvent += self.on_ib_error
         self.err_ = None
+        self.start_cet = datetime.datetime.now()
+        if clock is None:
+            offset_secs = (self._manipulated_time(self.start_cet) - self.start_cet).total_seconds() \
+                if debugging.dummy_time else 0.
+            clock = RealClock(offset_secs=offset_secs)
+        if clock.sleep_fn is None:
+            clock.sleep_fn = self.ib.sleep
+        self.clock = clock
+        # on the session's clock, a replay's VirtualClock paces in replayed time
+        self.pacing = pacing_governor if pacing_governor is not None else PacingGovernor(IB_PACING, clock=clock)
 
         self.report = Reporting(self)
         self.cash = CashManagement(debugging)
-        self.hlprs = ClientSharedMemory()
+        self.hlprs = ClientSharedMemory(self.metrics)
+        self.mkt_dpt_pool = MktDepthPool(self, hub=mkt_data_hub)
+        self.sched = ScheduleAgent(clock=self.clock)
 
         self.access_type = 'tws'
         if self.access_type == 'gateway':
@@ -82,7 +129,13 @@ class LiveTrading(MethodManager_):
         elif self.access_type == 'tws':
             self.__port = 7497
         self.__host = '127.0.0.1'
-        self.ib.connect(self.__host, self.__port, clientId=self.client_id)
+        if self.owns_ib:
+            self.ib.connect(self.__host, self.__port, clientId=self.client_id)
+        self.recorder = None
+        if record_session:
+            self.recorder = SessionRecorder(session_path(int(time.mktime(runtime_tm.timetuple())), strat_name))
+            self.recorder.attach(self.ib, self.clock, depth_from_ib=mkt_data_hub is None)
+        self.orders = OrderManager(self.ib, ORDER_CANCEL_IF_NOT_FILLED_SECS, registry=self.registry)
 
         self.portfolio = []
         self.portfolio_instr = []
@@ -93,9 +146,6 @@ class LiveTrading(MethodManager_):
                                'open_market_data_lines':0,
                                'hist_data_prior_time':None}
 
-        self.start_cet = datetime.datetime.now()
-
-        self.manager_['active_mkt_data_lines'] = POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE
         self.funda_data_req_max = IB_PACING['funda_data_reqs']['reqs']
 
         if self.debugging.get_meths:
@@ -108,49 +158,10 @@ class LiveTrading(MethodManager_):
     def us_tz_op(dt_obj):
         """
         Converting time
-        :param dt_obj: datetime obj
+        :param dt_obj: datetime obj, local time of the host
         :return: Eastern datetime
         """
-        # log_start = datetime.datetime.now()
-        if not isinstance(dt_obj, datetime.datetime):
-            raise TypeError
-        if dt_obj.year == 1900:
-            curr_year = datetime.datetime.now().year
-        else:
-            curr_year = dt_obj.year
-        # http://www.webexhibits.org/daylightsaving/b2.html
-        dst = {
-            2018:[[3,11],[11,4]],
-            2019:[[3,10],[11,3]],
-            2020:[[3,8],[11,1]]
-        }
-        window = dst[curr_year]
-
-        #disclaimer
-        kind_of_difference = HOUR_DAY_BOUNDARY_FAIL_CHECK
-        if dt_obj.hour < kind_of_difference:
-            raise Exception("determination difficult, try later in the day")
-
-        dst_start = datetime.datetime(curr_year, window[0][0], window[0][1])
-        dst_end = datetime.datetime(curr_year, window[1][0], window[1][1])
-        if dt_obj > dst_start and dt_obj < dst_end:
-            utc2est = -4
-        else:
-            utc2est = -5
-        this_tz_from_uts = '+0100'
-        if time.strftime("%z", time.gmtime()) != this_tz_from_uts:
-            raise exceptions_.WrongTimeZone('Wrong time zone, code is fixed to Danish winter time, might have to be adjusted')
-
-        cet2utc = -2
-        dt_obj_utc = dt_obj + datetime.timedelta(hours=cet2utc) #.replace(tzinfo = datetime.timezone.utc)
-        dt_obj_est = dt_obj_utc + datetime.timedelta(hours=utc2est)
-        # logging = rk_logging.Logging()
-        # logging.log(
-        #         runtime_tm, log_start, str('' + ',' + sys._getframe().f_code.co_name)
-        #         ,dt_obj_utc
-        #         ,dt_obj_est
-        #     )
-        return dt_obj_est
+        return exchange_time.to_exchange(dt_obj)
 
     def _manipulated_time(self, cet_in):
         delta = cet_in - self.start_cet
@@ -163,10 +174,12 @@ class LiveTrading(MethodManager_):
         current_manipulated_time += delta
         return current_manipulated_time
 
+    @timed
+    @observed('buy')
     def buy(self, ticker, rank, size, order_type):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.hlprs.add_to_manager(self.strat_name, *log.monitor())
+        """
+        :return: status 0 = filled, 1 = not filled, 2 = placed, portfolio is booked once OrderManager sees the fill
+        """
         order_log_msg = None
         symbol = ticker.contract.symbol
         if self._ticker_len_n_type_check(ticker.domBids) > 1:
@@ -175,72 +188,51 @@ class LiveTrading(MethodManager_):
         else:
             offer_price = ticker.domBids.price
             # offer_size = ticker.domBids.size
-        cnt = 0
-        max_order_filled_cnts = int(ORDER_CANCEL_IF_NOT_FILLED_SECS / ORDER_FILLED_CHECKED_CYCLE_SECS)
         if self.debugging.dummy_data:
-            order_success = True
+            self._book_buy(symbol, offer_price, size)
+            status = 0
         else:
             if order_type == 'MKT':
                 order = MarketOrder('BUY', size)
-                trade = self.ib.placeOrder(ticker.contract, order)
-                while cnt < max_order_filled_cnts: # a bit complicated but it does actually make sense
-                    order_log_msg = trade.log
-                    self.ib.sleep(ORDER_FILLED_CHECKED_CYCLE_SECS)
-                    cnt += 1
-                    if not trade.orderStatus.status != 'Filled':
-                        # PendingSubmit = 'PendingSubmit'
-                        # PendingCancel = 'PendingCancel'
-                        # PreSubmitted = 'PreSubmitted'
-                        # Submitted = 'Submitted'
-                        # ApiPending = 'ApiPending'  # undocumented, can be returned from req(All)OpenOrders
-                        # ApiCancelled = 'ApiCancelled'
-                        # Cancelled = 'Cancelled'
-                        # Filled = 'Filled'
-                        # Inactive = 'Inactive'
-                        order_success = True
-                        break
-                else:
-                    self.ib.cancelOrder(trade)
-                # while not trade.isDone():
-                #     print("not sure if this makes sense")
-                #     self.ib.waitOnUpdate()
+                ticket = self.orders.place(ticker.contract, order,
+                                           on_done=lambda ticket_: self._on_buy_done(ticket_, offer_price, size))
+                order_log_msg = ticket.trade.log
+                status = 0 if ticket.state == FILLED else 1 if ticket.is_done() else 2
             elif order_type == 'LMT':
                 raise Exception("order type not defined")
             else:
                 raise Exception("order type not defined")
-        if order_success:
-            if self.debugging.dummy_time:
-                _now = self._manipulated_time(datetime.datetime.now())
-            else:
-                _now = datetime.datetime.now()
-
-            filled_tm = self.us_tz_op(_now)
-            status = 0
-            self.portfolio.append([symbol, filled_tm, offer_price, size])
-            self.hlprs.add_to_manager(self.strat_name, 'portfolio', self.portfolio)
-
-            self.portfolio_instr.append(symbol)
-            # self.add_to_monitor('portfolio_instr', 'self.portfolio_instr')
-
-            print('not sure if this works')
-            self.cnt_trades_per_instr_per_day[ticker.contract.symbol] += 1
-            self.hlprs.add_to_manager(self.strat_name, 'cnt_trades_per_instr_per_day',
-                           self.cnt_trades_per_instr_per_day)
-            self.heartbeat_q.put([self.strat_name, 'cnt_trades_per_instr_per_day',self.cnt_trades_per_instr_per_day])
-            self.hlprs.add_to_manager(self.strat_name, 'cap_usd',
-                                      self.cash.available_funds(self.report.pnl(), self.account_curr))
-        else:
-            status = 1
-        log.log(self.portfolio
-                ,self.portfolio_instr
-                ,self.cnt_trades_per_instr_per_day
-                ,order_log_msg)
+        logging_.log_values(self.runtime_tm, 'LiveTrading,buy',
+                            self.portfolio, self.portfolio_instr, self.cnt_trades_per_instr_per_day, order_log_msg)
         return status
 
+    def _on_buy_done(self, ticket, offer_price, size):
+        if ticket.state == FILLED:
+            self._book_buy(ticket.symbol, ticket.fill_price if ticket.fill_price > 0 else offer_price, size)
+
+    def _book_buy(self, symbol, price, size):
+        filled_tm = self.us_tz_op(self.clock.now())
+        self.portfolio.append([symbol, filled_tm, price, size])
+        self.hlprs.add_to_manager(self.strat_name, 'portfolio', self.portfolio)
+
+        self.portfolio_instr.append(symbol)
+        # self.add_to_monitor('portfolio_instr', 'self.portfolio_instr')
+        self._book_trade_cnt(symbol)
+
+    def _book_trade_cnt(self, symbol):
+        self.cnt_trades_per_instr_per_day[symbol] += 1
+        self.hlprs.add_to_manager(self.strat_name, 'cnt_trades_per_instr_per_day',
+                       self.cnt_trades_per_instr_per_day)
+        self.heartbeat.publish('cnt_trades_per_instr_per_day', self.cnt_trades_per_instr_per_day)
+        self.hlprs.add_to_manager(self.strat_name, 'cap_usd',
+                                  self.cash.available_funds(self.report.pnl(), self.account_curr))
+
+    @timed
+    @observed('sell')
     def sell(self, ticker, rank, order_type):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.hlprs.add_to_manager(self.strat_name, *log.monitor())
+        """
+        :return: status 0 = filled, 1 = not filled, 2 = placed, -1 = not held, portfolio is booked once OrderManager sees the fill
+        """
         order_log_msg = None
         symbol = ticker.contract.symbol
         try:
@@ -261,51 +253,36 @@ class LiveTrading(MethodManager_):
         # held_price = self.held[ix][price_ix]
         held_size = self.portfolio[ix][size_ix]
 
-        cnt = 0
-        max_order_filled_cnts = int(ORDER_CANCEL_IF_NOT_FILLED_SECS / ORDER_FILLED_CHECKED_CYCLE_SECS)
         if not self.debugging.dummy_data:
             if order_type == 'MKT':
                 order = MarketOrder('SELL', held_size)
                 # https://github.com/erdewit/ib_insync/blob/master/notebooks/ordering.ipynb
-                trade = self.ib.placeOrder(ticker.contract, order)
-                while cnt < max_order_filled_cnts:
-                    order_log_msg = trade.log
-                    self.ib.sleep(ORDER_FILLED_CHECKED_CYCLE_SECS)
-                    cnt += 1
-                    if trade.orderStatus.status == 'Filled':
-                        order_success = True
-                        break
-                self.ib.cancelOrder(trade)
-                while not trade.isDone():
-                    print("not sure if this makes sense")
-                    self.ib.waitOnUpdate()
+                ticket = self.orders.place(ticker.contract, order, on_done=self._on_sell_done)
+                order_log_msg = ticket.trade.log
+                status = 0 if ticket.state == FILLED else 1 if ticket.is_done() else 2
             elif order_type == 'LMT':
                 raise Exception("order type not defined")
             else:
                 raise Exception("order type not defined")
         else:
-            order_success = True
-        order_success = True
-        if order_success:
+            self._book_sell(symbol)
             status = 0
-            del self.portfolio[ix]
-            self.hlprs.add_to_manager(self.strat_name, 'portfolio', self.portfolio)
-            del self.portfolio_instr[ix]
-            # self.add_to_monitor('portfolio_instr', self.portfolio_instr)
-            print('not sure if this works')
-            self.cnt_trades_per_instr_per_day[ticker.contract.symbol] += 1
-            self.hlprs.add_to_manager(self.strat_name, 'cnt_trades_per_instr_per_day',
-                           self.cnt_trades_per_instr_per_day)
-            self.heartbeat_q.put([self.strat_name, 'cnt_trades_per_instr_per_day',self.cnt_trades_per_instr_per_day])
-            self.hlprs.add_to_manager(self.strat_name, 'cap_usd', self.cash.available_funds(self.report.pnl(), self.account_curr))
-        else:
-            status = 1
-        log.log(self.portfolio
-                ,self.portfolio_instr
-                ,self.cnt_trades_per_instr_per_day
-                ,order_log_msg)
+        logging_.log_values(self.runtime_tm, 'LiveTrading,sell',
+                            self.portfolio, self.portfolio_instr, self.cnt_trades_per_instr_per_day, order_log_msg)
         return status
 
+    def _on_sell_done(self, ticket):
+        if ticket.state == FILLED:
+            self._book_sell(ticket.symbol)
+
+    def _book_sell(self, symbol):
+        ix = self.portfolio_instr.index(symbol)
+        del self.portfolio[ix]
+        self.hlprs.add_to_manager(self.strat_name, 'portfolio', self.portfolio)
+        del self.portfolio_instr[ix]
+        # self.add_to_monitor('portfolio_instr', self.portfolio_instr)
+        self._book_trade_cnt(symbol)
+
     @staticmethod
     def _ticker_len_n_type_check(bid_or_ask_li):
         # log_start = datetime.datetime.now()
@@ -316,10 +293,8 @@ class LiveTrading(MethodManager_):
         # )
         return n_ticks
 
+    @timed
     def req_handling(self, ticker, type_):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.hlprs.add_to_manager(self.strat_name, *log.monitor())
         # unix_ts = int(time.time())
         self.req_tracker['total'] += 1
         self.req_tracker['open_market_data_reqs'] += 1
@@ -327,7 +302,6 @@ class LiveTrading(MethodManager_):
 
         # status = -1 means immediately kill connections
         status = self.pacing_violations(type_)
-        log.log()
         if status == -1:
             print('get connections here')
             # do sth
@@ -336,19 +310,24 @@ class LiveTrading(MethodManager_):
             return
 
     def req_handler(self, toggle):
+        """
+        :return: False if toggle is 'increase' and all market data lines are taken
+        """
         if toggle == 'increase':
-            self.manager_['active_mkt_data_lines'] += 1
+            return self.mkt_data_lines.try_acquire()
         elif toggle == 'decrease':
-            self.manager_['active_mkt_data_lines'] -= 1
+            self.mkt_data_lines.release()
+            return True
         else:
             raise Exception('not defined')
 
+    @observed('req_mkt_dpt_ticker_')
     def req_mkt_dpt_ticker_(self, contract_):
         _cnt_ = 0
         status = 1
+        ticker = None
         while _cnt_ < N_TRIES_IF_SIMULT_REQS:
-            if self.manager_['active_mkt_data_lines'] < IB_PACING['mkt_data_lines']:
-                self.req_handler('increase')
+            if self.req_handler('increase'):
                 ticker = self.ib.reqMktDepth(contract_)
                 self.ib.sleep(SIMULT_REQS_INTERVAL)  # wait here because ticker needs updateEvent might not be fast enough
             else:
@@ -364,14 +343,16 @@ class LiveTrading(MethodManager_):
         self.ib.cancelMktDepth(contract_)
         self.req_handler('decrease')
 
+    def req_fundamental_data(self, contract_, report_type):
+        self.pacing.acquire('fundaData', sleep_fn=self.ib.sleep)
+        return self.ib.reqFundamentalData(contract_, report_type)
+
     @staticmethod
     def _get_ib_pacing():
         return IB_PACING
 
+    @timed
     def pacing_violations(self, type_):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.hlprs.add_to_manager(self.strat_name, *log.monitor())
         # histData, mktDepth, scannerData
 
         # TODO: far from done here, continue at some point
@@ -391,9 +372,7 @@ class LiveTrading(MethodManager_):
             status = 0
         elif type_ == 'scannerData':
             status = 0
-        log.log(status
-            ,self.req_tracker)
-        self.hlprs.add_to_manager(self.strat_name, *log.monitor())
+        logging_.log_values(self.runtime_tm, 'LiveTrading,pacing_violations', status, self.req_tracker)
         return status
 
     def check_network_requirements(self):
@@ -0,0 +1,188 @@
+import os
+import time
+import atexit
+import pickle
+import struct
+import threading
+from collections import deque
+from multiprocessing import util
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'log')
+SEGMENT_EXT = '.bin'
+LEN_PREFIX = struct.Struct('<I')
+
+MAX_QUEUED_BYTES = 64 * 1024 * 1024  # records beyond are dropped, not queued
+MAX_BATCH_BYTES = 1024 * 1024
+FLUSH_SECS = .5
+FSYNC_SECS = 5
+
+_writers = {}  # (pid, path): BinaryLogWriter
+_writers_lock = threading.Lock()
+
+
+class BinaryLogWriter:
+    def __init__(self, path, max_queued_bytes=MAX_QUEUED_BYTES, flush_secs=FLUSH_SECS, fsync_secs=FSYNC_SECS):
+        """
+        Append-only log segment of length-prefixed pickled records, written by a
+        background thread. put only appends the already pickled record to an
+        in-memory queue, so logging adds no syscalls to the trading path; the thread
+        writes whatever queued up in one write per batch and fsyncs every fsync_secs.
+        Once max_queued_bytes are waiting, further records are dropped and counted.
+        """
+        self.path = path
+        self.max_queued_bytes = max_queued_bytes
+        self.flush_secs = flush_secs
+        self.fsync_secs = fsync_secs
+        self.n_written, self.n_dropped, self.bytes_written = 0, 0, 0
+        self._queued_bytes = 0
+        self._q = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='BinaryLogWriter', daemon=True)
+        self._thread.start()
+
+    def put(self, record):
+        """
+        :return: False if the record was dropped
+        """
+        item, n_bytes = self._encode(record)
+        with self._lock:
+            if self._closed or self._queued_bytes + n_bytes > self.max_queued_bytes:
+                self.n_dropped += 1
+                return False
+            self._queued_bytes += n_bytes
+            self._q.append((item, n_bytes))
+        if self._queued_bytes >= MAX_BATCH_BYTES:
+            self._wake.set()
+        return True
+
+    def stats(self):
+        return {'n_written': self.n_written, 'n_dropped': self.n_dropped,
+                'bytes_written': self.bytes_written, 'queued_bytes': self._queued_bytes}
+
+    def flush(self, timeout_secs=None):
+        """
+        Blocks until everything queued so far is written.
+        """
+        deadline = None if timeout_secs is None else time.time() + timeout_secs
+        while self._queued_bytes > 0 and self._thread.is_alive():
+            if deadline is not None and time.time() > deadline:
+                return False
+            self._wake.set()
+            time.sleep(.005)
+        return self._queued_bytes == 0
+
+    def close(self):
+        if self._closed:
+            return
+        with self._lock:
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._open()
+        try:
+            last_fsync = time.time()
+            while True:
+                self._wake.wait(self.flush_secs)
+                self._wake.clear()
+                self._write_batches()
+                if time.time() - last_fsync >= self.fsync_secs or self._closed:
+                    self._sync()
+                    last_fsync = time.time()
+                if self._closed and not self._q:
+                    return
+        finally:
+            self._close_files()
+
+    def _write_batches(self):
+        while self._q:
+            batch, n_bytes = [], 0
+            while self._q and n_bytes < MAX_BATCH_BYTES:
+                item, n = self._q.popleft()
+                batch.append(item)
+                n_bytes += n
+            self.bytes_written += self._write(batch)
+            with self._lock:
+                self._queued_bytes -= n_bytes
+            self.n_written += len(batch)
+        self._flush()
+
+    # on-disk format, called in the caller (_encode) or the writer thread (rest)
+    def _encode(self, record):
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        return payload, len(payload)
+
+    def _open(self):
+        self._f = open(self.path, 'ab')
+
+    def _write(self, batch):
+        """
+        :return: bytes written
+        """
+        buf = b''.join(LEN_PREFIX.pack(len(payload)) + payload for payload in batch)
+        self._f.write(buf)
+        return len(buf)
+
+    def _flush(self):
+        self._f.flush()
+
+    def _sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def _close_files(self):
+        self._f.close()
+
+
+def segment_path(run_id, pid=None, ext=SEGMENT_EXT):
+    return os.path.join(LOG_DIR, str(run_id), '{}{}'.format(os.getpid() if pid is None else pid, ext))
+
+
+def get_writer(run_id, writer_cls=BinaryLogWriter, ext=SEGMENT_EXT):
+    """
+    One writer per process and run, created on first use; forked children get their
+    own since the parent's thread does not exist in them.
+    """
+    path = segment_path(run_id, ext=ext)
+    key = (os.getpid(), path)
+    writer = _writers.get(key)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None:
+                writer = writer_cls(path)
+                _writers[key] = writer
+                atexit.register(writer.close)
+                # multiprocessing children leave through os._exit, atexit does not run there
+                util.Finalize(writer, writer.close, exitpriority=10)
+    return writer
+
+
+def close_writer(run_id, ext=SEGMENT_EXT):
+    """
+    Closes this process' writer of run_id under the current LOG_DIR, the next
+    get_writer opens a new one.
+    """
+    writer = _writers.pop((os.getpid(), segment_path(run_id, ext=ext)), None)
+    if writer is not None:
+        writer.close()
+
+
+def read_records(path):
+    """
+    :return: generator over the records of a segment, stops at a truncated tail
+    """
+    with open(path, 'rb') as f:
+        while True:
+            prefix = f.read(LEN_PREFIX.size)
+            if len(prefix) < LEN_PREFIX.size:
+                return
+            n = LEN_PREFIX.unpack(prefix)[0]
+            payload = f.read(n)
+            if len(payload) < n:
+                return
+            yield pickle.loads(payload)
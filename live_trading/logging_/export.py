@@ -0,0 +1,158 @@
+import os
+import pickle
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+
+from . import binarylog, logsegment
+
+CHUNK_ROWS = 100000  # rows held in memory at a time, per process
+COLUMNS = ['ts', 'meth', 'kind', 'dur_us', 'value', 'segment']
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _pyarrow():
+    # optional dependency, only the columnar writers need it
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+    except ImportError:
+        raise ImportError('exporting to parquet/arrow needs pyarrow, pip install pyarrow')
+    return pyarrow
+
+
+def _frame(ts, meths, kinds, durs, values, segment):
+    return pd.DataFrame({'ts': np.asarray(ts, dtype=np.float64),
+                         'meth': pd.Series(meths, dtype=object),
+                         'kind': np.asarray(kinds, dtype=np.int8),
+                         'dur_us': np.asarray(durs, dtype=np.int64),
+                         # logged values are arbitrary objects, stored as their repr
+                         'value': pd.Series([None if v is None else repr(v) for v in values], dtype=object),
+                         'segment': segment},
+                        columns=COLUMNS)
+
+
+def _segment_chunks(path, chunk_rows):
+    seg = logsegment.LogSegment(path)
+    name = os.path.basename(seg.stem)
+    meths = np.array(seg.meths + [''], dtype=object)
+    for lo in range(0, len(seg), chunk_rows):
+        records = seg.records[lo:lo + chunk_rows]
+        yield _frame(records['ts'], meths[records['meth_id']], records['kind'], records['dur_us'],
+                     [seg.value(r) for r in records], name)
+
+
+def _legacy_lines(path):
+    if path.endswith(binarylog.SEGMENT_EXT):
+        for record in binarylog.read_records(path):
+            for line in record:
+                yield line
+        return
+    with open(path, 'rb') as p:
+        try:
+            lines = pickle.load(p)
+        except Exception:
+            print('couldnt read', path)
+            return
+    for line in lines:
+        yield line
+
+
+def _legacy_chunks(paths, chunk_rows):
+    """
+    Lines of Logging.log, [ts_str, dur_us, meth, -1] or [-1, meth, -1, value], from
+    binarylog segments and per-call pickle files, regrouped into chunk_rows frames.
+    """
+    ts, meths, kinds, durs, values, segments = [], [], [], [], [], []
+    for path in paths:
+        segment = os.path.basename(path)
+        for line in _legacy_lines(path):
+            if line[0] == -1:
+                ts.append(np.nan)
+                meths.append(line[1])
+                kinds.append(logsegment.KIND_VALUE)
+                durs.append(logsegment.NO_DURATION)
+                values.append(line[3])
+            else:
+                ts.append(float(line[0]))
+                meths.append(line[2])
+                kinds.append(logsegment.KIND_TIMING)
+                durs.append(line[1])
+                values.append(None)
+            segments.append(segment)
+            if len(ts) >= chunk_rows:
+                yield _frame(ts, meths, kinds, durs, values, segments)
+                ts, meths, kinds, durs, values, segments = [], [], [], [], [], []
+    if ts:
+        yield _frame(ts, meths, kinds, durs, values, segments)
+
+
+def iter_chunks(run_id, chunk_rows=CHUNK_ROWS, log_dir=None):
+    """
+    Streams a run folder as DataFrames of at most chunk_rows rows with COLUMNS, so no
+    more than one chunk is in memory whatever the length of the session.
+    """
+    path_ = os.path.join(binarylog.LOG_DIR if log_dir is None else log_dir, str(run_id))
+    legacy = []
+    for i in sorted(os.listdir(path_)):
+        full = os.path.join(path_, i)
+        if not os.path.isfile(full) or i.endswith(('.csv', logsegment.PAYLOAD_EXT, logsegment.TIME_INDEX_EXT,
+                                                   logsegment.METHS_EXT) + tuple(FORMATS.values())):
+            continue
+        if i.endswith(logsegment.RECORDS_EXT):
+            for chunk in _segment_chunks(full, chunk_rows):
+                yield chunk
+        else:
+            legacy.append(full)
+    for chunk in _legacy_chunks(legacy, chunk_rows):
+        yield chunk
+
+
+def export_csv(run_id, out_path, chunk_rows=CHUNK_ROWS, log_dir=None):
+    """
+    :return: number of rows written
+    """
+    n_rows = 0
+    for chunk in iter_chunks(run_id, chunk_rows, log_dir):
+        chunk.to_csv(out_path, mode='w' if n_rows == 0 else 'a', header=n_rows == 0, index=False)
+        n_rows += len(chunk)
+    return n_rows
+
+
+def export_run(run_id, out_dir, fmt='parquet', chunk_rows=CHUNK_ROWS, log_dir=None):
+    """
+    Writes one columnar file per chunk, partitioned hive-style as
+    out_dir/run_id=<run>/part-<n>.<fmt>, readable as one dataset by pyarrow/pandas.
+    :return: number of rows written
+    """
+    pa = _pyarrow()
+    part_dir = os.path.join(out_dir, 'run_id={}'.format(run_id))
+    os.makedirs(part_dir, exist_ok=True)
+    n_rows = 0
+    for n, chunk in enumerate(iter_chunks(run_id, chunk_rows, log_dir)):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        path = os.path.join(part_dir, 'part-{:05d}{}'.format(n, FORMATS[fmt]))
+        if fmt == 'parquet':
+            pa.parquet.write_table(table, path)
+        else:
+            pa.feather.write_feather(table, path)
+        n_rows += len(chunk)
+    return n_rows
+
+
+def _export_run_args(args):
+    run_id = args[0]
+    return run_id, export_run(*args)
+
+
+def export_runs(run_ids, out_dir, fmt='parquet', chunk_rows=CHUNK_ROWS, log_dir=None, n_procs=None):
+    """
+    Converts many run folders in parallel, one run per worker at a time.
+    :param n_procs: pool size, os.cpu_count() if None
+    :return: run_id: number of rows written
+    """
+    _pyarrow()
+    args = [(run_id, out_dir, fmt, chunk_rows, log_dir) for run_id in run_ids]
+    with Pool(n_procs) as pool:
+        return dict(pool.imap_unordered(_export_run_args, args))
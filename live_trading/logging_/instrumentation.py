@@ -0,0 +1,94 @@
+import os
+import time
+import functools
+from collections import OrderedDict
+
+# decided once at import, untraced methods stay the plain functions they were defined as
+TRACING = os.environ.get('LIVE_TRADING_TRACING', '0') not in ('', '0')
+N_BUCKETS = 64  # bucket i counts calls of [2 ** (i - 1), 2 ** i) ns
+
+histograms = OrderedDict()  # 'Class,meth': LatencyHistogram
+_curr_meth = ['']
+_curr_meth_sinks = []  # at most one, called with each method entered
+
+
+class LatencyHistogram:
+    __slots__ = ['counts', 'n', 'total_ns', 'max_ns']
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.n = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        self.counts[min(ns.bit_length(), N_BUCKETS - 1)] += 1
+        self.n += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile_ns(self, q):
+        """
+        :return: upper bound of the bucket holding the q-th percentile
+        """
+        if self.n == 0:
+            return 0
+        rank = q / 100 * self.n
+        cum = 0
+        for i, c in enumerate(self.counts):
+            cum += c
+            if cum >= rank:
+                return min(2 ** i, self.max_ns)
+        return self.max_ns
+
+    def report(self):
+        return OrderedDict([('n', self.n),
+                            ('mean_us', round(self.total_ns / self.n / 1000, 3) if self.n else 0.0),
+                            ('p50_us', round(self.percentile_ns(50) / 1000, 3)),
+                            ('p99_us', round(self.percentile_ns(99) / 1000, 3)),
+                            ('max_us', round(self.max_ns / 1000, 3))])
+
+
+def timed(func, enabled=None):
+    """
+    Method decorator replacing the per-call logging_.Logging set-up. Without tracing
+    the function is returned as is; with LIVE_TRADING_TRACING=1 in the environment
+    each call is timed with perf_counter_ns into histograms['Class,meth'] and the
+    method is published as the current one.
+    """
+    if not (TRACING if enabled is None else enabled):
+        return func
+    name = func.__qualname__.replace('.', ',')
+    hist = histograms.setdefault(name, LatencyHistogram())
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _curr_meth[0] = name
+        if _curr_meth_sinks:
+            _curr_meth_sinks[0](name)
+        t0 = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            hist.record(perf_counter_ns() - t0)
+    return wrapper
+
+
+def curr_meth():
+    return _curr_meth[0]
+
+
+def publish_curr_meth(sink):
+    """
+    :param sink: called with 'Class,meth' whenever a timed method is entered, e.g.
+        to show it on metricsboard.MetricsBoard; None to stop
+    """
+    del _curr_meth_sinks[:]
+    if sink is not None:
+        _curr_meth_sinks.append(sink)
+
+
+def report():
+    return OrderedDict((name, hist.report()) for name, hist in histograms.items() if hist.n > 0)
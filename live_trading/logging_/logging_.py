@@ -5,6 +5,8 @@ import os
 import pandas as pd
 import numpy as np
 
+from . import binarylog, logsegment, export
+
 class Logging:
     def __init__(self, runtime_tm, log_start, meth_str):
         self.runtime_tm = runtime_tm
@@ -15,15 +17,12 @@ class Logging:
 
     def log(self, *args):
         self.logging_behavior = 'write'#'print write'
-        self.saving_behavior = 'folder' #single_file
         self.pickle_obj = []
         if self.logging:
             # self.runtime_tm = str(np.array(pd.DataFrame([[runtime_tm]])).astype(np.int64)[0, 0])
             # self.runtime_tm = str(int(time.time()))
             # log_start_unix_ts = str(np.array(pd.DataFrame([[log_start]])).astype(np.int64)[0, 0])
             log_start_unix_ts = str(float(time.mktime(self.log_start.timetuple())))
-            pickle_name = '{}'
-            path = str(os.path.dirname(os.path.realpath(__file__))) + '\\..\\log\\'
             dur = datetime.datetime.now() - self.log_start
             dur_microsecs = dur.seconds * 1000000 + dur.microseconds
             line = [log_start_unix_ts, dur_microsecs, self.meth_str, -1]
@@ -40,35 +39,16 @@ class Logging:
                         print(line)
             if self.logging_behavior == 'print':
                 return
-            file_name = int(time.mktime(self.runtime_tm.timetuple()))
-            dir = os.listdir(path)
-            first_log = True if str(file_name) not in dir else False
-            if self.saving_behavior == 'folder':
-                store_in = path + '\\{}'.format(str(file_name))
-                pickle_name2 = str(time.time()).replace('.','')
-                if not os.path.exists(store_in):
-                    os.makedirs(store_in)
-                with open(store_in + '\\{}'.format(pickle_name2), 'wb') as f:
-                    pickle.dump(self.pickle_obj, f)
-            elif self.saving_behavior == 'single_file':
-                if first_log:
-                    with open(path + pickle_name.format(str(file_name)), 'wb') as f:
-                        pickle.dump(self.pickle_obj, f)
-                else:
-                    with open(path + str(file_name), 'rb') as p:
-                        read_ = pickle.load(p)
-                    with open(path + pickle_name.format(str(file_name)), 'wb') as f:
-                        store = read_ + self.pickle_obj
-                        store2 = np.array(store)
-                        pickle.dump(store, f)
+            # queued for the background writer of this process, see logsegment
+            logsegment.get_writer(int(time.mktime(self.runtime_tm.timetuple()))).put(self.pickle_obj)
 
     def monitor(self):
         return ('curr_meth', self.meth_str) if self.monitor_toggle else ('curr_meth', '')
 
     @classmethod
     def reader(cls, file_name):
-        path_ = str(os.path.dirname(os.path.realpath(__file__))) + '\\..\\log\\'
-        with open(path_ + file_name, 'rb') as p:
+        path_ = binarylog.LOG_DIR
+        with open(os.path.join(path_, file_name), 'rb') as p:
             read_ = pickle.load(p)
         return read_, path_
 
@@ -76,22 +56,54 @@ class Logging:
     def export_csv(cls, file_name):
         read_, path_ = cls.reader(file_name)
         df = pd.DataFrame(read_[0])
-        df.to_csv(path_ + str(file_name) + '.csv')
+        df.to_csv(os.path.join(path_, str(file_name) + '.csv'))
 
     @classmethod
-    def folder_concat_n_export_csv(cls, folder_name):
-        path_ = str(os.path.dirname(os.path.realpath(__file__))) + '\\..\\log\\{}\\'.format(str(folder_name))
-        # read_, path_ = cls.reader(file_name)
-        dir = os.listdir(path_)
-        for j, i in enumerate(dir):
-            with open(path_ + i, 'rb') as p:
+    def folder_reader(cls, folder_name):
+        """
+        :return: all lines of a run folder, from logsegment and binarylog segments and
+            from the single pickle files written by older versions; use
+            logsegment.LogRun to query a run by time or method without loading it
+        """
+        path_ = os.path.join(binarylog.LOG_DIR, str(folder_name))
+        lines = []
+        for i in sorted(os.listdir(path_)):
+            if i.endswith(('.csv', logsegment.PAYLOAD_EXT, logsegment.TIME_INDEX_EXT, logsegment.METHS_EXT)):
+                continue
+            if i.endswith(logsegment.RECORDS_EXT):
+                lines.extend(logsegment.LogSegment(os.path.join(path_, i)).lines())
+                continue
+            if i.endswith(binarylog.SEGMENT_EXT):
+                for record in binarylog.read_records(os.path.join(path_, i)):
+                    lines.extend(record)
+                continue
+            with open(os.path.join(path_, i), 'rb') as p:
                 try:
-                    read_ = pickle.load(p)
+                    lines.extend(pickle.load(p))
                 except:
                     print('couldnt read')
-            if j == 0:
-                df = pd.DataFrame(read_)
-            else:
-                prel_df = pd.DataFrame(read_)
-                df = pd.concat([df, prel_df])
-        df.to_csv(path_ + str(folder_name) + '.csv')
\ No newline at end of file
+        return lines, path_
+
+    @classmethod
+    def folder_concat_n_export_csv(cls, folder_name):
+        lines, path_ = cls.folder_reader(folder_name)
+        df = pd.DataFrame(lines)
+        df.to_csv(os.path.join(path_, str(folder_name) + '.csv'))
+
+    @classmethod
+    def folder_export_columnar(cls, folder_name, fmt='parquet', out_dir=None):
+        """
+        Chunk by chunk, unlike folder_concat_n_export_csv, see export.export_run.
+        :param out_dir: <run folder>/<fmt> if None
+        """
+        path_ = os.path.join(binarylog.LOG_DIR, str(folder_name))
+        return export.export_run(folder_name, os.path.join(path_, fmt) if out_dir is None else out_dir, fmt)
+
+def log_values(runtime_tm, meth_str, *args):
+    """
+    The value lines of Logging.log without building a Logging object, for methods
+    timed by instrumentation.timed.
+    :param meth_str: 'Class,meth'
+    """
+    if args:
+        logsegment.get_writer(int(time.mktime(runtime_tm.timetuple()))).put([[-1, meth_str, -1, arg] for arg in args])
@@ -0,0 +1,236 @@
+import os
+import time
+import glob
+import pickle
+import numpy as np
+import pandas as pd
+
+from . import binarylog
+from .binarylog import BinaryLogWriter
+
+RECORDS_EXT, PAYLOAD_EXT, TIME_INDEX_EXT, METHS_EXT = '.rec', '.dat', '.tix', '.meths'
+KIND_TIMING, KIND_VALUE = 0, 1  # Logging.log duration line, one logged value
+NO_DURATION = -1
+TIME_INDEX_STRIDE = 1024  # one (ts, record_no) index entry per this many records
+
+RECORD_DTYPE = np.dtype([('ts', np.float64),
+                         ('meth_id', np.int32),
+                         ('kind', np.int8),
+                         ('dur_us', np.int64),
+                         ('payload_off', np.int64),
+                         ('payload_len', np.int32)])
+TIME_INDEX_DTYPE = np.dtype([('ts', np.float64), ('record_no', np.int64)])
+
+
+class SegmentLogWriter(BinaryLogWriter):
+    def __init__(self, path, clock=time.time, **kwargs):
+        """
+        Same background writer as BinaryLogWriter, but each logged line becomes a fixed
+        RECORD_DTYPE row in <pid>.rec with its value pickled into <pid>.dat, so a
+        segment can be memory-mapped and searched by LogSegment without parsing it.
+        Every TIME_INDEX_STRIDE rows the timestamp goes into the sidecar <pid>.tix,
+        method names get ids in order of first appearance, one per line of <pid>.meths.
+        All four files are append-only, a reader ignores a torn tail.
+        :param path: any of the segment's files or their common stem
+        :param clock: stamps the lines when they are logged
+        """
+        self.stem = os.path.splitext(path)[0]
+        self.clock = clock
+        self._meth_ids = {}
+        self._n_records, self._payload_off, self._last_ts = 0, 0, 0.0
+        super(SegmentLogWriter, self).__init__(self.stem + RECORDS_EXT, **kwargs)
+
+    def _encode(self, record):
+        """
+        :param record: lines as built by logging_.Logging.log/log_values
+        """
+        ts = self.clock()
+        rows, n_bytes = [], 0
+        for line in record:
+            if line[0] == -1:
+                payload = pickle.dumps(line[3], protocol=pickle.HIGHEST_PROTOCOL)
+                rows.append((ts, line[1], KIND_VALUE, NO_DURATION, payload))
+            else:
+                payload = b''
+                rows.append((ts, line[2], KIND_TIMING, line[1], payload))
+            n_bytes += RECORD_DTYPE.itemsize + len(payload)
+        return rows, n_bytes
+
+    def _open(self):
+        self._f = open(self.stem + RECORDS_EXT, 'ab')
+        self._payload_f = open(self.stem + PAYLOAD_EXT, 'ab')
+        self._index_f = open(self.stem + TIME_INDEX_EXT, 'ab')
+        self._meths_f = open(self.stem + METHS_EXT, 'a')
+        # appending to a segment of an earlier writer of this pid/run
+        self._n_records = os.path.getsize(self.stem + RECORDS_EXT) // RECORD_DTYPE.itemsize
+        self._payload_off = os.path.getsize(self.stem + PAYLOAD_EXT)
+        with open(self.stem + METHS_EXT) as f:
+            self._meth_ids = {meth: i for i, meth in enumerate(f.read().splitlines())}
+        if self._n_records > 0:
+            last = np.fromfile(self.stem + RECORDS_EXT, dtype=RECORD_DTYPE, count=1,
+                               offset=(self._n_records - 1) * RECORD_DTYPE.itemsize)
+            self._last_ts = float(last['ts'][0])
+
+    def _write(self, batch):
+        rows = [row for record in batch for row in record]
+        recs = np.zeros(len(rows), dtype=RECORD_DTYPE)
+        payloads, index = [], []
+        for i, (ts, meth, kind, dur_us, payload) in enumerate(rows):
+            meth_id = self._meth_ids.get(meth)
+            if meth_id is None:
+                meth_id = self._meth_ids[meth] = len(self._meth_ids)
+                self._meths_f.write(str(meth).replace('\n', ' ') + '\n')
+            # clock steps back are clamped, the index relies on ts never decreasing
+            ts = self._last_ts = max(ts, self._last_ts)
+            recs[i] = (ts, meth_id, kind, dur_us, self._payload_off, len(payload))
+            payloads.append(payload)
+            self._payload_off += len(payload)
+            if (self._n_records + i) % TIME_INDEX_STRIDE == 0:
+                index.append((ts, self._n_records + i))
+        self._n_records += len(rows)
+        # payloads and method names first, a record is never visible before what it points to
+        payload_buf = b''.join(payloads)
+        self._payload_f.write(payload_buf)
+        self._meths_f.flush()
+        self._payload_f.flush()
+        self._f.write(recs.tobytes())
+        if index:
+            self._index_f.write(np.array(index, dtype=TIME_INDEX_DTYPE).tobytes())
+        return recs.nbytes + len(payload_buf)
+
+    def _flush(self):
+        for f in (self._meths_f, self._payload_f, self._f, self._index_f):
+            f.flush()
+
+    def _sync(self):
+        for f in (self._meths_f, self._payload_f, self._f, self._index_f):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _close_files(self):
+        for f in (self._meths_f, self._payload_f, self._f, self._index_f):
+            f.close()
+
+
+def get_writer(run_id):
+    return binarylog.get_writer(run_id, writer_cls=SegmentLogWriter, ext=RECORDS_EXT)
+
+
+def close_writer(run_id):
+    binarylog.close_writer(run_id, ext=RECORDS_EXT)
+
+
+def _memmap(path, dtype):
+    n = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(n,))
+
+
+class LogSegment:
+    def __init__(self, path):
+        """
+        Read-only view of one SegmentLogWriter segment. The records are memory-mapped,
+        lookups return slices of them without copying or reading the rest of the file.
+        :param path: any of the segment's files or their common stem
+        """
+        self.stem = os.path.splitext(path)[0]
+        self.payload = _memmap(self.stem + PAYLOAD_EXT, np.dtype(np.uint8))
+        records = _memmap(self.stem + RECORDS_EXT, RECORD_DTYPE)
+        # torn tail: rows whose payload did not make it to disk
+        n = len(records)
+        while n > 0 and records[n - 1]['payload_off'] + records[n - 1]['payload_len'] > len(self.payload):
+            n -= 1
+        self.records = records[:n]
+        self.index = _memmap(self.stem + TIME_INDEX_EXT, TIME_INDEX_DTYPE)
+        with open(self.stem + METHS_EXT) as f:
+            self.meths = f.read().splitlines()
+        self._meth_ids = {meth: i for i, meth in enumerate(self.meths)}
+
+    def __len__(self):
+        return len(self.records)
+
+    def _search(self, ts, side):
+        """
+        Finds the TIME_INDEX_STRIDE block through the sidecar index, then bisects
+        only that block of the mapped records.
+        """
+        n_index = len(self.index)
+        block = np.searchsorted(self.index['ts'], ts, side=side) if n_index else 0
+        lo = int(self.index['record_no'][block - 1]) if block > 0 else 0
+        hi = int(self.index['record_no'][block]) if block < n_index else len(self.records)
+        hi = min(hi + 1, len(self.records))
+        return lo + int(np.searchsorted(self.records['ts'][lo:hi], ts, side=side))
+
+    def time_range(self, start_ts=None, end_ts=None):
+        """
+        :return: records with start_ts <= ts < end_ts, a view into the mapped file
+        """
+        lo = 0 if start_ts is None else self._search(start_ts, 'left')
+        hi = len(self.records) if end_ts is None else self._search(end_ts, 'left')
+        return self.records[lo:max(lo, hi)]
+
+    def by_meth(self, meth_str, start_ts=None, end_ts=None):
+        """
+        :param meth_str: 'Class,meth'
+        """
+        records = self.time_range(start_ts, end_ts)
+        meth_id = self._meth_ids.get(meth_str)
+        if meth_id is None:
+            return records[:0]
+        return records[records['meth_id'] == meth_id]
+
+    def value(self, record):
+        if record['kind'] != KIND_VALUE:
+            return None
+        off = int(record['payload_off'])
+        return pickle.loads(self.payload[off:off + int(record['payload_len'])].tobytes())
+
+    def to_frame(self, records=None, values=True):
+        """
+        :param values: unpickle the logged values, the only per-row Python work
+        """
+        records = self.records if records is None else records
+        df = pd.DataFrame({'ts': records['ts'],
+                           'meth': pd.Categorical.from_codes(records['meth_id'], self.meths) if len(records)
+                           else pd.Categorical([], categories=self.meths),
+                           'kind': records['kind'],
+                           'dur_us': records['dur_us']})
+        if values:
+            df['value'] = [self.value(r) for r in records]
+        return df
+
+    def lines(self):
+        """
+        :return: the records in the line layout of logging_.Logging.log
+        """
+        lines = []
+        for r in self.records:
+            meth = self.meths[r['meth_id']]
+            if r['kind'] == KIND_TIMING:
+                lines.append([str(float(r['ts'])), int(r['dur_us']), meth, -1])
+            else:
+                lines.append([-1, meth, -1, self.value(r)])
+        return lines
+
+
+class LogRun:
+    def __init__(self, run_id, log_dir=None):
+        """
+        All segments of a run folder, one per process.
+        """
+        self.path = os.path.join(binarylog.LOG_DIR if log_dir is None else log_dir, str(run_id))
+        self.segments = [LogSegment(p) for p in sorted(glob.glob(os.path.join(self.path, '*' + RECORDS_EXT)))]
+
+    def to_frame(self, start_ts=None, end_ts=None, meth_str=None, values=True):
+        frames = []
+        for seg in self.segments:
+            records = seg.time_range(start_ts, end_ts) if meth_str is None \
+                else seg.by_meth(meth_str, start_ts, end_ts)
+            df = seg.to_frame(records, values)
+            df['meth'] = df['meth'].astype(str)
+            df['segment'] = os.path.basename(seg.stem)
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=['ts', 'meth', 'kind', 'dur_us', 'value', 'segment'])
+        return pd.concat(frames, ignore_index=True).sort_values('ts', kind='mergesort').reset_index(drop=True)
@@ -0,0 +1,292 @@
+import asyncio
+import queue
+import time
+import datetime
+from collections import OrderedDict
+
+import numpy as np
+from eventkit import Event
+
+from live_trading.utils.helpers import MethodManager_, Lines_
+from live_trading.utils.sharedmemory import SeqLockArray
+
+HUB_HOST, HUB_PORT = '127.0.0.1', 7497  # same TWS as LiveTrading
+HUB_POLL_SECS = .05
+HUB_REPLY_TIMEOUT_SECS = 10
+MAX_DEPTH_RANKS = 10  # reqMktDepth default is 5 rows, dummy books have up to 5, leaves headroom
+HUB_CONFIRM_SECS = 1  # a new subscription without error or book for this long counts as subscribed
+# error codes TWS refuses a depth request with: message rate, max depth requests, not subscribed, no deep data
+MKT_DEPTH_REFUSALS = (100, 309, 354, 10092)
+
+BOOK_DTYPE = np.dtype([('seq', np.int64),
+                       ('update_ts', np.float64),
+                       ('n_bids', np.int16),
+                       ('n_asks', np.int16),
+                       ('bid_price', np.float64, (MAX_DEPTH_RANKS,)),
+                       ('bid_size', np.float64, (MAX_DEPTH_RANKS,)),
+                       ('ask_price', np.float64, (MAX_DEPTH_RANKS,)),
+                       ('ask_size', np.float64, (MAX_DEPTH_RANKS,))])
+
+CONTRACT_IX, TICKER_IX, SLOT_IX, CLIENTS_IX, UNCONFIRMED_IX, DEADLINE_IX = 0, 1, 2, 3, 4, 5
+
+
+def book_board(n_slots):
+    """
+    One order book per subscribed symbol, written by the hub, read by all strategies.
+    """
+    return SeqLockArray(BOOK_DTYPE, n_slots)
+
+
+class MktDataHub(MethodManager_):
+    def __init__(self, board, cmd_q, reply_qs, mkt_data_lines, client_id, ib=None, confirm_secs=HUB_CONFIRM_SECS):
+        """
+        Owns all market depth subscriptions of a run on one IB connection. Strategies
+        send (un)subscribe commands through cmd_q, the hub reference-counts them per
+        symbol, so a symbol watched by several strategies takes one market data line
+        and is requested once. Book updates are written to the symbol's slot on the
+        shared board and picked up there by each strategy's HubClient.
+
+        A new symbol is answered once its first book arrives or confirm_secs passed
+        without TWS refusing it (MKT_DEPTH_REFUSALS on errorEvent); refused, its
+        line and slot are given back and the clients are answered status 1.
+        :param reply_qs: client_id: Queue for the answers to subscribe
+        :param mkt_data_lines: MktDataLineCounter, lines are taken per unique symbol
+        """
+        self.board = board
+        self.cmd_q = cmd_q
+        self.reply_qs = reply_qs
+        self.mkt_data_lines = mkt_data_lines
+        self.client_id = client_id
+        self.ib = ib
+        self.confirm_secs = confirm_secs
+        # symbol: [contract, ticker, slot, set of client_ids, set of client_ids not answered yet, confirm deadline]
+        self.subscriptions = OrderedDict()
+        self.free_slots = list(range(board.n_slots))
+        if ib is not None:
+            ib.errorEvent += self._on_error
+
+    def serve(self):
+        if self.ib is None:
+            from ib_insync import IB
+            self.ib = IB()
+            self.ib.connect(HUB_HOST, HUB_PORT, clientId=self.client_id)
+            self.ib.errorEvent += self._on_error
+        try:
+            while self.handle_cmds():
+                self.ib.sleep(HUB_POLL_SECS)
+        finally:
+            for symbol in list(self.subscriptions.keys()):
+                self._cancel(symbol)
+            self.ib.disconnect()
+
+    def handle_cmds(self):
+        """
+        Drains cmd_q.
+        :return: False once 'stop' was received
+        """
+        while True:
+            try:
+                cmd = self.cmd_q.get_nowait()
+            except queue.Empty:
+                self._confirm_due()
+                return True
+            if cmd[0] == 'subscribe':
+                self.subscribe(*cmd[1:])
+            elif cmd[0] == 'unsubscribe':
+                self.unsubscribe(*cmd[1:])
+            elif cmd[0] == 'release_client':
+                for symbol in [s for s, sub in self.subscriptions.items() if cmd[1] in sub[CLIENTS_IX]]:
+                    self.unsubscribe(cmd[1], symbol)
+            elif cmd[0] == 'stop':
+                return False
+            else:
+                raise Exception('not defined')
+
+    def subscribe(self, client_id, contract_):
+        symbol = contract_.symbol
+        sub = self.subscriptions.get(symbol)
+        if sub is None:
+            if not self.free_slots or not self.mkt_data_lines.try_acquire():
+                self.reply_qs[client_id].put((symbol, None, 1))
+                return
+            slot = self.free_slots.pop(0)
+            self.board.write(slot, update_ts=0.0, n_bids=0, n_asks=0)
+            sub = [contract_, None, slot, set(), set(), time.time() + self.confirm_secs]
+            self.subscriptions[symbol] = sub
+            sub[TICKER_IX] = self.ib.reqMktDepth(contract_)
+            sub[TICKER_IX].updateEvent += self._on_update
+        sub[CLIENTS_IX].add(client_id)
+        if sub[DEADLINE_IX] is None:
+            self.reply_qs[client_id].put((symbol, sub[SLOT_IX], 0))
+        else:
+            sub[UNCONFIRMED_IX].add(client_id)
+
+    def unsubscribe(self, client_id, symbol):
+        sub = self.subscriptions.get(symbol)
+        if sub is None:
+            return
+        sub[CLIENTS_IX].discard(client_id)
+        sub[UNCONFIRMED_IX].discard(client_id)
+        if not sub[CLIENTS_IX]:
+            self._cancel(symbol)
+
+    def n_refs(self, symbol):
+        sub = self.subscriptions.get(symbol)
+        return len(sub[CLIENTS_IX]) if sub is not None else 0
+
+    def _cancel(self, symbol, refused=False):
+        contract_, ticker, slot = self.subscriptions.pop(symbol)[:CLIENTS_IX]
+        ticker.updateEvent -= self._on_update
+        if not refused:
+            self.ib.cancelMktDepth(contract_)
+        self.mkt_data_lines.release()
+        self.free_slots.append(slot)
+
+    def _confirm(self, symbol, status=0):
+        sub = self.subscriptions[symbol]
+        for client_id in sub[UNCONFIRMED_IX]:
+            self.reply_qs[client_id].put((symbol, sub[SLOT_IX] if status == 0 else None, status))
+        sub[UNCONFIRMED_IX].clear()
+        sub[DEADLINE_IX] = None
+
+    def _confirm_due(self):
+        now = time.time()
+        for symbol in [s for s, sub in self.subscriptions.items()
+                       if sub[DEADLINE_IX] is not None and sub[DEADLINE_IX] <= now]:
+            self._confirm(symbol)
+
+    def _on_error(self, req_id, error_code, error_string, contract):
+        if error_code not in MKT_DEPTH_REFUSALS or contract is None:
+            return
+        sub = self.subscriptions.get(contract.symbol)
+        if sub is None or sub[DEADLINE_IX] is None:  # answered, clients may be reading its slot
+            return
+        self._confirm(contract.symbol, status=1)
+        self._cancel(contract.symbol, refused=True)
+
+    def _on_update(self, ticker):
+        sub = self.subscriptions.get(ticker.contract.symbol)
+        if sub is None:
+            return
+        if sub[DEADLINE_IX] is not None:
+            self._confirm(ticker.contract.symbol)
+        bids, asks = ticker.domBids[:MAX_DEPTH_RANKS], ticker.domAsks[:MAX_DEPTH_RANKS]
+        rows = np.zeros(4 * MAX_DEPTH_RANKS)
+        bid_price, bid_size, ask_price, ask_size = np.split(rows, 4)
+        bid_price[:len(bids)] = [l.price for l in bids]
+        bid_size[:len(bids)] = [l.size for l in bids]
+        ask_price[:len(asks)] = [l.price for l in asks]
+        ask_size[:len(asks)] = [l.size for l in asks]
+        self.board.write(sub[SLOT_IX], update_ts=time.time(), n_bids=len(bids), n_asks=len(asks),
+                         bid_price=bid_price, bid_size=bid_size, ask_price=ask_price, ask_size=ask_size)
+
+
+def run_hub(board, cmd_q, reply_qs, mkt_data_lines, client_id):
+    MktDataHub(board, cmd_q, reply_qs, mkt_data_lines, client_id).serve()
+
+
+class HubTicker:
+    def __init__(self, contract, slot):
+        """
+        Stands in for the ib_insync Ticker of a reqMktDepth subscription: contract,
+        domBids/domAsks, time and updateEvent. The books are refreshed from the shared board
+        by HubClient.poll whenever the event loop runs, like ib_insync does for its
+        tickers.
+        """
+        self.contract = contract
+        self.slot = slot
+        self.domBids = []
+        self.domAsks = []
+        self.seq = 0
+        self.time = None  # of the last book update, as on ib_insync's Ticker
+        self.updateEvent = Event('updateEvent')
+
+
+class HubClient(MethodManager_):
+    def __init__(self, board, cmd_q, reply_q, client_id, loop=None):
+        """
+        A strategy's end of MktDataHub, backend of its MktDepthPool.
+        """
+        self.board = board
+        self.cmd_q = cmd_q
+        self.reply_q = reply_q
+        self.client_id = client_id
+        self._loop = loop
+        self.tickers = OrderedDict()  # symbol: HubTicker
+        self._poll_handle = None
+
+    def __getstate__(self):
+        # created in run.py and handed to the strategy process before any subscription
+        return {'board': self.board, 'cmd_q': self.cmd_q, 'reply_q': self.reply_q, 'client_id': self.client_id}
+
+    def __setstate__(self, state):
+        self.__init__(state['board'], state['cmd_q'], state['reply_q'], state['client_id'])
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def subscribe(self, contract_, sleep_fn=time.sleep, timeout_secs=HUB_REPLY_TIMEOUT_SECS):
+        """
+        :param sleep_fn: e.g. LiveTrading.ib.sleep to keep serving events while waiting
+        :return: HubTicker or None, status 0 if subscribed, 1 if not
+        """
+        symbol = contract_.symbol
+        self.cmd_q.put(('subscribe', self.client_id, contract_))
+        deadline = time.time() + timeout_secs
+        while True:
+            try:
+                symbol_, slot, status = self.reply_q.get_nowait()
+            except queue.Empty:
+                if time.time() > deadline:
+                    return None, 1
+                sleep_fn(HUB_POLL_SECS)
+                continue
+            if symbol_ != symbol:
+                # late answer to a subscribe that timed out, give the reference back
+                if status == 0 and symbol_ not in self.tickers:
+                    self.cmd_q.put(('unsubscribe', self.client_id, symbol_))
+                continue
+            if status != 0:
+                return None, status
+            ticker = HubTicker(contract_, slot)
+            self.tickers[symbol] = ticker
+            self._refresh(ticker)
+            self._arm()
+            return ticker, 0
+
+    def unsubscribe(self, symbol):
+        if self.tickers.pop(symbol, None) is not None:
+            self.cmd_q.put(('unsubscribe', self.client_id, symbol))
+
+    def poll(self):
+        """
+        Refreshes the tickers whose book changed and emits their updateEvent.
+        """
+        for ticker in list(self.tickers.values()):
+            if self.board.seq(ticker.slot) != ticker.seq and self._refresh(ticker):
+                ticker.updateEvent.emit(ticker)
+
+    def _refresh(self, ticker):
+        rec = self.board.read(ticker.slot)
+        ticker.seq = int(rec['seq'])
+        if rec['update_ts'] == 0:
+            return False
+        ticker.time = datetime.datetime.fromtimestamp(float(rec['update_ts']), datetime.timezone.utc)
+        ticker.domBids = [Lines_(float(p), float(s)) for p, s in zip(rec['bid_price'][:rec['n_bids']],
+                                                                     rec['bid_size'][:rec['n_bids']])]
+        ticker.domAsks = [Lines_(float(p), float(s)) for p, s in zip(rec['ask_price'][:rec['n_asks']],
+                                                                     rec['ask_size'][:rec['n_asks']])]
+        return True
+
+    def _arm(self):
+        if self._poll_handle is None:
+            self._poll_handle = self.loop.call_later(HUB_POLL_SECS, self._on_poll)
+
+    def _on_poll(self):
+        self._poll_handle = None
+        self.poll()
+        if self.tickers:
+            self._arm()
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+from live_trading.utils.helpers import MethodManager_
+
+CONTRACT_IX, TICKER_IX = 0, 1
+
+
+class MktDepthPool(MethodManager_):
+    def __init__(self, live_trading, hub=None):
+        """
+        Keeps reqMktDepth tickers alive for the whole trading session instead of
+        subscribing and cancelling them on every bar. A symbol only leaves the pool
+        when it is rotated out by Scanners_1.reshuffle_winners or at session end.
+        :param hub: HubClient, subscribe through the shared MktDataHub instead of
+            this strategy's own IB connection
+        """
+        self.lt = live_trading
+        self.hub = hub
+        self.subscriptions = OrderedDict()  # symbol: [contract, ticker]
+
+    def ticker(self, contract_):
+        symbol = contract_.symbol
+        if symbol in self.subscriptions:
+            return self.subscriptions[symbol][TICKER_IX], 0
+        if self.hub is not None:
+            ticker, status = self.hub.subscribe(contract_, sleep_fn=self.lt.ib.sleep)
+        else:
+            ticker, status = self.lt.req_mkt_dpt_ticker_(contract_)
+        if status == 0:
+            self.subscriptions[symbol] = [contract_, ticker]
+            if self.hub is not None and self.lt.recorder is not None:
+                # the hub's depth does not pass the strategy's ib
+                self.lt.recorder.watch(ticker)
+        elif ticker is not None and self.hub is None:
+            # line was taken but the request was refused, hand it back right away
+            self.lt.cancel_mkt_dpt_ticker_(contract_)
+        return ticker, status
+
+    def is_subscribed(self, symbol):
+        return symbol in self.subscriptions
+
+    def symbols(self):
+        return list(self.subscriptions.keys())
+
+    def release(self, symbol):
+        try:
+            contract_, ticker = self.subscriptions.pop(symbol)
+        except KeyError:
+            return False
+        if self.hub is not None:
+            if self.lt.recorder is not None:
+                self.lt.recorder.unwatch(ticker)
+            self.hub.unsubscribe(symbol)
+        else:
+            self.lt.cancel_mkt_dpt_ticker_(contract_)
+        return True
+
+    def release_all(self):
+        for symbol in list(self.subscriptions.keys()):
+            self.release(symbol)
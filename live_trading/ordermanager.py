@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from live_trading.utils.helpers import MethodManager_
+from live_trading.utils import metricsregistry
+
+# ticket states, TIMED_OUT tickets stay in flight until TWS confirms the cancel
+SUBMITTED = 'Submitted'
+FILLED = 'Filled'
+CANCELLED = 'Cancelled'
+TIMED_OUT = 'TimedOut'
+REJECTED = 'Rejected'
+
+
+class OrderTicket:
+    __slots__ = ['symbol', 'action', 'size', 'trade', 'state', 'future', 'placed_tm', 'done_tm',
+                 'timeout_handle', 'on_done']
+
+    def __init__(self, symbol, action, size, trade, future, on_done):
+        self.symbol = symbol
+        self.action = action
+        self.size = size
+        self.trade = trade
+        self.state = SUBMITTED
+        self.future = future
+        self.placed_tm = time.time()
+        self.done_tm = None
+        self.timeout_handle = None
+        self.on_done = on_done
+
+    def is_done(self):
+        return self.done_tm is not None
+
+    @property
+    def fill_price(self):
+        return self.trade.orderStatus.avgFillPrice
+
+    @property
+    def secs_to_done(self):
+        return self.done_tm - self.placed_tm if self.done_tm is not None else None
+
+
+class OrderManager(MethodManager_):
+    def __init__(self, ib, timeout_secs, loop=None, registry=None):
+        """
+        Tracks placed orders through the ib_insync Trade events instead of polling
+        trade.orderStatus in ib.sleep steps, so any number of orders can be in
+        flight while the strategy keeps servicing its other symbols.
+
+        Each order ends up in exactly one of FILLED, CANCELLED, REJECTED or
+        TIMED_OUT (not filled within timeout_secs, then cancelled). On that
+        transition the ticket's future is resolved and its on_done callback is
+        called with the ticket.
+        """
+        self.ib = ib
+        self.timeout_secs = timeout_secs
+        self._loop = loop
+        self.registry = registry if registry is not None else metricsregistry.registry
+        self.in_flight = OrderedDict()  # trade.order.orderId: OrderTicket
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def place(self, contract, order, on_done=None):
+        trade = self.ib.placeOrder(contract, order)
+        ticket = OrderTicket(contract.symbol, order.action, order.totalQuantity, trade,
+                             self.loop.create_future(), on_done)
+        self.in_flight[trade.order.orderId] = ticket
+        trade.filledEvent += self._on_filled
+        trade.cancelledEvent += self._on_cancelled
+        trade.statusEvent += self._on_status
+        ticket.timeout_handle = self.loop.call_later(self.timeout_secs, self._on_timeout, ticket)
+        # events may have been emitted already while placing, e.g. an immediate reject
+        self._on_status(trade)
+        return ticket
+
+    def has_pending(self, symbol):
+        for ticket in self.in_flight.values():
+            if ticket.symbol == symbol:
+                return True
+        return False
+
+    def n_in_flight(self):
+        return len(self.in_flight)
+
+    def cancel_all(self):
+        for ticket in list(self.in_flight.values()):
+            self.ib.cancelOrder(ticket.trade.order)
+
+    def _ticket(self, trade):
+        return self.in_flight.get(trade.order.orderId)
+
+    def _on_status(self, trade):
+        status = trade.orderStatus.status
+        if status == 'Filled':
+            self._on_filled(trade)
+        elif status in ('Cancelled', 'ApiCancelled'):
+            self._on_cancelled(trade)
+        elif status == 'Inactive':
+            ticket = self._ticket(trade)
+            if ticket is not None:
+                self._resolve(ticket, REJECTED)
+
+    def _on_filled(self, trade):
+        ticket = self._ticket(trade)
+        if ticket is not None:
+            self._resolve(ticket, FILLED)
+
+    def _on_cancelled(self, trade):
+        ticket = self._ticket(trade)
+        if ticket is not None:
+            self._resolve(ticket, TIMED_OUT if ticket.state == TIMED_OUT else CANCELLED)
+
+    def _on_timeout(self, ticket):
+        if ticket.is_done():
+            return
+        # stays in flight until TWS confirms the cancel, a fill racing the cancel still wins
+        ticket.state = TIMED_OUT
+        ticket.timeout_handle = None
+        self.ib.cancelOrder(ticket.trade.order)
+
+    def _resolve(self, ticket, state):
+        if ticket.trade.order.orderId not in self.in_flight:
+            return
+        del self.in_flight[ticket.trade.order.orderId]
+        ticket.state = state
+        ticket.done_tm = time.time()
+        self.registry.inc(metricsregistry.ORDERS, symbol=ticket.symbol, action=ticket.action, state=state)
+        if state == FILLED:
+            self.registry.observe(metricsregistry.ORDER_TO_FILL, ticket.secs_to_done,
+                                  symbol=ticket.symbol, action=ticket.action)
+        if ticket.timeout_handle is not None:
+            ticket.timeout_handle.cancel()
+        trade = ticket.trade
+        trade.filledEvent -= self._on_filled
+        trade.cancelledEvent -= self._on_cancelled
+        trade.statusEvent -= self._on_status
+        if not ticket.future.done():
+            ticket.future.set_result(ticket)
+        if ticket.on_done is not None:
+            ticket.on_done(ticket)
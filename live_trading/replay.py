@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import hashlib
+import datetime
+from collections import OrderedDict, deque
+
+from eventkit import Event
+from ib_insync import (AccountValue, ContractDetails, DOMLevel, OrderStatus, ScanData, Stock, Ticker, Trade)
+
+from live_trading.utils import exceptions_
+from live_trading.utils.clock import VirtualClock
+from live_trading.utils.helpers import MethodManager_
+
+DEPTH, SCAN, FUNDA, ACCOUNT = 'depth', 'scan', 'funda', 'account'
+TS_IX, KIND_IX, KEY_IX, PAYLOAD_IX = 0, 1, 2, 3
+BIDS_IX, ASKS_IX = 0, 1
+ACCOUNT_ID = 'REPLAY'
+END_GRACE_SECS = 60  # sleeping this long past the last record ends the session
+REPLAY_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'replay_sessions')
+
+
+def session_path(run_id, strat_name, replay_dir=REPLAY_DIR):
+    """
+    :param run_id: int(time.mktime(runtime_tm.timetuple())) like the log folders
+    """
+    return os.path.join(replay_dir, str(run_id), '{}.jsonl'.format(strat_name))
+
+
+class SessionRecorder:
+    def __init__(self, path):
+        """
+        Records what a strategy got from TWS during a session, one JSON list
+        [ts, kind, key, payload] per line in arrival order, for ReplayIB: the order
+        book of every depth update, the scanner results, fundamental data and
+        account values. Floats survive the round trip through json unchanged.
+        :param path: see session_path
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._f = open(path, 'w')
+        self.clock = None
+
+    def attach(self, ib, clock, depth_from_ib=True):
+        """
+        Records from the connected ib from now on, timestamps taken from clock.
+        Depth through pendingTickersEvent, scanner and fundamental data by wrapping
+        the request methods of this ib instance.
+        :param depth_from_ib: False if the depth comes from a market data hub instead,
+            its tickers are recorded through watch
+        """
+        self.clock = clock
+        if depth_from_ib:
+            ib.pendingTickersEvent += self._on_pending_tickers
+        req_scanner_data, req_fundamental_data = ib.reqScannerData, ib.reqFundamentalData
+
+        def reqScannerData(subscription, *args, **kwargs):
+            scan = req_scanner_data(subscription, *args, **kwargs)
+            self.scan(subscription.scanCode, [s.contractDetails.contract.symbol for s in scan])
+            return scan
+
+        def reqFundamentalData(contract, reportType, *args, **kwargs):
+            data = req_fundamental_data(contract, reportType, *args, **kwargs)
+            self.fundamentals(contract.symbol, reportType, data)
+            return data
+
+        ib.reqScannerData, ib.reqFundamentalData = reqScannerData, reqFundamentalData
+        self.account(ib.accountValues())
+
+    def _write(self, kind, key, payload):
+        self._f.write(json.dumps([self.clock.time(), kind, key, payload], separators=(',', ':')) + '\n')
+
+    def _on_pending_tickers(self, tickers):
+        for ticker in tickers:
+            if ticker.domBids or ticker.domAsks:
+                self.depth(ticker.contract.symbol, ticker.domBids, ticker.domAsks)
+
+    def watch(self, ticker):
+        """
+        Records the depth updates of a ticker not coming from the attached ib, e.g. a
+        mktdatahub.HubTicker, until unwatch.
+        """
+        ticker.updateEvent += self._on_ticker_update
+
+    def unwatch(self, ticker):
+        ticker.updateEvent -= self._on_ticker_update
+
+    def _on_ticker_update(self, ticker):
+        self.depth(ticker.contract.symbol, ticker.domBids, ticker.domAsks)
+
+    def depth(self, symbol, dom_bids, dom_asks):
+        self._write(DEPTH, symbol, [[[l.price, l.size] for l in dom_bids], [[l.price, l.size] for l in dom_asks]])
+
+    def scan(self, scan_code, symbols):
+        self._write(SCAN, scan_code, list(symbols))
+
+    def fundamentals(self, symbol, report_type, data):
+        self._write(FUNDA, '{},{}'.format(symbol, report_type), data)
+
+    def account(self, account_values):
+        self._write(ACCOUNT, None, [[v.tag, v.value, v.currency] for v in account_values])
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def load_session(path):
+    """
+    :return: records of a SessionRecorder file, stably sorted by ts
+    """
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda r: r[TS_IX])
+
+
+class ReplayIB:
+    def __init__(self, records, clock):
+        """
+        Stand-in for a connected ib_insync.IB that serves recorded records instead
+        of TWS, handed to a strategy through the ib kwarg like by StrategyHost.
+        Depth records are applied to the tickers as clock passes their ts, the n-th
+        request of a scan code or fundamental report gets the n-th recorded answer,
+        orders fill immediately at their limit or the top of the recorded book. So
+        a session replays to the same decisions every time, see digest.
+        :param clock: VirtualClock, its sleeps call self.sleep(0)
+        """
+        self.records = records
+        self.clock = clock
+        clock.sleep_fn = self.sleep
+        self.errorEvent = Event('errorEvent')
+        self.orderStatusEvent = Event('orderStatusEvent')
+        self.pendingTickersEvent = Event('pendingTickersEvent')
+        self.end_ts = records[-1][TS_IX] if records else clock.time()
+        self._depth = deque(r for r in records if r[KIND_IX] == DEPTH)
+        self._answers = {}  # (kind, key): deque of payloads
+        self._account = []
+        for r in records:
+            if r[KIND_IX] in (SCAN, FUNDA):
+                self._answers.setdefault((r[KIND_IX], r[KEY_IX]), deque()).append((r[TS_IX], r[PAYLOAD_IX]))
+            elif r[KIND_IX] == ACCOUNT and not self._account:
+                self._account = r[PAYLOAD_IX]
+        self.books = {}  # symbol: latest [bids, asks] payload
+        self.tickers = OrderedDict()  # symbol: Ticker
+        self.decisions = []  # [ts, action, symbol, qty, price]
+        self.n_ticks = 0
+        self._order_id = 0
+
+    def connect(self, *args, **kwargs):
+        return self
+
+    def disconnect(self):
+        pass
+
+    def isConnected(self):
+        return True
+
+    def sleep(self, secs=0):
+        self.clock.advance(secs)
+        now = self.clock.time()
+        while self._depth and self._depth[0][TS_IX] <= now:
+            self._apply(self._depth.popleft())
+        if not self._depth and now > self.end_ts + END_GRACE_SECS:
+            raise exceptions_.ReplayEndOfSession
+        return True
+
+    def _apply(self, record):
+        symbol = record[KEY_IX]
+        self.books[symbol] = record[PAYLOAD_IX]
+        self.n_ticks += 1
+        ticker = self.tickers.get(symbol)
+        if ticker is not None:
+            self._set_book(ticker, record[PAYLOAD_IX], record[TS_IX])
+            ticker.updateEvent.emit(ticker)
+            self.pendingTickersEvent.emit({ticker})
+
+    @staticmethod
+    def _set_book(ticker, book, ts):
+        ticker.domBids = [DOMLevel(price, size, '') for price, size in book[BIDS_IX]]
+        ticker.domAsks = [DOMLevel(price, size, '') for price, size in book[ASKS_IX]]
+        ticker.time = datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)
+
+    def _answer(self, kind, key):
+        answers = self._answers.get((kind, key))
+        if not answers:
+            return None
+        ts, payload = answers.popleft() if len(answers) > 1 else answers[0]
+        if ts > self.clock.time():
+            # live the answer took until ts to arrive
+            self.sleep(ts - self.clock.time())
+        return payload
+
+    def reqMktDepth(self, contract, numRows=5, isSmartDepth=False, mktDepthOptions=None):
+        ticker = Ticker(contract=contract)
+        book = self.books.get(contract.symbol)
+        if book is not None:
+            self._set_book(ticker, book, self.clock.time())
+        self.tickers[contract.symbol] = ticker
+        return ticker
+
+    def cancelMktDepth(self, contract, isSmartDepth=False):
+        self.tickers.pop(contract.symbol, None)
+
+    def reqScannerData(self, subscription, scannerSubscriptionOptions=None, scannerSubscriptionFilterOptions=None):
+        symbols = self._answer(SCAN, subscription.scanCode) or []
+        return [ScanData(rank, ContractDetails(contract=Stock(symbol, 'SMART', 'USD')), '', '', '', '')
+                for rank, symbol in enumerate(symbols)]
+
+    def cancelScannerSubscription(self, dataList):
+        pass
+
+    def reqFundamentalData(self, contract, reportType, fundamentalDataOptions=None):
+        return self._answer(FUNDA, '{},{}'.format(contract.symbol, reportType)) or ''
+
+    def reqHistoricalData(self, *args, **kwargs):
+        return []
+
+    def accountValues(self, account=''):
+        return [AccountValue(ACCOUNT_ID, tag, value, currency, '') for tag, value, currency in self._account]
+
+    def accountSummary(self, account=''):
+        return self.accountValues(account)
+
+    def placeOrder(self, contract, order):
+        self._order_id += 1
+        order.orderId = self._order_id
+        price = order.lmtPrice if order.orderType == 'LMT' else self._top_of_book(contract.symbol, order.action)
+        self.decisions.append([self.clock.time(), order.action, contract.symbol, order.totalQuantity, price])
+        trade = Trade(contract, order, OrderStatus(orderId=order.orderId, status='Filled',
+                                                   filled=order.totalQuantity, avgFillPrice=price))
+        self.orderStatusEvent.emit(trade)
+        return trade
+
+    def cancelOrder(self, order):
+        pass
+
+    def _top_of_book(self, symbol, action):
+        book = self.books.get(symbol)
+        if book is None:
+            return 0.
+        levels = book[ASKS_IX] if action == 'BUY' else book[BIDS_IX]
+        return levels[0][0] if levels else 0.
+
+    def digest(self):
+        """
+        :return: sha256 of the decisions, equal for two replays of a session iff they decided the same
+        """
+        return hashlib.sha256(json.dumps(self.decisions, separators=(',', ':')).encode()).hexdigest()
+
+
+class ReplaySession(MethodManager_):
+    def __init__(self, path):
+        """
+        Runs a strategy on a recorded session at maximum speed, through the same
+        ScannerBased -> Scanners_1 -> SimpleMovingAverage -> LiveTrading path as
+        live: a ReplayIB for ib and a VirtualClock starting at the first record,
+        which LiveTrading's own PacingGovernor reads the time from as well.
+        :param path: SessionRecorder file
+        """
+        self.path = path
+        self.records = load_session(path)
+        self.ib = None
+
+    def run(self, strat_name, target, *args, **kwargs):
+        """
+        :param target: e.g. ScannerBased, called as target(strat_name, *args, ib=, clock=, **kwargs)
+        :return: report of the replay, see report
+        """
+        start_ts = self.records[0][TS_IX] if self.records else time.time()
+        clock = VirtualClock(datetime.datetime.fromtimestamp(start_ts))
+        self.ib = ReplayIB(self.records, clock)
+        t0 = time.perf_counter()
+        try:
+            target(strat_name, *args, ib=self.ib, clock=clock, **kwargs)
+        except exceptions_.ReplayEndOfSession:
+            pass
+        return self.report(time.perf_counter() - t0, clock.elapsed())
+
+    def report(self, wall_secs, session_secs):
+        return OrderedDict([('n_ticks', self.ib.n_ticks),
+                            ('n_decisions', len(self.ib.decisions)),
+                            ('session_secs', session_secs),
+                            ('wall_secs', round(wall_secs, 6)),
+                            ('ticks_per_sec', round(self.ib.n_ticks / wall_secs, 1) if wall_secs > 0 else None),
+                            ('digest', self.ib.digest())])
+
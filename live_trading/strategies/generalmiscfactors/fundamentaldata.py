@@ -32,13 +32,13 @@ class FinRatios(FundamentalData):
         else:
             mult_ = 1
         threshold_ = int(threshold_[:-1]) * mult_
-        self.lt.hlprs.add_to_manager(self.lt.manager_, *log.monitor())
+        self.lt.hlprs.add_to_manager(self.lt.strat_name, *log.monitor())
 
         contract_ = Stock(symbol_, 'ISLAND', 'USD')
-        snapshot_xml = self.lt.ib.reqFundamentalData(contract_, 'ReportSnapshot')
+        snapshot_xml = self.lt.req_fundamental_data(contract_, 'ReportSnapshot')
         if len(snapshot_xml) > 0:
             snapshot = xmltodict.parse(snapshot_xml)
-            fin_stat_xml = self.lt.ib.reqFundamentalData(contract_, 'ReportsFinStatements')
+            fin_stat_xml = self.lt.req_fundamental_data(contract_, 'ReportsFinStatements')
             fin_stat = xmltodict.parse(fin_stat_xml)
             px_ = float(snapshot \
                 ['ReportSnapshot']\
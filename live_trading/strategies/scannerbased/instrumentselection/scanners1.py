@@ -1,19 +1,22 @@
-from collections import OrderedDict
+from collections import OrderedDict, Counter
 import datetime
-import time
 import sys
+import time
 from ib_insync import ScannerSubscription, Stock
 import random
-import pandas as pd
 import copy
 
 from live_trading.logging_ import logging_
-from live_trading.utils import exceptions_, helpers, consoledisplay
+from live_trading.logging_.instrumentation import timed
+from live_trading.utils import exceptions_, helpers, consoledisplay, metricsregistry
+from live_trading.utils.metricsregistry import observed
 from live_trading.strategies.generalmiscfactors.generalmiscfactors import GeneralMiscFactors
 from live_trading.strategies.generalmiscfactors.fundamentaldata import FinRatios
 
 from .instrumentselection import InstrSelection
 
+EVENT_FLOW_SECS = .1  # event-driven: longest a queued update_trade_flow waits for the bar loop to run it
+
 class FACTORS:
     __slots__ = ['bar_size_secs', 'order_type', 'analysis_logic_start_time', 'trading_logic_start_time', 'positive_factors', 'negative_factors', 'black_list']
     def __init__(self, bar_size_secs, order_type, analysis_logic_start_time, trading_logic_start_time, positive_factors, negative_factors):
@@ -34,11 +37,11 @@ class Scanners_1(FACTORS, InstrSelection):
         # helpers.MethodManager_.__init__(self)
         self.strat = strat
         self.signals = signals
+        self.registry = self.strat.lt.registry
         FACTORS.__init__(self, bar_size_secs, order_type, *instr_select_args)
         InstrSelection.__init__(self, self.strat.debugging)
 
         self.__traded_instr = None
-        self.__hist_data_winners_df = pd.DataFrame(columns=['symbol','unix_ts','side','rank','price','size'])
         self.ss = ScannerSubscription()
         self.ss.instrument = "STK"  # STOCK.EU
         self.ss.locationCode = "STK.NASDAQ"  # US.MAJOR
@@ -48,16 +51,10 @@ class Scanners_1(FACTORS, InstrSelection):
         self.run_()
 
     def run_(self):
-        if self.strat.debugging.dummy_time:
-            _now = self.strat.lt._manipulated_time(datetime.datetime.now())
-        else:
-            _now = datetime.datetime.now()
+        _now = self.strat.lt.clock.now()
         while self.strat.lt.us_tz_op(_now).time() < datetime.datetime.strptime(self.analysis_logic_start_time, '%H:%M:%S').time():
-            if self.strat.debugging.dummy_time:
-                _now = self.strat.lt._manipulated_time(datetime.datetime.now())
-            else:
-                _now = datetime.datetime.now()
-            self.strat.lt.ib.sleep(5)
+            _now = self.strat.lt.clock.now()
+            self.strat.lt.clock.sleep(5)
 
         _analysis_logic = datetime.datetime.strptime(self.analysis_logic_start_time, '%H:%M:%S')  # .time()
         _trading_logic = datetime.datetime.strptime(self.trading_logic_start_time, '%H:%M:%S')  # .time()
@@ -75,15 +72,18 @@ class Scanners_1(FACTORS, InstrSelection):
                     break
                 except Exception as e:
                     self.cons_disp.print_warning('waiting 60 secs because no winner could be determined in this iteration')
-                    self.strat.lt.ib.sleep(60)
+                    self.strat.lt.clock.sleep(60)
                     _tries += 1
         else:
             raise Exception('couldnt determine winners')
-        _par = self.strat.parallel_traded_instr_per_strat
+        _par = self.strat.request_lines(len(self.__winners))
         _until = _par if _par < len(self.__winners) else len(self.__winners)
         pre_select = self.__winners[0:_until]
         self._iter_ = 0
         traded_instr_this_strat = self._check_tradeability_of_instr(pre_select)
+        if self.strat.event_driven and not self.strat.debugging.dummy_data:
+            self.run_event_driven(traded_instr_this_strat)
+            return
         while True:
             # for customReqId, symbol in enumerate(self.strat.lt.traded_instr):
             for customReqId, symbol in enumerate(traded_instr_this_strat):
@@ -96,7 +96,7 @@ class Scanners_1(FACTORS, InstrSelection):
                         self.last_price[symbol] = 236.39
                     # simulate down turn after n minutes
                     mins_down_turn = 4
-                    delta_mins = (datetime.datetime.now() - self.strat.lt.start_cet).seconds * 60
+                    delta_mins = self.strat.lt.clock.elapsed() / 60
                     if delta_mins < mins_down_turn:
                         # _sign = random.choice(['+','-'])
                         _sign = '+'
@@ -115,15 +115,14 @@ class Scanners_1(FACTORS, InstrSelection):
                                                     helpers.Lines_(price=_price - 0.6, size=_size * (1 - 0.20)),
                                                     helpers.Lines_(price=_price - 0.7, size=_size * (1 - 0.25))])
                 else:
-                    ticker, status = self.strat.lt.req_mkt_dpt_ticker_(contract)
+                    ticker, status = self.strat.lt.mkt_dpt_pool.ticker(contract)
                 # self.market_open.lt.req_handling(ticker, 'mktDepth')
                 if customReqId == 0:
-                    self.last_iteration = datetime.datetime.now()
-                    unix_ts = int(time.time())
+                    self.last_iteration = self.strat.lt.clock.now()
+                    unix_ts = int(self.strat.lt.clock.time())
                 if status != 1:
                     status = self.collect_hist_ticks(ticker, unix_ts)
                 if status == 1:
-                    self.strat.lt.cancel_mkt_dpt_ticker_(contract)
                     next_in_line = self.__winners.pop(0)
                     self.reshuffle_winners(self.strat.parallel_traded_instr_per_strat, next_in_line, remove=symbol)
                     traded_instr_this_strat = self._check_tradeability_of_instr(traded_instr_this_strat)
@@ -136,36 +135,137 @@ class Scanners_1(FACTORS, InstrSelection):
                     self.strat._init_trade_cnt(self.strat.lt.traded_instr)
 
                 self.strat.update_trade_flow(ticker)
-                self.strat.lt.cancel_mkt_dpt_ticker_(contract)
                 self._iter_ += 1
 
-            while (datetime.datetime.now() - self.last_iteration).seconds < self.strat.bar_size_secs:
-                # print('looping through bar seconds gate', '(datetime.datetime.now() - self.last_iteration).seconds < BAR_SIZE_SECS: ',
-                #       (datetime.datetime.now() - self.last_iteration).seconds < BAR_SIZE_SECS)
-                # self.market_open.lt.ib.sleep(1)
-                continue
+            self.strat.lt.sched.sleep_until_next_bar(self.strat.bar_size_secs, self.strat.lt.clock.sleep)
+            self.strat.lt.heartbeat.publish('bar_jitter_ms', self.strat.lt.sched.jitter.report())
+            self.strat.lt.heartbeat.publish(metricsregistry.METRICS_LINE, self.strat.lt.registry.snapshot())
+            traded_instr_this_strat = self._fit_to_granted_lines(traded_instr_this_strat)
             try:
                 self.strat._check_if_done()
                 continue
             except Exception as e:
                 self.strat.exc.handle_(e, self.strat.debugging.raise_errors)
+            self._release_all()
             self.strat.conclude_results()
             break
 
+    def run_event_driven(self, traded_instr_this_strat):
+        """
+        Event-driven counterpart of the polling loop in run_: Ticker.updateEvent and
+        orderStatusEvent queue the symbol as soon as the book or an order changes, and
+        the bar loop runs its update_trade_flow within EVENT_FLOW_SECS while it waits
+        for the next bar. Not run in the callbacks themselves, update_trade_flow may
+        sleep (clock.sleep -> ib.sleep), which cannot run the loop from inside it.
+        The bar loop also samples the books into the tick store and checks if done.
+        """
+        self._event_tickers = OrderedDict()
+        self._book_seen_tm = {}
+        self._queued_flows = OrderedDict()  # symbol: ticker, in order of the events
+        self.strat._init_trade_cnt(self.strat.lt.traded_instr)
+        self.strat.lt.ib.orderStatusEvent += self._on_order_status
+        try:
+            for symbol in list(traded_instr_this_strat):
+                self._subscribe_events(symbol)
+            while True:
+                self.last_iteration = self.strat.lt.clock.now()
+                unix_ts = int(self.strat.lt.clock.time())
+                for symbol, ticker in list(self._event_tickers.items()):
+                    if self._book_available(ticker):
+                        self._book_seen_tm[symbol] = self.strat.lt.clock.time()
+                        self.collect_hist_ticks(ticker, unix_ts)
+                    elif self.strat.lt.clock.time() - self._book_seen_tm[symbol] > self.strat.iteration_timeout_secs:
+                        self.cons_disp.print_warning('ending {} - no bids or asks available for contract'.format(symbol))
+                        self._rotate_event_driven(symbol)
+                # events are served while sleeping
+                self.strat.lt.sched.sleep_until_next_bar(self.strat.bar_size_secs, self._sleep_running_flows)
+                self.strat.lt.heartbeat.publish('bar_jitter_ms', self.strat.lt.sched.jitter.report())
+                self.strat.lt.heartbeat.publish(metricsregistry.METRICS_LINE, self.strat.lt.registry.snapshot())
+                self._fit_event_tickers()
+                try:
+                    self.strat._check_if_done()
+                    continue
+                except Exception as e:
+                    self.strat.exc.handle_(e, self.strat.debugging.raise_errors)
+                break
+        finally:
+            self.strat.lt.ib.orderStatusEvent -= self._on_order_status
+            for ticker in self._event_tickers.values():
+                ticker.updateEvent -= self._on_ticker_update
+        self._release_all()
+        self.strat.conclude_results()
+
+    def _subscribe_events(self, symbol):
+        contract = Stock(symbol, 'ISLAND', 'USD')
+        ticker, status = self.strat.lt.mkt_dpt_pool.ticker(contract)
+        if status == 1:
+            self._rotate_event_driven(symbol)
+            return
+        self._event_tickers[symbol] = ticker
+        self._book_seen_tm[symbol] = self.strat.lt.clock.time()
+        ticker.updateEvent += self._on_ticker_update
+
+    def _rotate_event_driven(self, symbol):
+        ticker = self._event_tickers.pop(symbol, None)
+        if ticker is not None:
+            ticker.updateEvent -= self._on_ticker_update
+        self._book_seen_tm.pop(symbol, None)
+        next_in_line = self.__winners.pop(0) if len(self.__winners) > 0 else None
+        self.reshuffle_winners(self.strat.parallel_traded_instr_per_strat, next_in_line, remove=symbol)
+        if next_in_line is not None and next_in_line in self.strat.lt.traded_instr:
+            self._subscribe_events(next_in_line)
+
+    def _fit_event_tickers(self):
+        in_play = self._fit_to_granted_lines(list(self._event_tickers))
+        for symbol in [s for s in self._event_tickers if s not in in_play]:
+            self._event_tickers.pop(symbol).updateEvent -= self._on_ticker_update
+            self._book_seen_tm.pop(symbol, None)
+        for symbol in [s for s in in_play if s not in self._event_tickers]:
+            self._subscribe_events(symbol)
+
+    def _book_available(self, ticker):
+        return self.strat.lt._ticker_len_n_type_check(ticker.domBids) > 0 \
+               and self.strat.lt._ticker_len_n_type_check(ticker.domAsks) > 0
+
+    def _sleep_running_flows(self, secs):
+        """
+        clock.sleep in steps of EVENT_FLOW_SECS, running the queued update_trade_flows before each.
+        """
+        until = self.strat.lt.clock.time() + secs
+        while True:
+            self._run_queued_flows()
+            left = until - self.strat.lt.clock.time()
+            if left <= 0:
+                return
+            self.strat.lt.clock.sleep(min(left, EVENT_FLOW_SECS))
+
+    def _run_queued_flows(self):
+        while self._queued_flows:
+            symbol, ticker = self._queued_flows.popitem(last=False)
+            # may have been rotated out since it was queued
+            if symbol in self._event_tickers:
+                self.strat.update_trade_flow(ticker)
+
+    def _on_ticker_update(self, ticker):
+        if not self._book_available(ticker):
+            return
+        symbol = ticker.contract.symbol
+        self._book_seen_tm[symbol] = self.strat.lt.clock.time()
+        self._queued_flows[symbol] = ticker
+
+    def _on_order_status(self, trade):
+        ticker = self._event_tickers.get(trade.contract.symbol)
+        if ticker is not None:
+            self._on_ticker_update(ticker)
+
+    @timed
     def find_winners(self, parallel_traded_instr_per_strat):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start,
-                               str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
         hist_data_df = None
         # matches = None
         _analysis_logic = datetime.datetime.strptime(self.analysis_logic_start_time, '%H:%M:%S')
         _trading_logic = datetime.datetime.strptime(self.trading_logic_start_time, '%H:%M:%S')
         _n_iters = int((_trading_logic - _analysis_logic).seconds / 60)
-        if self.strat.debugging.dummy_time:
-            _now = self.strat.lt._manipulated_time(datetime.datetime.now())
-        else:
-            _now = datetime.datetime.now()
+        _now = self.strat.lt.clock.now()
 
         _time_gates = [self.strat.lt.us_tz_op(_now) + datetime.timedelta(minutes=ix) for ix, _ in
                        enumerate(range(_n_iters))]  # minutes=ix works fairly well
@@ -255,58 +355,39 @@ class Scanners_1(FACTORS, InstrSelection):
 
         if self.strat.debugging.dummy_data:
             matches = self.strat.debugging.dummy_instr
-        log.log(hist_data_df, matches)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,find_winners', hist_data_df, matches)
         return matches
 
     # @classmethod
+    @timed
     def _time_gates_f(self, _time_gates, ix):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start,
-                               str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
         gate = _time_gates[ix].time()
-        if self.strat.debugging.dummy_time:
-            _now = self.strat.lt._manipulated_time(datetime.datetime.now())
-        else:
-            _now = datetime.datetime.now()
+        _now = self.strat.lt.clock.now()
         _now = self.strat.lt.us_tz_op(_now).time()
         while _now < gate:  # _time_gates
-            if self.strat.debugging.dummy_time:
-                _now = self.strat.lt._manipulated_time(datetime.datetime.now())
-            else:
-                _now = datetime.datetime.now()
+            _now = self.strat.lt.clock.now()
             _now = self.strat.lt.us_tz_op(_now).time()
-            self.strat.lt.ib.sleep(1)
+            self.strat.lt.clock.sleep(1)
             # _visible_counter += 1
             # if _visible_counter % 5 == 0:
             #     print('_visible_counter seconds {} ({} - {})'.format(str(_visible_counter),_now.strftime('%H:%M:%S'),gate.strftime('%H:%M:%S')))
             continue
-        log.log()
 
     @classmethod
+    @timed
     def _relevance_discarding(cls, factors, _n_iters, runtime_tm, _first_iter=False):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(runtime_tm, log_start,
-                               str(cls.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
+        """
+        :return: ix: the factor's scanned symbols in order, as often as scanned; after the
+            first iteration only those in at least _n_iters of its scans
+        """
         selection_dict = OrderedDict()
         for ix, i in enumerate(factors.values()):
-            flat = [j for k in i for j in k]
-            n = []
-            for f in flat:
-                n.append([f, flat.count(f)])
-            if not _first_iter:
-                for cix, c in enumerate(n):
-                    if c[1] < _n_iters:
-                        del n[cix]
-            fittest = [r[0] for r in n]
-            selection_dict[ix] = fittest
-        log.log()
+            counts = Counter(j for k in i for j in k)
+            selection_dict[ix] = [j for k in i for j in k if _first_iter or counts[j] >= _n_iters]
         return selection_dict
 
+    @timed
     def _check_tradeability_of_instr(self, traded_instr_this_strat):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start,
-                               str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
         removables = []
         # for wnr_ in self.__winners:
         instrs = copy.copy(traded_instr_this_strat)
@@ -320,15 +401,49 @@ class Scanners_1(FACTORS, InstrSelection):
                 self.reshuffle_winners(self.strat.parallel_traded_instr_per_strat, next_in_line, remove=rem_)
                 _ix = instrs.index(rem_)
                 del instrs[_ix]
-        log.log(removables)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,_check_tradeability_of_instr', removables)
         return instrs
 
-    def reshuffle_winners(self, parallel_traded_instr_per_strat, next_in_line, remove=None):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start,
-                               str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
+    @timed
+    def _release(self, symbol):
+        """
+        Cancels the symbol's subscription and drops its moving averages, a
+        symbol back in line starts from an empty window.
+        """
+        self.strat.lt.mkt_dpt_pool.release(symbol)
+        self.signals.drop(symbol)
+
+    def _release_all(self):
+        for symbol in self.strat.lt.mkt_dpt_pool.symbols():
+            self._release(symbol)
+
+    def _fit_to_granted_lines(self, traded_instr_this_strat):
+        """
+        Once per bar: asks the LineAllocator again and drops instruments from the end,
+        back in line, or adds winners until as many are in play as lines are granted.
+        """
+        instrs = list(traded_instr_this_strat)
+        granted = self.strat.request_lines(len(instrs) + len(self.__winners))
+        if granted == len(instrs):
+            return traded_instr_this_strat
+        while len(instrs) > granted:
+            symbol = instrs.pop()
+            self._release(symbol)
+            try:
+                self.strat.lt.traded_instr.remove(symbol)
+            except ValueError:
+                pass
+            self.__winners.insert(0, symbol)
+        while len(instrs) < granted and len(self.__winners) > 0:
+            next_in_line = self.__winners.pop(0)
+            instrs.append(next_in_line)
+            self.strat.lt.traded_instr.append(next_in_line)
+        self.strat.lt.heartbeat.publish('__winners', self.__winners)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,_fit_to_granted_lines', granted, instrs)
+        return self._check_tradeability_of_instr(instrs)
 
+    @timed
+    def reshuffle_winners(self, parallel_traded_instr_per_strat, next_in_line, remove=None):
         if remove is None:
             # self.__traded_instr = []
             for i in range(parallel_traded_instr_per_strat):
@@ -343,8 +458,10 @@ class Scanners_1(FACTORS, InstrSelection):
                 self.strat.lt.traded_instr.append(next_in_line)
                 self.strat.add_to_manager(self.strat.strat_name, 'traded_instr', self.strat.lt.traded_instr)
                 self.strat.add_to_manager(self.strat.strat_name, '__winners', self.__winners)
-                self.strat.lt.heartbeat_q.put([self.strat.strat_name, '__winners', self.__winners])
+                self.strat.lt.heartbeat.publish('__winners', self.__winners)
         else:
+            # rotated out, the only place a session subscription gets cancelled
+            self._release(remove)
             # ix = self.__traded_instr.index(remove)
             try:
                 ix = self.strat.lt.traded_instr.index(remove)
@@ -362,34 +479,22 @@ class Scanners_1(FACTORS, InstrSelection):
             # self.__traded_instr.append(next_in_line)
             # self.strat.add_to_manager(self.strat.strat_name, 'traded_instr', self.strat.lt.traded_instr)
             # self.strat.add_to_manager(self.strat.strat_name, '__winners', self.__winners)
-            self.strat.lt.heartbeat_q.put([self.strat.strat_name, '__winners', self.__winners])
+            self.strat.lt.heartbeat.publish('__winners', self.__winners)
 
+    @timed
     def match_f(self, positive_instr, negative_instr, _n_iters, _first_iter=False):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start,
-                               str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
         positive_list = self._relevance_discarding(positive_instr, _n_iters, self.strat.runtime_tm, _first_iter)
         # must_appear_at_least = len2 if _first_iter else 2 * _n_iters
         must_appear_at_least = len(self.positive_factors) if _first_iter else len(self.positive_factors) * _n_iters
         self.cons_disp.print_warning('not sure if must_appear_at_least is correct')
-        concat_ = []
-        for i_ix, i in enumerate(positive_instr.keys()):
-            concat_.append(positive_list[i_ix])
-        counts_ = []
-        flat = [j for k in concat_ for j in k]
-        for f in flat:
-            counts_.append([f, flat.count(f)])
-        positive_matches = []
-        for c_ix, c in enumerate(list(counts_)):
-            if c[1] >= must_appear_at_least:
-                positive_matches.append(c[0])
-        positive_matches = list(set(positive_matches))
+        counts_ = Counter(j for fittest in positive_list.values() for j in fittest)
+        # once each, in order of first appearance so the same scans give the same winners
+        positive_matches = [f for f, n in counts_.items() if n >= must_appear_at_least]
         if len(negative_instr) > 0:
             negative_list = self._relevance_discarding(negative_instr, _n_iters, self.strat.runtime_tm, _first_iter)
             # sort out a certain number of overnight stars
             matches = []
-            negative_list_flat = [j for i in negative_list.values() for j in i]
+            negative_list_flat = set(j for i in negative_list.values() for j in i)
             _cnt_remove = 0
             _step_through = int(1 / (1 - self.strat.rm.fraction_sorting_out_negative_list))
             for j, i in enumerate(list(positive_matches)):
@@ -402,36 +507,29 @@ class Scanners_1(FACTORS, InstrSelection):
                 matches.append(i)
         else:
             matches = positive_matches
-        log.log(matches)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,match_f', matches)
         return matches
 
+    @timed
     def _reduce_fraction_sorting_out_negative_list(self):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start,
-                               str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
         self.strat.rm.fraction_sorting_out_negative_list -= .1
         if self.strat.rm.fraction_sorting_out_negative_list < .0:
             self.strat.rm.fraction_sorting_out_negative_list = .0
-        log.log(self.strat.rm.fraction_sorting_out_negative_list)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,_reduce_fraction_sorting_out_negative_list',
+                            self.strat.rm.fraction_sorting_out_negative_list)
 
     @classmethod
+    @timed
     def _remove_misc_negative_instr(cls, black_list, matches, runtime_tm):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(runtime_tm, log_start,
-                               str(cls.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
         selected_matches = []
         for i in matches:
             if i in black_list:
                 continue
             selected_matches.append(i)
-        log.log()
         return selected_matches
 
+    @timed
     def __make_trade_decision(self, ticker, order):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
         buy_try, sell_try, status = None, None, None
         if order == 'BUY':
             side = 1  # bid
@@ -467,7 +565,7 @@ class Scanners_1(FACTORS, InstrSelection):
                     cap_ = self.strat.lt.cash.available_funds(self.strat.lt.report.pnl(), self.strat.lt.account_curr)
                     if cap_ != 'value cannot be determined':
                         break
-                    self.strat.lt.ib.sleep(0.5)
+                    self.strat.lt.clock.sleep(0.5)
                     _cap_cnt += 1
                     if _cap_cnt == _max_cap_cnt:
                         raise exceptions_.ReportExtractionError
@@ -487,7 +585,7 @@ class Scanners_1(FACTORS, InstrSelection):
                 #     else:
                 #         status = -1
                 buy_order_filled_status = self.strat.lt.buy(ticker, buy_try, size, self.order_type)
-                if buy_order_filled_status == 0:
+                if buy_order_filled_status in (0, 2):  # 2 = in flight, booked by LiveTrading on fill
                     status = 0
                     break
                 else:
@@ -521,14 +619,11 @@ class Scanners_1(FACTORS, InstrSelection):
         # -1 = next try/price up
         # 0 = ok = buy/sell
         # 1 = other conditions not met = abandon
-        log.log(buy_try
-                ,sell_try
-                ,status)
+        logging_.log_values(self.runtime_tm, 'Scanners_1,__make_trade_decision', buy_try, sell_try, status)
 
+    @timed
+    @observed('collect_hist_ticks')
     def collect_hist_ticks(self, ticker, unix_ts):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
         cnt = 0
         log_msg1 = ""
         while cnt < self.strat.iteration_timeout_secs:
@@ -545,15 +640,14 @@ class Scanners_1(FACTORS, InstrSelection):
             else:
                 log_msg1 = 'no bids or asks available for contract, iterating through {}/ITERATION_TIMEOUT_SECS = {}'\
                     .format(str(cnt), str(self.strat.iteration_timeout_secs))
-                log.log(log_msg1)
-                self.strat.add_to_manager(self.strat.strat_name, *log.monitor())
-            self.strat.lt.ib.sleep(1)
+                logging_.log_values(self.strat.runtime_tm, 'Scanners_1,collect_hist_ticks', log_msg1)
+            self.strat.lt.clock.sleep(1)
             cnt += 1
         else:
             log_msg1 = 'ending iteration - no bids or asks available for contract'
             self.cons_disp.print_warning(log_msg1)
             status = 1
-            log.log(log_msg1)
+            logging_.log_values(self.strat.runtime_tm, 'Scanners_1,collect_hist_ticks', log_msg1)
             return status
 
         for interm_side in ['ask', 'bid']:
@@ -579,22 +673,13 @@ class Scanners_1(FACTORS, InstrSelection):
                             price, size = items.price, items.size
                         except AttributeError:
                             continue
-                df = pd.DataFrame([[symbol, unix_ts, side, rank, price, size]],
-                                  columns=['symbol', 'unix_ts', 'side', 'rank', 'price', 'size'])
-                self.__hist_data_winners_df = pd.concat([self.__hist_data_winners_df, df])
-                _row_major = 0
-                # self.lt.add_to_monitor('n __hist_data_winners_df', self.__hist_data_winners_df.shape[_row_major])
-                # print(self.hist_data_winners_df)
+                self.signals.on_tick(symbol, unix_ts, side, rank, price, size)
         status = 0
-        log.log(log_msg1
-            ,price
-            ,size
-            ,side)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,collect_hist_ticks', log_msg1, price, size, side)
         return status
 
+    @timed
     def receive_(self, _type_):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
         scan_data = []
         self.ss.scanCode = _type_
         scan = self.strat.lt.ib.reqScannerData(self.ss)
@@ -604,16 +689,16 @@ class Scanners_1(FACTORS, InstrSelection):
         rank = 0
         while True:
             try:
-                scan_data.append([scan[rank].contractDetails.contract.symbol])
+                # interned, the symbols of all scans hash and compare as the same objects
+                scan_data.append([sys.intern(scan[rank].contractDetails.contract.symbol)])
                 rank += 1
             except IndexError:
                 break
-        log.log(_type_)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,receive_', _type_)
         return scan_data
 
+    @timed
     def initial_scan_to_sort(self, _longer_list):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
         positive_instr = OrderedDict()
         negative_instr = OrderedDict()
         _scan_param_ix = 0
@@ -640,12 +725,11 @@ class Scanners_1(FACTORS, InstrSelection):
                 pass
             except exceptions_.ScannerReturnsNothingError:
                 del self.negative_factors[factor_ix]
-        log.log(_longer_list)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,initial_scan_to_sort', _longer_list)
         return positive_instr, negative_instr
 
+    @timed
     def scan_(self, _longer_list):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strat.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
         positive_instr = OrderedDict()
         negative_instr = OrderedDict()
         _scan_param_ix = 0
@@ -664,5 +748,5 @@ class Scanners_1(FACTORS, InstrSelection):
                 pass
             except exceptions_.ScannerReturnsNothingError:
                 negative_instr[_key_] = []
-        log.log(_longer_list)
+        logging_.log_values(self.strat.runtime_tm, 'Scanners_1,scan_', _longer_list)
         return positive_instr, negative_instr
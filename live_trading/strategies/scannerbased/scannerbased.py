@@ -1,14 +1,14 @@
-import sys
 import datetime
-import pandas as pd
 
-from live_trading.logging_ import logging_
-from live_trading.utils import exceptions_, consoledisplay
+from live_trading.logging_ import logging_, instrumentation
+from live_trading.logging_.instrumentation import timed
+from live_trading.utils import exceptions_, consoledisplay, metricsregistry
 from live_trading.utils import helpers
 from live_trading.strategies.strategies import Strategies
 from .riskmanagement.riskmanagement import RiskManagement
 
 ITERATION_TIMEOUT_SECS = 20
+EVENT_DRIVEN = False  # call update_trade_flow from Ticker.updateEvent/orderStatusEvent instead of once per bar
 CONTINUOUS_ERR_MAX_FOR_SLEEPING, SLEEP_TIME_IF_ERROR = 50, 2
 
 COUNTRY = 'US'
@@ -25,14 +25,21 @@ MA_PATIENCE_TO_TURN_MINS = 45
 
 class ScannerBased(Strategies):
     def __init__(self, strat_name, n_strats, client_id, universe, traded_instr,
-                 heartbeat_q, manager_, bar_size_secs, order_type, instr_select, instr_select_args, signals, signal_args):
+                 heartbeat_q, manager_, bar_size_secs, order_type, instr_select, instr_select_args, signals, signal_args,
+                 pacing_governor=None, mkt_data_lines=None, mkt_data_hub=None, metrics_board=None, ib=None,
+                 line_allocator=None, clock=None, record_session=False):
         super(ScannerBased, self).__init__(strat_name, n_strats, client_id, universe, traded_instr,
                                            heartbeat_q, manager_, bar_size_secs, order_type, instr_select,
-                                           instr_select_args, signals, signal_args)
+                                           instr_select_args, signals, signal_args, pacing_governor=pacing_governor,
+                                           mkt_data_lines=mkt_data_lines, mkt_data_hub=mkt_data_hub,
+                                           metrics_board=metrics_board, ib=ib,
+                                           line_allocator=line_allocator, clock=clock,
+                                           record_session=record_session)
         self.bar_size_secs = bar_size_secs
         self.max_trades_per_instr_per_day = MAX_TRADES_PER_INSTR_PER_DAY
         self.max_price_instr_usd = MAX_PRICE_INSTR_USD
         self.iteration_timeout_secs = ITERATION_TIMEOUT_SECS
+        self.event_driven = EVENT_DRIVEN
 
         self.strat_name = strat_name
         self.universe = universe
@@ -50,7 +57,6 @@ class ScannerBased(Strategies):
 
         self.eob_hour, self.eob_min = EOB_HOUR, EOB_MIN
 
-        self._ma_collection_df = pd.DataFrame(columns=['symbol','unix_ts','short_ma','long_ma'])
         self.n_willingness_to_move_up_price = N_WILLINGNESS_TO_MOVE_UP_PRICE #times, alter deducted by 1
         self.ma_counter = 0
         # self.__traded_instr = None
@@ -65,7 +71,7 @@ class ScannerBased(Strategies):
         while True:
             try:
                 while not self._start_routine_check():
-                    self.lt.ib.sleep(5)
+                    self.clock.sleep(5)
                     continue
 
                 # if self.hedge():
@@ -75,9 +81,9 @@ class ScannerBased(Strategies):
             except Exception as e:
                 self.exc.handle_(e, self.debugging.raise_errors)
                 self.add_to_manager(self.strat_name, 'continuous_err_cnt', self.exc.continuous_err_cnt)
-                self.lt.heartbeat_q.put([self.strat_name, 'continuous_err_cnt', self.exc.continuous_err_cnt])
+                self.lt.heartbeat.publish('continuous_err_cnt', self.exc.continuous_err_cnt)
                 if self.exc.continuous_err_exceeded():
-                    self.lt.ib.sleep(self.exc.sleep_time_if_error)
+                    self.clock.sleep(self.exc.sleep_time_if_error)
 
     def hedge(self):
         # self.sma1 = SimpleMovingAverage(self, MAS1_LONG_PERIODS, MAS1_SHORT_PERIODS)
@@ -95,29 +101,21 @@ class ScannerBased(Strategies):
         done = True
         return done
 
+    @timed
     def _start_routine_check(self):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.add_to_manager(self.strat_name, *log.monitor())
-        if self.debugging.dummy_time:
-            _now = self.lt._manipulated_time(datetime.datetime.now())
-        else:
-            _now = datetime.datetime.now()
-        current = self.lt.us_tz_op(_now).time()
+        current = self.lt.us_tz_op(self.clock.now()).time()
         op = datetime.datetime.strptime(MARKET_OPEN, '%H:%M:%S').time()
         if current < op:
             status = False
         else:
             status = True
-        log.log(status)
+        logging_.log_values(self.runtime_tm, 'ScannerBased,_start_routine_check', status)
         return status
 
+    @timed
     def _init_trade_cnt(self, _traded_instr):
         self.cons_disp.print_warning('this might be conflicting')
         # print('this might be conflicting')
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.add_to_manager(self.strat_name, *log.monitor())
         if len(_traded_instr) == 0:
             self.lt.cnt_trades_per_instr_per_day = {}
         else:
@@ -128,13 +126,10 @@ class ScannerBased(Strategies):
                     self.lt.cnt_trades_per_instr_per_day[wnr] = 0
         self.add_to_manager(self.strat_name, 'cnt_trades_per_instr_per_day',
                        self.lt.cnt_trades_per_instr_per_day)
-        self.lt.heartbeat_q.put([self.strat_name, 'cnt_trades_per_instr_per_day', self.lt.cnt_trades_per_instr_per_day])
-        log.log()
+        self.lt.heartbeat.publish('cnt_trades_per_instr_per_day', self.lt.cnt_trades_per_instr_per_day)
 
+    @timed
     def _check_if_done(self):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.add_to_manager(self.strat_name, *log.monitor())
         d_is_empty = lambda x: not bool(x) #empty dict check, turn around
         status = True
         if d_is_empty(self.lt.cnt_trades_per_instr_per_day):
@@ -148,7 +143,14 @@ class ScannerBased(Strategies):
         if self.signals.sell_at_eob_f():
             raise exceptions_.SellAtEOBWarning
 
-        log.log(status)
+        logging_.log_values(self.runtime_tm, 'ScannerBased,_check_if_done', status)
 
     def conclude_results(self):
+        self.release_lines()
         self.lt.report.result_trading_day(self.starting_cap_usd, self.lt.account_curr, self.lt.tax_rate_account_country, MKT_DATA_COST_USD)
+        self.lt.heartbeat.publish(metricsregistry.METRICS_LINE, self.lt.registry.snapshot())
+        self.lt.heartbeat.flush()
+        if self.lt.recorder is not None:
+            self.lt.recorder.flush()
+        if instrumentation.TRACING:
+            logging_.log_values(self.runtime_tm, 'ScannerBased,conclude_results', instrumentation.report())
@@ -0,0 +1,85 @@
+from collections import deque
+import numpy as np
+
+MA_HISTORY_LEN = 2500  # ~ one session of 10 secs bars
+
+
+class RollingMean:
+    __slots__ = ['periods', 'window', 'ix', 'count', 'sum_', 'pushes_since_resum']
+
+    def __init__(self, periods):
+        """
+        Simple moving average over a fixed number of periods, O(1) per push.
+        The running sum is rebuilt from the window once per `periods` pushes so
+        float error cannot accumulate over a session.
+        """
+        self.periods = periods
+        self.window = np.zeros(periods, dtype=np.float64)
+        self.ix = 0
+        self.count = 0
+        self.sum_ = 0.0
+        self.pushes_since_resum = 0
+
+    def push(self, x):
+        self.sum_ += x - self.window[self.ix]
+        self.window[self.ix] = x
+        self.ix = (self.ix + 1) % self.periods
+        if self.count < self.periods:
+            self.count += 1
+        self.pushes_since_resum += 1
+        if self.pushes_since_resum == self.periods:
+            self.sum_ = float(self.window.sum())
+            self.pushes_since_resum = 0
+
+    def is_full(self):
+        return self.count == self.periods
+
+    @property
+    def value(self):
+        return self.sum_ / self.count if self.count > 0 else np.nan
+
+
+class MovingAverageEngine:
+    def __init__(self, short_periods, long_periods, history_len=MA_HISTORY_LEN):
+        """
+        Incremental short/long moving averages keyed by (symbol, side, rank).
+        Both averages stay nan until the long window is filled, as in the former
+        DataFrame based SimpleMovingAverage.__ma_calc.
+        :param history_len: number of [unix_ts, short_ma, long_ma] kept per key
+        """
+        self.short_periods = short_periods
+        self.long_periods = long_periods
+        self.history_len = history_len
+        self.windows = {}
+        self.histories = {}
+
+    def update(self, symbol, side, rank, unix_ts, price):
+        key_ = (symbol, side, rank)
+        try:
+            short_, long_ = self.windows[key_]
+        except KeyError:
+            short_, long_ = self.windows[key_] = (RollingMean(self.short_periods), RollingMean(self.long_periods))
+            self.histories[key_] = deque(maxlen=self.history_len)
+        short_.push(price)
+        long_.push(price)
+        if long_.is_full():
+            self.histories[key_].append((unix_ts, short_.value, long_.value))
+
+    def latest(self, symbol, side, rank):
+        """
+        :return: long_ma, short_ma (nan, nan while the long window is not filled yet)
+        """
+        try:
+            history_ = self.histories[(symbol, side, rank)]
+            _unix_ts, short_ma, long_ma = history_[-1]
+        except (KeyError, IndexError):
+            return np.nan, np.nan
+        return long_ma, short_ma
+
+    def history(self, symbol, side, rank):
+        return list(self.histories.get((symbol, side, rank), ()))
+
+    def drop(self, symbol):
+        for key_ in [k for k in self.windows if k[0] == symbol]:
+            del self.windows[key_]
+            del self.histories[key_]
@@ -18,3 +18,10 @@ class Signals(object):
 
     def sell_at_eob_f(self):
         pass
+
+    def on_tick(self, symbol, unix_ts, side, rank, price, size):
+        pass
+
+    def drop(self, symbol):
+        # symbol rotated out, forget what on_tick kept of it
+        pass
@@ -1,10 +1,11 @@
 import datetime
-import sys
-import pandas as pd
+import numpy as np
 
 from live_trading.logging_ import logging_
+from live_trading.logging_.instrumentation import timed
 
 from .signals import Signals
+from .rollingwindow import MovingAverageEngine
 
 STOP_LOSS = .2
 MINS_SELL_BEFORE_EOB =  15
@@ -15,12 +16,17 @@ class SimpleMovingAverage(Signals):
         self.strategy = strategy
         self.long_periods = long_periods
         self.short_periods = short_periods
+        self.ma_engine = MovingAverageEngine(short_periods, long_periods)
+
+    def on_tick(self, symbol, unix_ts, side, rank, price, size):
+        self.ma_engine.update(symbol, side, rank, unix_ts, price)
+
+    def drop(self, symbol):
+        self.ma_engine.drop(symbol)
 
     # @classmethod
+    @timed
     def __buy_conditions(self, ticker):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
         # try:
         #     short_ma_greater_than_long = self.__moving_averages(ticker)
         # except:
@@ -35,13 +41,11 @@ class SimpleMovingAverage(Signals):
             break
         if not status:
             self.strategy.add_to_manager(self.strategy.strat_name, 'n False buy_conditions', 'increment_1')
-        log.log(return_minimal)
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,__buy_conditions', return_minimal)
         return status
 
+    @timed
     def __sell_conditions(self, ticker):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
         price_higher_than_bought = self.__price_higher_than_bought(ticker)
         sell_at_eob = self.__sell_at_eob_f()
         try:
@@ -60,16 +64,13 @@ class SimpleMovingAverage(Signals):
             break
         if not status:
             self.strategy.add_to_manager(self.strategy.strat_name, 'n False sell_conditions', 'increment_1')
-        log.log(price_higher_than_bought
-                ,short_ma_greater_than_long
-                ,sell_at_eob)
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,__sell_conditions',
+                            price_higher_than_bought, short_ma_greater_than_long, sell_at_eob)
         return status
 
     # @print_meth_name
+    @timed
     def price_size_select(self, ticker, ix, side):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
         if side == 1:
             items = ticker.domBids
         else:
@@ -89,18 +90,12 @@ class SimpleMovingAverage(Signals):
                 price, size = items.price, items.size
             else:
                 price, size = items.price, items.size
-        log.log(price
-                ,size)
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,price_size_select', price, size)
         return price, size
 
+    @timed
     def sell_at_eob_f(self):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
-        if self.strategy.debugging.dummy_time:
-            _now = self.strategy.lt._manipulated_time(datetime.datetime.now())
-        else:
-            _now = datetime.datetime.now()
+        _now = self.strategy.lt.clock.now()
 
         if self.strategy.eob_min >= MINS_SELL_BEFORE_EOB:
             eob_dt = datetime.datetime.strptime("{}:{}:00".format(self.strategy.eob_hour,
@@ -110,13 +105,11 @@ class SimpleMovingAverage(Signals):
             minute = 60 + self.strategy.eob_min - MINS_SELL_BEFORE_EOB
             eob_dt = datetime.datetime.strptime("{}:{}:00".format(str(hour), str(minute)),'%H:%M:%S')
         sell_at_eob = self.strategy.lt.us_tz_op(_now).time() > eob_dt.time()
-        log.log(sell_at_eob)
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,sell_at_eob_f', sell_at_eob)
         return sell_at_eob
 
+    @timed
     def __price_higher_than_bought(self, ticker):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
         symbol =  ticker.contract.symbol
         held_ix = self.strategy.lt.portfolio_instr.index(symbol)
         held_price_ix = 2
@@ -126,34 +119,29 @@ class SimpleMovingAverage(Signals):
             curr_price = ticker.domAsks[rank].price
         else:
             curr_price = ticker.domAsks.price
-        log.log(self.strategy.lt.portfolio
-                ,curr_price)
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,__price_higher_than_bought',
+                            self.strategy.lt.portfolio, curr_price)
         if held_price < curr_price:
             return True
         else:
             return False
 
+    @timed
     def stop_loss_f(self, ticker):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
         if self.strategy.lt._ticker_len_n_type_check(ticker.domAsks) > 1:
             current_ask_price = ticker.domAsks[0].price
         else:
             current_ask_price = ticker.domAsks.price
         change = (current_ask_price - self.strategy.lt.portfolio[ticker.contract.symbol]) / current_ask_price
-        log.log(current_ask_price
-                ,change)
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,stop_loss_f', current_ask_price, change)
         if change < -STOP_LOSS:
             return True
         else:
             return False
 
     # @classmethod
+    @timed
     def __moving_averages(self, ticker):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
         # ma procedure
         long_ma, short_ma = self.__ma_calc('collected', ticker)
         if long_ma == np.nan and short_ma == np.nan:
@@ -162,14 +150,11 @@ class SimpleMovingAverage(Signals):
             short_ma_greater_than_long = False
         else:
             short_ma_greater_than_long = True
-        log.log(long_ma
-                ,short_ma)
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,__moving_averages', long_ma, short_ma)
         return short_ma_greater_than_long
 
+    @timed
     def __ma_calc(self, by, ticker):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.strategy.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        self.strategy.add_to_manager(self.strategy.strat_name, *log.monitor())
         long_ma, short_ma = None, None
         if by == 'collected':
             rank = 0
@@ -177,27 +162,7 @@ class SimpleMovingAverage(Signals):
             # bid = 1
             # ask = 0
             side = 1
-            self.filtered_df = self.strategy.__hist_data_winners_df[(self.strategy.__hist_data_winners_df['symbol'] == ticker.contract.symbol) &
-                                                                    (self.strategy.__hist_data_winners_df['side'] == side) &
-                                                                    (self.strategy.__hist_data_winners_df['rank'] == rank)]
-            _length = self.filtered_df.shape[0]
-            if _length < self.long_periods:
-                long_ma, short_ma = np.nan, np.nan
-            else:
-                long_ma = self.filtered_df.sort_values('unix_ts', ascending=False)[0:self.long_periods]['price'].mean()
-                short_ma = self.filtered_df.sort_values('unix_ts', ascending=False)[0:self.short_periods]['price'].mean()
-                # print(long_ma, short_ma)
-                _unix_ts = self.filtered_df['unix_ts'].sort_values(ascending=False).iloc[0]
-                if self.strategy.ma_counter == 0:
-                    self._ma_collection_df = pd.DataFrame([[ticker.contract.symbol, _unix_ts, short_ma, long_ma]])
-
-                else:
-                    add_df = pd.DataFrame([[ticker.contract.symbol,
-                               _unix_ts,
-                               short_ma,
-                               long_ma]])
-                    self._ma_collection_df = pd.concat([self._ma_collection_df, add_df])
-
-        log.log(long_ma
-                ,short_ma)
+            long_ma, short_ma = self.ma_engine.latest(ticker.contract.symbol, side, rank)
+
+        logging_.log_values(self.strategy.runtime_tm, 'SimpleMovingAverage,__ma_calc', long_ma, short_ma)
         return long_ma, short_ma
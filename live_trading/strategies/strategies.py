@@ -1,9 +1,10 @@
 import datetime
-import sys
 
 from live_trading.live_trading import LiveTrading
 from live_trading.logging_ import logging_
-from live_trading.utils import exceptions_
+from live_trading.logging_.instrumentation import timed
+from live_trading.utils import exceptions_, metricsregistry
+from live_trading.utils.metricsregistry import observed
 from live_trading.utils.helpers import ClientSharedMemory, MethodManager_
 
 class DUMMIES:
@@ -19,45 +20,52 @@ class DUMMIES:
         self.paper_trading = True
         self.get_meths = False
 
-PARALLEL_TRADED_INSTR_PER_STRAT = 2
+PARALLEL_TRADED_INSTR_PER_STRAT = 2  # lines asked for before the winners are known
+MAX_PARALLEL_TRADED_INSTR_PER_STRAT = 10  # never ask for more, however many winners are in line
 MAX_N_STRATS_PER_EXECUTION = 3
 DEBUGGING, RUNTIME_TM = DUMMIES(), datetime.datetime.now()
 
 class Strategies(ClientSharedMemory, MethodManager_):
     def __init__(self, strat_name, n_strats, client_id, universe, traded_instr, heartbeat_q, manager_,
-                 bar_size_secs, order_type, instr_select, instr_select_args, signals, signal_args):
+                 bar_size_secs, order_type, instr_select, instr_select_args, signals, signal_args, pacing_governor=None,
+                 mkt_data_lines=None, mkt_data_hub=None, metrics_board=None, ib=None,
+                 line_allocator=None, clock=None, record_session=False):
         super(Strategies, self).__init__()
         self.debugging = DEBUGGING
         # self.DummyLogic = DummyLogic
         self.runtime_tm = RUNTIME_TM
-        self.parallel_traded_instr_per_strat = PARALLEL_TRADED_INSTR_PER_STRAT \
-            if n_strats <= MAX_N_STRATS_PER_EXECUTION \
-            else int(MAX_N_STRATS_PER_EXECUTION / n_strats * PARALLEL_TRADED_INSTR_PER_STRAT)
+        # the cap is on TWS connections, hosted strategies share one
+        hosted = ib is not None
         self.strat_name = strat_name
         self.n_strats = n_strats
         self.client_id = client_id
         self.bar_size_secs = bar_size_secs
 
-        # self.parallel_traded_instr_per_strat = PARALLEL_TRADED_INSTR_PER_STRAT
+        self.lt = LiveTrading(self.strat_name, self.client_id, self.runtime_tm, self.debugging, manager_, heartbeat_q, traded_instr,
+                              pacing_governor=pacing_governor, mkt_data_lines=mkt_data_lines,
+                              mkt_data_hub=mkt_data_hub, metrics_board=metrics_board, ib=ib,
+                              line_allocator=line_allocator, clock=clock, record_session=record_session)
+        self.metrics_board = self.lt.metrics
+        self.registry = self.lt.registry
+        self.clock = self.lt.clock
 
-        self.lt = LiveTrading(self.strat_name, self.client_id, self.runtime_tm, self.debugging, manager_, heartbeat_q, traded_instr)
-
-        if n_strats > MAX_N_STRATS_PER_EXECUTION:
+        if n_strats > MAX_N_STRATS_PER_EXECUTION and not hosted:
             raise exceptions_.TooManyStratsError
-        if not self.pacing_pre_check(self.lt._get_ib_pacing(), n_strats, self.parallel_traded_instr_per_strat,
-                                     bar_size_secs, self.lt.potential_mkt_data_lines_already_in_use):
-            raise exceptions_.TooMuchMktDptStreaming
+        # depth lines are granted at runtime, see request_lines
+        self.request_lines(PARALLEL_TRADED_INSTR_PER_STRAT)
         # if self.debugging.get_meths:
         #     self.print_meths(str(self.__class__.__name__), dir(self))
 
     def run_(self):
         pass
 
+    @timed
+    @observed('update_trade_flow')
     def update_trade_flow(self, ticker):
-        log_start = datetime.datetime.now()
-        log = logging_.Logging(self.runtime_tm, log_start, str(self.__class__.__name__ + ',' + sys._getframe().f_code.co_name))
-        # self.lt.add_to_monitor(*log.monitor())
         price, offer_size, size, status = None, None, None, None
+        if self.lt.orders.has_pending(ticker.contract.symbol):
+            # decided already, wait for OrderManager to resolve fill/cancel/timeout
+            return
         try:
             curr_n_trades = self.lt.cnt_trades_per_instr_per_day[ticker.contract.symbol]
         except KeyError:
@@ -66,19 +74,30 @@ class Strategies(ClientSharedMemory, MethodManager_):
             self.__make_trade_decision(ticker, 'BUY')
         elif ticker.contract.symbol in self.lt.portfolio_instr:
             self.__make_trade_decision(ticker, 'SELL')
-        log.log(price
-            ,offer_size
-            ,size
-            ,status)
+        logging_.log_values(self.runtime_tm, 'Strategies,update_trade_flow', price, offer_size, size, status)
+        tick_tm = getattr(ticker, 'time', None)  # not on the dummy tickers
+        if tick_tm is not None:
+            self.registry.observe(metricsregistry.TICK_TO_DECISION, self.clock.time() - tick_tm.timestamp(),
+                                  symbol=ticker.contract.symbol)
         self.add_to_manager(self.strat_name, 'n loops update_trade_flow', 'increment_1')
         # self.lt.heartbeat_q.put([self.strat_name, 'n loops update_trade_flow', 'increment_1'])
 
     def __make_trade_decision(self, ticker, order):
         pass
 
-    def pacing_pre_check(self, ib_pacing, n_strats, parallel_traded_instr_per_strat, bar_size_secs_, potential_mkt_data_lines_already_in_use):
-        mkt_data_lines = ib_pacing['mkt_data_lines'] < (n_strats * parallel_traded_instr_per_strat) + potential_mkt_data_lines_already_in_use
-        if mkt_data_lines:
-            return False
-        # hist data check with bar size
-        return True
+    @property
+    def parallel_traded_instr_per_strat(self):
+        return self.lt.line_allocator.granted(self.client_id)
+
+    def request_lines(self, n_wanted):
+        """
+        :param n_wanted: instruments in play plus those in line, capped at MAX_PARALLEL_TRADED_INSTR_PER_STRAT
+        :return: lines granted by the LineAllocator, trade that many instruments in parallel
+        """
+        granted = self.lt.line_allocator.request(self.client_id, min(n_wanted, MAX_PARALLEL_TRADED_INSTR_PER_STRAT))
+        self.lt.heartbeat.publish('granted_lines', granted)
+        return granted
+
+    def release_lines(self):
+        self.lt.line_allocator.release(self.client_id)
+        self.lt.heartbeat.publish('granted_lines', 0)
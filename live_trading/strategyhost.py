@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import traceback
+from collections import OrderedDict
+
+from live_trading.utils.helpers import MethodManager_
+
+HOST_HOST, HOST_PORT = '127.0.0.1', 7497  # same TWS as LiveTrading
+
+CONTRACT_IX, TICKER_IX, CLIENTS_IX = 0, 1, 2
+
+
+class SharedDepthCache(MethodManager_):
+    def __init__(self, ib, mkt_data_lines):
+        """
+        In-process counterpart of mktdatahub.MktDataHub for the strategies of one
+        StrategyHost: one reqMktDepth per symbol on the shared connection, reference
+        counted per strategy, all of them get the same ib_insync Ticker.
+        :param mkt_data_lines: MktDataLineCounter, lines are taken per unique symbol
+        """
+        self.ib = ib
+        self.mkt_data_lines = mkt_data_lines
+        self.subscriptions = OrderedDict()  # symbol: [contract, ticker, set of client_ids]
+
+    def client(self, client_id):
+        return SharedDepthClient(self, client_id)
+
+    def subscribe(self, client_id, contract_):
+        """
+        :return: ticker or None, status 0 if subscribed, 1 if no line was free
+        """
+        symbol = contract_.symbol
+        sub = self.subscriptions.get(symbol)
+        if sub is None:
+            if not self.mkt_data_lines.try_acquire():
+                return None, 1
+            sub = [contract_, self.ib.reqMktDepth(contract_), set()]
+            self.subscriptions[symbol] = sub
+        sub[CLIENTS_IX].add(client_id)
+        return sub[TICKER_IX], 0
+
+    def unsubscribe(self, client_id, symbol):
+        sub = self.subscriptions.get(symbol)
+        if sub is None:
+            return
+        sub[CLIENTS_IX].discard(client_id)
+        if not sub[CLIENTS_IX]:
+            del self.subscriptions[symbol]
+            self.ib.cancelMktDepth(sub[CONTRACT_IX])
+            self.mkt_data_lines.release()
+
+    def release_client(self, client_id):
+        for symbol in [s for s, sub in self.subscriptions.items() if client_id in sub[CLIENTS_IX]]:
+            self.unsubscribe(client_id, symbol)
+
+    def n_refs(self, symbol):
+        sub = self.subscriptions.get(symbol)
+        return len(sub[CLIENTS_IX]) if sub is not None else 0
+
+
+class SharedDepthClient:
+    def __init__(self, cache, client_id):
+        """
+        A hosted strategy's end of SharedDepthCache, backend of its MktDepthPool
+        like mktdatahub.HubClient.
+        """
+        self.cache = cache
+        self.client_id = client_id
+
+    def subscribe(self, contract_, sleep_fn=None, timeout_secs=None):
+        return self.cache.subscribe(self.client_id, contract_)
+
+    def unsubscribe(self, symbol):
+        self.cache.unsubscribe(self.client_id, symbol)
+
+
+class _Turn:
+    def __init__(self, loop):
+        """
+        Hands control back and forth between the loop thread and one strategy thread,
+        so exactly one of them runs at a time and the strategy only touches the loop
+        and the IB connection while the loop waits for it.
+        """
+        self.loop = loop
+        self.done = loop.create_future()
+        self.finished = False
+        self._strat_may_run = threading.Event()
+        self._loop_may_run = threading.Event()
+
+    def hand_over(self):
+        """
+        Loop thread: lets the strategy run until it waits or finishes.
+        """
+        self._loop_may_run.clear()
+        self._strat_may_run.set()
+        self._loop_may_run.wait()
+        if self.finished and not self.done.done():
+            self.done.set_result(None)
+
+    def take(self):
+        """
+        Strategy thread: waits for its turn.
+        """
+        self._strat_may_run.wait()
+        self._strat_may_run.clear()
+
+    def give_back(self, finished=False):
+        self.finished = finished
+        self._loop_may_run.set()
+
+    def wait_for(self, coro):
+        """
+        Strategy thread: runs coro on the loop, the other strategies' turns while it
+        is pending.
+        :return: its result
+        """
+        task = self.loop.create_task(coro)
+        task.add_done_callback(lambda _: self.hand_over())
+        self.give_back()
+        self.take()
+        return task.result()
+
+
+class HostedIB:
+    def __init__(self, ib, turn):
+        """
+        A hosted strategy's view of the shared IB: sleep and the blocking requests
+        that have an ...Async variant wait on the loop in turns instead of running
+        it nested, anything else is the shared IB's.
+        """
+        self._ib = ib
+        self._turn = turn
+
+    def sleep(self, secs):
+        self._turn.wait_for(asyncio.sleep(secs))
+        return True
+
+    def __getattr__(self, name):
+        attr = getattr(self._ib, name)
+        async_attr = getattr(self._ib, name + 'Async', None)
+        if async_attr is None or not callable(attr):
+            return attr
+
+        def blocking(*args, **kwargs):
+            return self._turn.wait_for(async_attr(*args, **kwargs))
+        return blocking
+
+
+class StrategyHost(MethodManager_):
+    def __init__(self, mkt_data_lines, client_id, ib=None):
+        """
+        Runs any number of strategies in one process on one event loop, sharing one
+        IB connection and one SharedDepthCache, instead of a process and a TWS
+        connection per strategy.
+
+        The strategies are the blocking ScannerBased constructors, each runs in a
+        thread of its own but only in turns with the loop (_Turn): a strategy's
+        ib.sleep or blocking request (HostedIB) is where the loop and the others
+        get theirs, so none waits on another's sleep however long it runs.
+        :param client_id: of the shared connection
+        :param ib: connected IB, connects to TWS itself if None
+        """
+        self.mkt_data_lines = mkt_data_lines
+        self.client_id = client_id
+        self.ib = ib
+        self.strats = OrderedDict()  # strat_name: [target, args, kwargs]
+        self.results = OrderedDict()  # strat_name: return value or exception
+        self.depth_cache = None
+
+    def add(self, strat_name, target, *args, **kwargs):
+        """
+        :param target: e.g. ScannerBased, called as target(strat_name, *args, ib=, mkt_data_hub=, **kwargs)
+        """
+        self.strats[strat_name] = [target, args, kwargs]
+
+    def run(self):
+        from ib_insync import IB
+        owns_ib = self.ib is None
+        if owns_ib:
+            self.ib = IB()
+            self.ib.connect(HOST_HOST, HOST_PORT, clientId=self.client_id)
+        self.depth_cache = SharedDepthCache(self.ib, self.mkt_data_lines)
+        loop = asyncio.get_event_loop()
+        try:
+            tasks = [loop.create_task(self._run_strat(client_id, strat_name))
+                     for client_id, strat_name in enumerate(self.strats)]
+            loop.run_until_complete(asyncio.gather(*tasks))
+        finally:
+            if owns_ib:
+                self.ib.disconnect()
+        return self.results
+
+    async def _run_strat(self, client_id, strat_name):
+        turn = _Turn(asyncio.get_event_loop())
+        threading.Thread(target=self._strat_thread, args=(turn, client_id, strat_name), name=strat_name,
+                         daemon=True).start()
+        turn.hand_over()
+        await turn.done
+
+    def _strat_thread(self, turn, client_id, strat_name):
+        target, args, kwargs = self.strats[strat_name]
+        # OrderManager and ScheduleAgent take the loop from asyncio.get_event_loop
+        asyncio.set_event_loop(turn.loop)
+        turn.take()
+        kwargs = dict(kwargs, ib=HostedIB(self.ib, turn), mkt_data_hub=self.depth_cache.client(client_id))
+        try:
+            self.results[strat_name] = target(strat_name, *args, **kwargs)
+        except Exception as e:
+            # one failing strategy does not take the others down
+            traceback.print_exc()
+            self.results[strat_name] = e
+        finally:
+            self.depth_cache.release_client(client_id)
+            turn.give_back(finished=True)
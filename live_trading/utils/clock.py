@@ -0,0 +1,56 @@
+import time
+import datetime
+
+
+class RealClock:
+    def __init__(self, sleep_fn=None, offset_secs=0.):
+        """
+        Wall clock of a strategy, the one place its gates and waits read the time
+        from, see VirtualClock for sessions faster than real time.
+        :param sleep_fn: e.g. LiveTrading.ib.sleep to keep serving events while waiting,
+            time.sleep if None
+        :param offset_secs: shift of now() and time() against the host's clock, the
+            DUMMIES.dummy_time session start
+        """
+        self.sleep_fn = sleep_fn
+        self.offset_secs = offset_secs
+        self.start_ts = self.time()
+
+    def time(self):
+        return time.time() + self.offset_secs
+
+    def now(self):
+        """
+        :return: naive local datetime like datetime.datetime.now()
+        """
+        return datetime.datetime.fromtimestamp(self.time())
+
+    def elapsed(self):
+        return self.time() - self.start_ts
+
+    def sleep(self, secs):
+        (self.sleep_fn or time.sleep)(max(secs, 0))
+
+
+class VirtualClock(RealClock):
+    def __init__(self, start=None, sleep_fn=None):
+        """
+        Clock whose sleeps advance time instantly, so a whole session of dummy or
+        replayed data runs in as long as its computations take.
+        :param start: naive local datetime the session starts at, now if None
+        :param sleep_fn: e.g. LiveTrading.ib.sleep, called with 0 on every sleep so
+            the event loop still runs
+        """
+        self._ts = time.time() if start is None else start.timestamp()
+        super(VirtualClock, self).__init__(sleep_fn)
+
+    def time(self):
+        return self._ts
+
+    def sleep(self, secs):
+        self.advance(secs)
+        if self.sleep_fn is not None:
+            self.sleep_fn(0)
+
+    def advance(self, secs):
+        self._ts += max(secs, 0)
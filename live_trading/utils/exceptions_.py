@@ -42,6 +42,9 @@ class WinnersZero(Exception):
 class CurrNotInExchRateDict(Exception):
     pass
 
+class ReplayEndOfSession(Exception):
+    pass
+
 class ExceptionHandling:
     def __init__(self, runtime_tm, continuous_err_max_for_sleeping, sleep_time_if_error):
         self.runtime_tm = runtime_tm
@@ -78,6 +81,9 @@ class ExceptionHandling:
         elif isinstance(e, TooManyStratsError):
             print('too many strategies per day/execution')
             raise e
+        elif isinstance(e, ReplayEndOfSession):
+            print('end of the replayed session')
+            raise e
         else:
             if raise_error:
                 raise e
@@ -5,9 +5,12 @@ import pandas as pd
 import os
 
 # from live_trading.live_trading import LiveTrading
+from live_trading.live_trading import IB_PACING
 from ib_insync import IB, ScannerSubscription, Stock
 from .helpers import Database
 from .analyzedata import AnalyzeData
+from .scheduleadgent.scheduleagent import ScheduleAgent
+from .pacinggovernor import PacingGovernor
 
 BAR_SIZE = 15
 SCANNER_SCOPE = ['TOP_TRADE_RATE', 'TOP_OPEN_PERC_GAIN', 'HIGH_OPEN_GAP']
@@ -25,6 +28,8 @@ class GatherData:
         __host = '127.0.0.1'
         self.ib = IB()
         self.ib.connect(__host, __port, clientId=client_id)
+        self.sched = ScheduleAgent()
+        self.pacing = PacingGovernor(IB_PACING)
         self.db = Database()
         self.conn = self.db.connect_()
 
@@ -74,6 +79,8 @@ class GatherData:
 
     def load_hist_data(self, dt_ts_str, symbol, duration_secs):
         contract = Stock(symbol, 'SMART', 'USD')
+        keys = self.pacing.hist_data_keys(contract, 'ADJUSTED_LAST', dt_ts_str, duration_secs, BAR_SIZE)
+        self.pacing.acquire('histData', keys, sleep_fn=self.ib.sleep)
         data_ = self.ib.reqHistoricalData(contract,
                                           endDateTime=''.format(dt_ts_str),
                                           durationStr='{} S'.format(duration_secs),
@@ -125,10 +132,8 @@ class GatherData:
                     except Exception as e:
                         print('error occured and inserted:', e)
                         self.insert_scanner(previous_unix_ts, previous_dt_ts, np.nan, e, cursor)
-                current_unix_ts = int(time.time())
                 print('waiting for next bar:', BAR_SIZE)
-                while current_unix_ts - previous_unix_ts < BAR_SIZE:
-                    current_unix_ts = int(time.time())
+                self.sched.sleep_until_next_bar(BAR_SIZE)
                 done = True
                 now = datetime.datetime.now().time()
             else:
@@ -1,11 +1,17 @@
 import time
+import copy
+import queue
+import asyncio
 import datetime
 from collections import OrderedDict
 import pandas as pd
 
 from .consoledisplay import ConsoleDisplay
+from . import metricsregistry
 
 HEARTBEAT_SECS = 6
+STRAT_IX, LINE_IX, VAL_IX, DELTA_IX = 0, 1, 2, 3  # [strat, line, val] or [strat, line, delta, DELTA]
+DELTA = 'delta'
 RUNTIME_TM_HEARTBEAT = datetime.datetime.now()
 
 class Clear(object):
@@ -14,15 +20,108 @@ class Clear(object):
         os.system('cls' if os.name == 'nt' else 'clear')
         return ''
 
+def apply_delta(d, delta):
+    """
+    :param delta: (changed, removed keys) of a dict published by HeartbeatPublisher
+    :return: updated copy of d
+    """
+    changed, removed = delta
+    d = copy.copy(d)
+    for k in removed:
+        d.pop(k, None)
+    d.update(changed)
+    return d
+
+
+def merge_deltas(first, second):
+    changed = {k: v for k, v in first[0].items() if k not in second[1]}
+    changed.update(second[0])
+    return changed, [k for k in first[1] if k not in second[0]] + list(second[1])
+
+
+class HeartbeatPublisher:
+    def __init__(self, q_, strat_name, flush_secs=HEARTBEAT_SECS, clock=time.time, loop=None):
+        """
+        Strategy side of heartbeat_q. publish only keeps the latest value per line,
+        the values are sent at most once per flush_secs, later calls within the
+        interval arm a flush on the event loop instead. Of a dict only the changed and
+        removed keys since the last flush are sent, other values only if they changed,
+        so what goes through the pipe no longer grows with the number of trades.
+        """
+        self.q_ = q_
+        self.strat_name = strat_name
+        self.flush_secs = flush_secs
+        self.clock = clock
+        self._loop = loop
+        self._pending = OrderedDict()  # line: latest value
+        self._sent = {}  # line: copy of the value as last sent
+        self._last_flush = None
+        self._flush_handle = None
+        self.n_msgs = 0
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_event_loop()
+        return self._loop
+
+    def publish(self, line, val):
+        self._pending[line] = val
+        if self._last_flush is None or self.clock() - self._last_flush >= self.flush_secs:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = self.loop.call_later(self.flush_secs - (self.clock() - self._last_flush), self._on_timer)
+
+    def flush(self):
+        """
+        Sends what is pending now, e.g. before the strategy ends.
+        """
+        self._last_flush = self.clock()
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, OrderedDict()
+        for line, val in pending.items():
+            msg = self._msg(line, val)
+            if msg is not None:
+                self.q_.put(msg)
+                self.n_msgs += 1
+
+    def _on_timer(self):
+        self._flush_handle = None
+        self.flush()
+
+    def _msg(self, line, val):
+        first = line not in self._sent
+        sent = self._sent.get(line)
+        self._sent[line] = copy.copy(val)
+        if not first and isinstance(val, dict) and isinstance(sent, dict):
+            changed = {k: v for k, v in val.items() if k not in sent or sent[k] != v}
+            removed = [k for k in sent if k not in val]
+            if not changed and not removed:
+                return None
+            if len(changed) + len(removed) < len(val):
+                return [self.strat_name, line, (changed, removed), DELTA]
+        elif not first and type(sent) is type(val) and sent == val:
+            return None
+        return [self.strat_name, line, val]
+
+
 class HeartbeatMonitor:
-    def __init__(self, d_, q_, strats, traded_instr):
+    def __init__(self, d_, q_, strats, traded_instr, mkt_data_lines=None, metrics_board=None, metrics_port=None):
+        """
+        :param metrics_port: serve the strategies' metricsregistry on it, not at all if None
+        """
         self.d_ = d_
         self.q_ = q_
         self.strats = strats
         self.traded_instr = traded_instr
+        self.mkt_data_lines = mkt_data_lines
+        self.metrics_board = metrics_board
         self.monitor_lines = ['curr_meth',
             '__winners',
             '__traded_instr',
+            'granted_lines',
             #'portfolio',
             'cnt_trades_per_instr_per_day',
             # 'portfolio_instr': self.strat.lt.portfolio_instr,
@@ -33,74 +132,104 @@ class HeartbeatMonitor:
             'continuous_err_cnt',
             'n loops update_trade_flow',
             'n False buy_conditions' ,
-            'n False sell_conditions']
+            'n False sell_conditions',
+            'bar_jitter_ms']
+        self._monitor_lines = set(self.monitor_lines)
 
         self.heartbeat_secs = HEARTBEAT_SECS
         self.cons_disp = ConsoleDisplay()
         self.clr = Clear()
+        # process wide, set once for all renders
+        pd.set_option('display.width', self.cons_disp.pd_width)
+        pd.set_option('display.column_space', self.cons_disp.pd_column_space)
+        pd.set_option('display.max_rows', self.cons_disp.pd_max_rows)
+        pd.set_option('display.max_columns', self.cons_disp.pd_max_columns)
+        self.values = {}  # (strat, line): last value received, base of the deltas
+        self.table = OrderedDict()  # (strat, line): str(val)
+        self._table_str = None  # rendered table, rebuilt only when the table changed
+        self.metrics_server = metricsregistry.MetricsServer(self.render_metrics, port=metrics_port) \
+            if metrics_port is not None else None
         self.monitor_from_q()
         # self.monitor_f()
 
     def get_q(self):
-        msgs = []
-        while not self.q_.empty():
-            # msgs.append(self.q_.get(True))
-            msgs.append(self.q_.get(False))
-        unique_msgs = []
-        previous_val1 = ''
-        previous_val2 = ''
-        for i in msgs:
-            if i[0] == previous_val1 and i[1] == previous_val2:
+        """
+        Drains the queue and coalesces it by (strat, line), so a burst of messages
+        costs one table update per key; deltas are folded into what came before.
+        :return: the latest message per key, in order of first appearance
+        """
+        msgs = OrderedDict()
+        while True:
+            try:
+                msg = self.q_.get(False)
+            except queue.Empty:
+                break
+            key = (msg[STRAT_IX], msg[LINE_IX])
+            prev = msgs.get(key)
+            if prev is not None and len(msg) > DELTA_IX:
+                if len(prev) > DELTA_IX:
+                    msg = [msg[STRAT_IX], msg[LINE_IX], merge_deltas(prev[VAL_IX], msg[VAL_IX]), DELTA]
+                else:
+                    msg = [msg[STRAT_IX], msg[LINE_IX], apply_delta(prev[VAL_IX], msg[VAL_IX])]
+            msgs[key] = msg
+        return list(msgs.values())
+
+    def update(self, msgs):
+        """
+        :return: True if any shown value changed
+        """
+        changed = False
+        for msg in msgs:
+            if msg[STRAT_IX] not in self.strats:
+                continue
+            key = (msg[STRAT_IX], msg[LINE_IX])
+            val = msg[VAL_IX]
+            if len(msg) > DELTA_IX:
+                val = apply_delta(self.values.get(key, {}), val)
+            self.values[key] = val
+            if msg[LINE_IX] not in self._monitor_lines:
                 continue
-            previous_val1 = i[0]
-            previous_val2 = i[1]
-            unique_msgs.append(i)
-        return unique_msgs
+            val = str(val)
+            if self.table.get(key) != val:
+                self.table[key] = val
+                changed = True
+        if changed:
+            self._table_str = None
+        return changed
+
+    def render(self):
+        """
+        :return: lines x strats frame of the table as str, cached until it changes
+        """
+        if self._table_str is None:
+            lines = [line for line in self.monitor_lines if any((strat, line) in self.table for strat in self.strats)]
+            df = pd.DataFrame([[self.table.get((strat, line), '') for strat in self.strats] for line in lines],
+                              index=pd.Index(lines, name='line'), columns=list(self.strats))
+            self._table_str = str(df) if lines else 'None'
+        return self._table_str
+
+    def render_metrics(self):
+        """
+        :return: /metrics of all strategies, called from the server's threads
+        """
+        samples_list = [val for (strat, line), val in list(self.values.items()) if line == metricsregistry.METRICS_LINE]
+        if self.mkt_data_lines is not None:
+            samples_list.append({(metricsregistry.MKT_DATA_LINES, ()): self.mkt_data_lines.in_use()})
+        return metricsregistry.render(samples_list)
 
     def monitor_from_q(self):
-        strat_ix = 0
-        line_ix = 1
-        val_ix = 2
-        _cnt = 0
-        df = None
-        first_df = True
         while True:
-            msgs = self.get_q()
+            self.update(self.get_q())
+            if self.metrics_board is not None:
+                self.update(self.metrics_board.msgs())
             print('\n', 'heartbeat monitor ({} secs):'.format(self.heartbeat_secs))
             delta_ = datetime.datetime.now() - RUNTIME_TM_HEARTBEAT
             print('    ', 'total time elapsed', ':', delta_)
-            for s_ix, strat in enumerate(self.strats):
-                col = []
-                for msg in msgs:
-                    if msg[strat_ix] == strat:
-                        for line in self.monitor_lines:
-                            if msg[line_ix] == line:
-                                col.append([msg[line_ix], str(msg[val_ix])])
-                                if first_df:
-                                    df = pd.DataFrame(col, columns=['line', '{}'.format(msg[strat_ix])])#.set_index(['line'])
-                                    first_df = False
-                                    col = []
-                                    break
-                                else:
-                                    new_df = pd.DataFrame(col, columns=['line', '{}'.format(msg[strat_ix])])#.set_index(['line'])
-                                    # df = df.join(new_df) #pd.join([df, new_df])
-                                    df = df.merge(new_df, how='outer') #on='line',
-                                    #  df = df.merge(new_df, on='line', how='o
-                                    col = []
-                                    break
-                    #         else:
-                    #             continue
-                    # else:
-                    #     continue
             print('    ', 'traded_instr', self.traded_instr)
-            pd.set_option('display.width', self.cons_disp.pd_width)
-            pd.set_option('display.column_space', self.cons_disp.pd_column_space)
-            pd.set_option('display.max_rows', self.cons_disp.pd_max_rows)
-            pd.set_option('display.max_columns', self.cons_disp.pd_max_columns)
-            print('    ', 'strats detailed status', '\n', '   ', df)
-            # pd.reset_option()
-            first_df = True
-            _cnt += 1
+            if self.mkt_data_lines is not None:
+                print('    ', 'active_mkt_data_lines', '{}/{} (peak {})'.format(
+                    self.mkt_data_lines.in_use(), self.mkt_data_lines.limit, self.mkt_data_lines.peak()))
+            print('    ', 'strats detailed status', '\n', '   ', self.render())
             time.sleep(self.heartbeat_secs)
 
     def monitor_f(self):
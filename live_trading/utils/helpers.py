@@ -3,6 +3,9 @@ from collections import OrderedDict
 class Helpers: pass
 
 class ClientSharedMemory:
+    def __init__(self, metrics_board=None):
+        self.metrics_board = metrics_board
+
     def init_manager(self, *args, **kwargs):
         # cap_usd = None
         for k, v in kwargs.items():
@@ -22,51 +25,25 @@ class ClientSharedMemory:
                'continuous_err_cnt': OrderedDict({k: 0 for k in strats}),
                'n loops update_trade_flow': OrderedDict({k: 0 for k in strats}),
                'n False buy_conditions': OrderedDict({k: 0 for k in strats}),
-               'n False sell_conditions': OrderedDict({k: 0 for k in strats}),
-               'active_mkt_data_lines': 0 })#,
+               'n False sell_conditions': OrderedDict({k: 0 for k in strats})})#,
                # 'n __hist_data_winners_df': 0,
                #'blank_line3': '')
         return d_
 
     def add_to_manager(self, strat_name, key_, val_, first_time=False):
-        return
-        # (
-        # if val_ == 'increment_1':
-        #     try:
-        #         self.lt.manager_[key_][strat_name] = self.lt.manager_[key_][strat_name] + 1
-        #     except Exception as e:
-        #         print('')
-        #         # if len(self.lt.manager_[key_]) == 0:
-        #         #     self.lt.manager_[key_] = OrderedDict({strat_name: [val_]})
-        #         # else:
-        #         #     raise Exception('add_to_manager: something strange')
-        # elif key_ == 'curr_meth':
-        #     try:
-        #         self.lt.manager_[key_][strat_name] = [val_] + self.lt.manager_[key_][strat_name]
-        #     # except KeyError:
-        #     except Exception as e:
-        #         if len(self.lt.manager_[key_]) == 0:
-        #             self.lt.manager_[key_] = OrderedDict({strat_name: [val_]})
-        #         elif len(self.lt.manager_[key_]) > 0:
-        #             self.lt.manager_[key_][strat_name] = [val_]
-        #         else:
-        #             raise Exception('add_to_manager: something strange')
-        # else:
-        #     try:
-        #         x = self.lt.manager_[key_]
-        #         x[strat_name] = val_
-        #         self.lt.manager_[key_] = x
-        #         self.lt.manager_[key_][strat_name] = val_
-        #         print('')
-        #         print('')
-        #     # except KeyError:
-        #     except Exception as e:
-        #         if len(self.lt.manager_[key_]) == 0:
-        #             self.lt.manager_[key_] = OrderedDict({strat_name: [val_]})
-        #             x = self.lt.manager_[key_]
-        #         else:
-        #             raise Exception('add_to_manager: something strange')
-        # )
+        """
+        Writes the lines of metricsboard.MetricsBoard, anything else is sent through
+        heartbeat_q or not shown.
+        :param val_: 'increment_1' to count one up
+        """
+        if self.metrics_board is None or key_ not in self.metrics_board.lines:
+            return
+        if key_ == 'curr_meth':
+            self.metrics_board.set_curr_meth(strat_name, val_)
+        elif isinstance(val_, str) and val_ == 'increment_1':
+            self.metrics_board.incr(strat_name, key_)
+        else:
+            self.metrics_board.set(strat_name, key_, val_)
 
 class MethodManager_:
     def print_meths(self, cls_, obj_dir):
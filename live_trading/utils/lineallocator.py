@@ -0,0 +1,129 @@
+import os
+import threading
+import multiprocessing
+
+from .sharedmemory import attach_shm, create_shm, INT64_BYTES
+
+WANTED_IX, GRANTED_IX, N_FIELDS = 0, 1, 2
+
+
+def fair_shares(wanted, capacity):
+    """
+    Max-min fair split of capacity: every strategy gets what it wants if that is below
+    an equal share, the rest is split equally among the others, leftover lines of the
+    integer division go to the lowest slots.
+    :param wanted: lines wanted per slot, 0 for none
+    :return: target lines per slot, sum <= capacity
+    """
+    targets = [0] * len(wanted)
+    open_ = sorted((n, slot) for slot, n in enumerate(wanted) if n > 0)
+    capacity = max(capacity, 0)
+    while open_:
+        share = capacity // len(open_)
+        n, slot = open_[0]
+        if n > share:
+            break
+        targets[slot] = n
+        capacity -= n
+        open_.pop(0)
+    if open_:
+        share, extra = divmod(capacity, len(open_))
+        for i, slot in enumerate(sorted(slot for _, slot in open_)):
+            targets[slot] = share + (1 if i < extra else 0)
+    return targets
+
+
+class LineAllocator:
+    def __init__(self, limit, n_slots, reserved=0, ctx=multiprocessing, shared=True):
+        """
+        Budget of market depth lines across all strategies, handed out at runtime
+        instead of a fixed number of instruments per strategy. Every strategy tells
+        request how many instruments it could trade and gets a max-min fair share of
+        the lines, growing into lines other strategies do not hold. A strategy over
+        its share keeps its lines until its next request, which shrinks the grant; so
+        lines come back when a strategy rotates symbols or finishes and calls release.
+
+        Same shared memory plus lock layout as sharedmemory.MktDataLineCounter, the
+        counter still guards the subscriptions themselves.
+        :param limit: IB_PACING['mkt_data_lines']
+        :param n_slots: one per strategy, the slot is the strategy's client_id
+        :param reserved: lines already taken by other clients, e.g. TWS windows
+        :param shared: False for a process-local allocator, see sharedmemory.LocalBuffer
+        """
+        self.limit = limit
+        self.n_slots = n_slots
+        self.reserved = reserved
+        self._shm = create_shm(max(1, n_slots * N_FIELDS) * INT64_BYTES, shared)
+        self._lock = ctx.Lock() if shared else threading.Lock()
+        self._owner_pid = os.getpid()
+        self._vals = self._shm.buf.cast('q')
+        for i in range(n_slots * N_FIELDS):
+            self._vals[i] = 0
+
+    def __getstate__(self):
+        return {'limit': self.limit, 'n_slots': self.n_slots, 'reserved': self.reserved, 'name': self._shm.name,
+                'lock': self._lock}
+
+    def __setstate__(self, state):
+        self.limit = state['limit']
+        self.n_slots = state['n_slots']
+        self.reserved = state['reserved']
+        self._lock = state['lock']
+        self._owner_pid = None
+        self._shm = attach_shm(state['name'])
+        self._vals = self._shm.buf.cast('q')
+
+    @property
+    def capacity(self):
+        return self.limit - self.reserved
+
+    def request(self, slot, n_wanted):
+        """
+        :param n_wanted: instruments the strategy could trade right now, in play and in line
+        :return: lines granted, the number of instruments to trade in parallel
+        """
+        with self._lock:
+            self._vals[slot * N_FIELDS + WANTED_IX] = n_wanted
+            target = fair_shares(self._wanted(), self.capacity)[slot]
+            free = self.capacity - sum(self._granted()) + self._vals[slot * N_FIELDS + GRANTED_IX]
+            granted = max(0, min(target, free))
+            self._vals[slot * N_FIELDS + GRANTED_IX] = granted
+        return granted
+
+    def release(self, slot):
+        """
+        Strategy is done, all of its lines go back to the others.
+        """
+        with self._lock:
+            self._vals[slot * N_FIELDS + WANTED_IX] = 0
+            self._vals[slot * N_FIELDS + GRANTED_IX] = 0
+
+    def _wanted(self):
+        return [self._vals[i * N_FIELDS + WANTED_IX] for i in range(self.n_slots)]
+
+    def _granted(self):
+        return [self._vals[i * N_FIELDS + GRANTED_IX] for i in range(self.n_slots)]
+
+    def wanted(self, slot):
+        return self._vals[slot * N_FIELDS + WANTED_IX]
+
+    def granted(self, slot):
+        return self._vals[slot * N_FIELDS + GRANTED_IX]
+
+    def total_granted(self):
+        return sum(self._granted())
+
+    def available(self):
+        return self.capacity - self.total_granted()
+
+    def close(self):
+        self._vals.release()
+        self._shm.close()
+        if self._owner_pid == os.getpid():  # forked children inherit the object, only the creator unlinks
+            self._shm.unlink()
+
+    def __del__(self):
+        # SharedMemory.__del__ cannot close the segment while our view of it is alive
+        vals = getattr(self, '_vals', None)
+        if vals is not None:
+            vals.release()
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .sharedmemory import SeqLockArray
+
+CURR_METH = 'curr_meth'
+CURR_METH_LEN = 64  # bytes, longer 'Class,meth' names are cut
+COUNTERS = ['continuous_err_cnt', 'n loops update_trade_flow', 'n False buy_conditions', 'n False sell_conditions']
+GAUGES = ['cap_usd']
+INCREMENT = 'increment_1'  # val_ of add_to_manager for counters
+
+METRICS_DTYPE = np.dtype([('seq', np.int64),
+                          ('update_ts', np.float64),
+                          (CURR_METH, 'S{}'.format(CURR_METH_LEN))]
+                         + [(line, np.int64) for line in COUNTERS]
+                         + [(line, np.float64) for line in GAUGES])
+
+
+class MetricsBoard:
+    def __init__(self, strats, shared=True):
+        """
+        Fixed-schema status of all strategies in shared memory, the heartbeat lines
+        that change too often for heartbeat_q. One SeqLockArray slot per strategy,
+        written only by that strategy's process, so updating a counter is a couple
+        of stores into shared memory, no IPC; HeartbeatMonitor reads consistent
+        snapshots of all slots once per heartbeat.
+        :param strats: strategy names, in slot order
+        :param shared: False for a process-local board, see sharedmemory.LocalBuffer
+        """
+        self.strats = list(strats)
+        self.slots = {strat: i for i, strat in enumerate(self.strats)}
+        self.lines = [CURR_METH] + COUNTERS + GAUGES
+        self.board = SeqLockArray(METRICS_DTYPE, len(self.strats), shared)
+        self._encoded = {}  # meth: bytes as stored
+
+    def incr(self, strat, line, n=1):
+        slot = self.slots[strat]
+        self.board.write(slot, update_ts=time.time(), **{line: self.board.arr[line][slot] + n})
+
+    def set(self, strat, line, val):
+        self.board.write(self.slots[strat], update_ts=time.time(), **{line: val})
+
+    def set_curr_meth(self, strat, meth):
+        encoded = self._encoded.get(meth)
+        if encoded is None:
+            encoded = self._encoded[meth] = meth.encode()[:CURR_METH_LEN]
+        self.board.write(self.slots[strat], update_ts=time.time(), **{CURR_METH: encoded})
+
+    def snapshot(self, strat):
+        rec = self.board.read(self.slots[strat])
+        d_ = OrderedDict([(CURR_METH, rec[CURR_METH].decode(errors='replace'))])
+        for line in COUNTERS:
+            d_[line] = int(rec[line])
+        for line in GAUGES:
+            d_[line] = float(rec[line])
+        d_['update_ts'] = float(rec['update_ts'])
+        return d_
+
+    def msgs(self):
+        """
+        :return: [strat, line, val] of the strategies that wrote anything yet, as
+            sent through heartbeat_q
+        """
+        msgs = []
+        for strat in self.strats:
+            snapshot = self.snapshot(strat)
+            if snapshot['update_ts'] == 0:
+                continue
+            msgs.extend([strat, line, snapshot[line]] for line in self.lines)
+        return msgs
+
+    def close(self):
+        self.board.close()
@@ -0,0 +1,172 @@
+import time
+import bisect
+import threading
+import functools
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_HOST, METRICS_PORT = '127.0.0.1', 9108  # served by HeartbeatMonitor
+METRICS_LINE = 'metrics'  # heartbeat_q line carrying Registry.snapshot
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+LATENCY_BUCKETS_SECS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10., 30.)
+
+TICK_TO_DECISION = 'live_trading_tick_to_decision_seconds'
+ORDER_TO_FILL = 'live_trading_order_to_fill_seconds'
+METHOD_DURATION = 'live_trading_method_seconds'
+ORDERS = 'live_trading_orders_total'
+MKT_DATA_LINES = 'live_trading_mkt_data_lines'
+
+METRICS = OrderedDict([(TICK_TO_DECISION, (HISTOGRAM, 'last book update to the end of update_trade_flow')),
+                       (ORDER_TO_FILL, (HISTOGRAM, 'order placed to filled')),
+                       (METHOD_DURATION, (HISTOGRAM, 'duration of the methods on the trading path')),
+                       (ORDERS, (COUNTER, 'orders done, by final state')),
+                       (MKT_DATA_LINES, (GAUGE, 'market data lines in use'))])
+
+
+class Registry:
+    def __init__(self, const_labels=None):
+        """
+        Counters, gauges and LATENCY_BUCKETS_SECS histograms of one strategy, kept as
+        plain numbers and lists so a snapshot pickles small and HeartbeatPublisher
+        only sends the series that changed. Series are keyed (name, labels), the
+        names are declared in METRICS.
+        :param const_labels: e.g. {'strat': strat_name}, put in front of every series
+        """
+        self.const_labels = tuple((const_labels or {}).items())
+        self.samples = OrderedDict()  # (name, labels): number, or histogram bucket counts + [sum]
+
+    def _key(self, name, labels):
+        return name, self.const_labels + tuple(labels.items())
+
+    def inc(self, name, n=1, **labels):
+        key = self._key(name, labels)
+        self.samples[key] = self.samples.get(key, 0) + n
+
+    def set(self, name, val, **labels):
+        self.samples[self._key(name, labels)] = val
+
+    def observe(self, name, val, **labels):
+        key = self._key(name, labels)
+        h = self.samples.get(key)
+        if h is None:
+            # one count per bucket, one for +Inf, then the sum
+            h = self.samples[key] = [0] * (len(LATENCY_BUCKETS_SECS) + 2)
+        h[bisect.bisect_left(LATENCY_BUCKETS_SECS, val)] += 1
+        h[-1] += val
+
+    def snapshot(self):
+        return {k: list(v) if isinstance(v, list) else v for k, v in self.samples.items()}
+
+    def render(self):
+        return render([self.samples])
+
+
+registry = Registry()  # for objects without a strategy's own, see observed
+
+
+def observed(meth):
+    """
+    Method decorator timing every call into METHOD_DURATION of the object's registry,
+    the strategy's LiveTrading.registry, labelled by meth and, if the first argument
+    is a ticker or contract, its symbol. Always on, unlike instrumentation.timed:
+    two perf_counter calls and a bucket increment.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                getattr(self, 'registry', registry).observe(METHOD_DURATION, time.perf_counter() - t0,
+                                                            meth=meth, symbol=_symbol(args))
+        return wrapper
+    return decorator
+
+
+def _symbol(args):
+    if not args:
+        return ''
+    arg = args[0]
+    contract = getattr(arg, 'contract', arg)
+    return str(getattr(contract, 'symbol', ''))
+
+
+def _escape(val):
+    return str(val).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _series(name, labels, extra=()):
+    labels = tuple(labels) + tuple(extra)
+    if not labels:
+        return name
+    return '{}{{{}}}'.format(name, ','.join('{}="{}"'.format(k, _escape(v)) for k, v in labels))
+
+
+def render(samples_list):
+    """
+    :param samples_list: Registry.samples of any number of processes
+    :return: Prometheus text exposition format
+    """
+    by_name = OrderedDict((name, []) for name in METRICS)
+    for samples in samples_list:
+        for (name, labels), val in samples.items():
+            by_name.setdefault(name, []).append((labels, val))
+    out = []
+    for name, series in by_name.items():
+        if not series:
+            continue
+        kind, help_ = METRICS.get(name, (GAUGE, ''))
+        out.append('# HELP {} {}'.format(name, help_))
+        out.append('# TYPE {} {}'.format(name, kind))
+        for labels, val in series:
+            if kind != HISTOGRAM:
+                out.append('{} {}'.format(_series(name, labels), val))
+                continue
+            cum = 0
+            for le, n in zip(LATENCY_BUCKETS_SECS + ('+Inf',), val[:-1]):
+                cum += n
+                out.append('{} {}'.format(_series(name + '_bucket', labels, (('le', le),)), cum))
+            out.append('{} {}'.format(_series(name + '_sum', labels), val[-1]))
+            out.append('{} {}'.format(_series(name + '_count', labels), cum))
+    return '\n'.join(out) + '\n'
+
+
+class MetricsServer:
+    def __init__(self, render_fn, host=METRICS_HOST, port=METRICS_PORT):
+        """
+        Serves render_fn() as plain text on GET /metrics from a daemon thread.
+        :param port: 0 for any free one, see self.port
+        """
+        self.render_fn = render_fn
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split('?')[0] != '/metrics':
+                    handler.send_error(404)
+                    return
+                body = self.render_fn().encode()
+                handler.send_response(200)
+                handler.send_header('Content-Type', CONTENT_TYPE)
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='MetricsServer', daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return 'http://{}:{}/metrics'.format(self.host, self.port)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
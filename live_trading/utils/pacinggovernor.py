@@ -0,0 +1,157 @@
+import time
+import zlib
+import multiprocessing
+from collections import OrderedDict
+
+N_KEY_SLOTS = 256  # per keyed rule, distinct contracts/requests alive within one window
+PACING_MARGIN_SECS = .25  # TWS clocks the windows on its side, keep some distance
+KEY_IX, HEAD_IX, N_META = 0, 1, 2
+
+# IB_PACING rule name: keyed (per contract/request) or global
+RULES = OrderedDict([('hist_data_general_reqs_per_interval', False),
+                     ('hist_data_similar', True),
+                     ('hist_data_identical', True),
+                     ('funda_data_reqs', False)])
+# IB counts reaching the limit as the violation ("six or more similar requests within 2 secs")
+EXCLUSIVE_RULES = {'hist_data_similar'}
+REQ_TYPE_RULES = {'histData': ['hist_data_general_reqs_per_interval', 'hist_data_similar', 'hist_data_identical'],
+                  'fundaData': ['funda_data_reqs']}
+
+
+class PacingGovernor:
+    def __init__(self, ib_pacing, n_key_slots=N_KEY_SLOTS, margin_secs=PACING_MARGIN_SECS, clock=None):
+        """
+        Sliding-window limiter for the request rules in LiveTrading.IB_PACING, shared by
+        all strategy processes: create it before starting them and pass it on, the
+        state lives in multiprocessing shared memory guarded by one lock.
+
+        Each rule keeps the grant times of its last `reqs` requests in a ring. A new
+        request fits if the oldest of them left the `secs` window; otherwise acquire
+        waits exactly until it does instead of letting TWS reject the request and
+        lock us out. Keyed rules (similar/identical historical requests) get one ring
+        per key in a hashed table of n_key_slots. Rules in EXCLUSIVE_RULES allow one
+        request less than their `reqs`.
+        :param clock: utils.clock clock to read the time from, e.g. a replay's
+            VirtualClock, the host's if None
+        """
+        self._time = clock.time if clock is not None else time.time
+        self.margin_secs = margin_secs
+        self.n_key_slots = n_key_slots
+        self.rules = OrderedDict()  # name: [secs, reqs, first_slot, n_slots]
+        n_slots, n_ts = 0, 0
+        self._ts_offsets = []
+        for name, keyed in RULES.items():
+            secs, reqs = ib_pacing[name]['secs'], ib_pacing[name]['reqs']
+            if name in EXCLUSIVE_RULES:
+                reqs -= 1
+            slots = n_key_slots if keyed else 1
+            self.rules[name] = [secs, reqs, n_slots, slots]
+            for _ in range(slots):
+                self._ts_offsets.append(n_ts)
+                n_ts += reqs
+            n_slots += slots
+        self._meta = multiprocessing.RawArray('q', n_slots * N_META)
+        self._ts = multiprocessing.RawArray('d', n_ts)
+        self._lock = multiprocessing.Lock()
+
+    @staticmethod
+    def key_of(*parts):
+        # zlib.crc32 instead of hash(): str hashes are salted per process
+        return zlib.crc32('|'.join(str(p) for p in parts).encode()) + 1
+
+    @classmethod
+    def hist_data_keys(cls, contract, what_to_show, *params):
+        """
+        :return: rule name: key, the similar key is per contract/exchange/tick type,
+            the identical key additionally covers all other request parameters
+        """
+        similar = cls.key_of(contract.symbol, contract.exchange, what_to_show)
+        return {'hist_data_similar': similar,
+                'hist_data_identical': cls.key_of(similar, *params)}
+
+    def try_acquire(self, req_type, keys=None, now=None):
+        """
+        Non-blocking, records the request if all its rules allow it right now.
+        :return: 0.0 if granted, else seconds until it would be
+        """
+        now = self._time() if now is None else now
+        keys = {} if keys is None else keys
+        with self._lock:
+            slots, wait = [], 0.0
+            for name in REQ_TYPE_RULES[req_type]:
+                secs, reqs, first_slot, n_slots = self.rules[name]
+                slot = self._slot(first_slot, n_slots, keys.get(name, 0), secs, now)
+                if slot is None:  # key table full of live keys, wait for the first one to expire
+                    expiry = min(self._newest(slot_) for slot_ in range(first_slot, first_slot + n_slots)) + secs
+                    wait = max(wait, expiry - now, self.margin_secs)
+                    continue
+                oldest = self._ts[self._ts_offsets[slot] + self._meta[slot * N_META + HEAD_IX]]
+                wait = max(wait, oldest + secs + self.margin_secs - now)
+                slots.append((slot, keys.get(name, 0), reqs))
+            if wait > 0:
+                return wait
+            for slot, key_, reqs in slots:
+                head = self._meta[slot * N_META + HEAD_IX]
+                self._meta[slot * N_META + KEY_IX] = key_
+                self._ts[self._ts_offsets[slot] + head] = now
+                self._meta[slot * N_META + HEAD_IX] = (head + 1) % reqs
+        return 0.0
+
+    def acquire(self, req_type, keys=None, sleep_fn=time.sleep):
+        """
+        Blocks until the request fits all its windows, then records it.
+        :param sleep_fn: e.g. LiveTrading.ib.sleep to keep serving events while queued
+        :return: seconds waited
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(req_type, keys)
+            if wait == 0:
+                return waited
+            sleep_fn(wait)
+            waited += wait
+
+    def usage(self, now=None):
+        """
+        :return: rule name: requests inside the current window (busiest key for keyed rules)
+        """
+        now = self._time() if now is None else now
+        usage = OrderedDict()
+        with self._lock:
+            for name, (secs, reqs, first_slot, n_slots) in self.rules.items():
+                busiest = 0
+                for slot in range(first_slot, first_slot + n_slots):
+                    offset = self._ts_offsets[slot]
+                    n = sum(1 for i in range(reqs) if self._ts[offset + i] > now - secs)
+                    busiest = max(busiest, n)
+                usage[name] = busiest
+        return usage
+
+    def _slot(self, first_slot, n_slots, key_, secs, now):
+        if n_slots == 1:
+            return first_slot
+        start = key_ % n_slots
+        free = None
+        for probe in range(n_slots):
+            slot = first_slot + (start + probe) % n_slots
+            slot_key = self._meta[slot * N_META + KEY_IX]
+            if slot_key == key_:
+                return slot
+            if free is None and (slot_key == 0 or self._newest(slot) <= now - secs):
+                free = slot
+        if free is not None:
+            self._reset(free)
+        return free
+
+    def _newest(self, slot):
+        offset = self._ts_offsets[slot]
+        n = self._ts_offsets[slot + 1] - offset if slot + 1 < len(self._ts_offsets) else len(self._ts) - offset
+        return max(self._ts[offset:offset + n])
+
+    def _reset(self, slot):
+        offset = self._ts_offsets[slot]
+        n = self._ts_offsets[slot + 1] - offset if slot + 1 < len(self._ts_offsets) else len(self._ts) - offset
+        for i in range(n):
+            self._ts[offset + i] = 0.0
+        self._meta[slot * N_META + KEY_IX] = 0
+        self._meta[slot * N_META + HEAD_IX] = 0
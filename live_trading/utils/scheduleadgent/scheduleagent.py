@@ -1 +1,64 @@
-class ScheduleAgent: pass
+import time
+from collections import deque, OrderedDict
+
+JITTER_SAMPLES = 1000
+
+
+class JitterStats:
+    def __init__(self, n_samples=JITTER_SAMPLES):
+        self.samples = deque(maxlen=n_samples)
+        self.n_wakeups = 0
+        self.max_secs = 0.0
+
+    def add(self, jitter_secs):
+        self.samples.append(jitter_secs)
+        self.n_wakeups += 1
+        if jitter_secs > self.max_secs:
+            self.max_secs = jitter_secs
+
+    def report(self):
+        """
+        :return: wakeup lateness in milliseconds, p99 over the latest JITTER_SAMPLES wakeups
+        """
+        if len(self.samples) == 0:
+            return OrderedDict([('n', 0)])
+        sorted_ = sorted(self.samples)
+        return OrderedDict([('n', self.n_wakeups),
+                            ('last_ms', round(self.samples[-1] * 1000, 3)),
+                            ('mean_ms', round(sum(sorted_) / len(sorted_) * 1000, 3)),
+                            ('p99_ms', round(sorted_[int(.99 * (len(sorted_) - 1))] * 1000, 3)),
+                            ('max_ms', round(self.max_secs * 1000, 3))])
+
+
+class ScheduleAgent:
+    def __init__(self, clock=None):
+        """
+        Wakes bar-aligned work at wall-clock boundaries (multiples of the bar size
+        since the epoch, e.g. :00, :10, :20 for 10 secs bars) instead of spinning
+        until enough seconds have passed. Each wakeup's lateness against its
+        boundary is recorded in self.jitter.
+
+        Callers block in sleep_until_next_bar with a sleep function that keeps
+        their loop serving (ib.sleep) or time.sleep where there is none.
+        :param clock: utils.clock clock to read the time from, the host's if None
+        """
+        self._time = clock.time if clock is not None else time.time
+        self.jitter = JitterStats()
+
+    @staticmethod
+    def next_boundary(bar_size_secs, now=None):
+        now = time.time() if now is None else now
+        return (int(now // bar_size_secs) + 1) * bar_size_secs
+
+    def sleep_until_next_bar(self, bar_size_secs, sleep_fn=time.sleep):
+        """
+        :param sleep_fn: e.g. LiveTrading.ib.sleep so events are still served while waiting
+        :return: unix ts of the boundary woken up at
+        """
+        boundary = self.next_boundary(bar_size_secs, self._time())
+        sleep_fn(max(boundary - self._time(), 0))
+        # sleep functions may return a little early, never hand out a bar before its boundary
+        while self._time() < boundary:
+            sleep_fn(boundary - self._time())
+        self.jitter.add(self._time() - boundary)
+        return boundary
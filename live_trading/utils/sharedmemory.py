@@ -0,0 +1,180 @@
+import os
+import threading
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+
+IN_USE_IX, PEAK_IX, N_FIELDS = 0, 1, 2
+INT64_BYTES = 8
+
+
+def attach_shm(name):
+    """
+    Attaches to a segment created by another process without registering it with this
+    process' resource tracker, which would otherwise unlink it when this process exits.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+class LocalBuffer:
+    def __init__(self, size):
+        """
+        Process-local stand-in for a SharedMemory segment, for the shared structures a
+        strategy run on its own creates for itself: nothing is left in /dev/shm.
+        """
+        self.name = None
+        self.buf = memoryview(bytearray(size))
+
+    def close(self):
+        self.buf.release()
+
+    def unlink(self):
+        pass
+
+
+def create_shm(size, shared=True):
+    return shared_memory.SharedMemory(create=True, size=size) if shared else LocalBuffer(size)
+
+
+class MktDataLineCounter:
+    def __init__(self, limit, reserved=0, ctx=multiprocessing, shared=True):
+        """
+        Market data lines in use across all strategy processes, replacing the
+        'active_mkt_data_lines' entry of the Manager dict: create it before starting the
+        strategies and pass it on. Reads are plain loads from shared memory, no IPC
+        round trip; the read-modify-write of acquire/release is serialised by a lock
+        held for a handful of instructions, CPython has no atomic compare-and-swap on
+        shared memory.
+        :param limit: IB_PACING['mkt_data_lines']
+        :param reserved: lines already taken by other clients, e.g. TWS windows
+        :param ctx: multiprocessing context the strategy processes are started from
+        :param shared: False for a process-local counter, see LocalBuffer
+        """
+        self.limit = limit
+        self.reserved = reserved
+        self._shm = create_shm(N_FIELDS * INT64_BYTES, shared)
+        self._lock = ctx.Lock() if shared else threading.Lock()
+        self._owner_pid = os.getpid()
+        self._vals = self._shm.buf.cast('q')
+        self._vals[IN_USE_IX] = reserved
+        self._vals[PEAK_IX] = reserved
+
+    def __getstate__(self):
+        return {'limit': self.limit, 'reserved': self.reserved, 'name': self._shm.name, 'lock': self._lock}
+
+    def __setstate__(self, state):
+        self.limit = state['limit']
+        self.reserved = state['reserved']
+        self._lock = state['lock']
+        self._owner_pid = None
+        self._shm = attach_shm(state['name'])
+        self._vals = self._shm.buf.cast('q')
+
+    def try_acquire(self, n=1):
+        """
+        Non-blocking.
+        :return: True if n lines were free and are now taken
+        """
+        with self._lock:
+            in_use = self._vals[IN_USE_IX]
+            if in_use + n > self.limit:
+                return False
+            self._vals[IN_USE_IX] = in_use + n
+            if in_use + n > self._vals[PEAK_IX]:
+                self._vals[PEAK_IX] = in_use + n
+        return True
+
+    def release(self, n=1):
+        with self._lock:
+            if self._vals[IN_USE_IX] - n < self.reserved:
+                raise ValueError('releasing more market data lines than acquired')
+            self._vals[IN_USE_IX] -= n
+
+    def in_use(self):
+        return self._vals[IN_USE_IX]
+
+    def available(self):
+        return self.limit - self._vals[IN_USE_IX]
+
+    def peak(self):
+        return self._vals[PEAK_IX]
+
+    def close(self):
+        self._vals.release()
+        self._shm.close()
+        if self._owner_pid == os.getpid():  # forked children inherit the object, only the creator unlinks
+            self._shm.unlink()
+
+    def __del__(self):
+        # SharedMemory.__del__ cannot close the segment while our view of it is alive
+        vals = getattr(self, '_vals', None)
+        if vals is not None:
+            vals.release()
+
+
+class SeqLockArray:
+    def __init__(self, dtype, n_slots, shared=True):
+        """
+        Array of fixed-size records in shared memory with one writer per slot and any
+        number of readers in other processes, none of which ever block each other.
+
+        The first field of dtype must be the int64 'seq': the writer makes it odd
+        before and even again after touching a record, a reader retries until it
+        copied the record between two reads of the same even seq.
+        :param shared: False for a process-local array, see LocalBuffer
+        """
+        self.dtype = np.dtype(dtype)
+        if self.dtype.names[0] != 'seq':
+            raise ValueError("first field must be 'seq'")
+        self.n_slots = n_slots
+        self._shm = create_shm(max(1, self.dtype.itemsize * n_slots), shared)
+        self._owner_pid = os.getpid()
+        self.arr = np.ndarray(n_slots, dtype=self.dtype, buffer=self._shm.buf)
+        self.arr[:] = np.zeros(n_slots, dtype=self.dtype)
+
+    def __getstate__(self):
+        return {'dtype': self.dtype, 'n_slots': self.n_slots, 'name': self._shm.name}
+
+    def __setstate__(self, state):
+        self.dtype = state['dtype']
+        self.n_slots = state['n_slots']
+        self._owner_pid = None
+        self._shm = attach_shm(state['name'])
+        self.arr = np.ndarray(self.n_slots, dtype=self.dtype, buffer=self._shm.buf)
+
+    def seq(self, slot):
+        return int(self.arr['seq'][slot])
+
+    def write(self, slot, **fields):
+        seq = self.arr['seq'][slot]
+        self.arr['seq'][slot] = seq + 1
+        for k, v in fields.items():
+            self.arr[k][slot] = v
+        self.arr['seq'][slot] = seq + 2
+
+    def read(self, slot):
+        """
+        :return: consistent copy of the record, np.void
+        """
+        while True:
+            seq = self.arr['seq'][slot]
+            if seq & 1:
+                continue
+            rec = self.arr[slot].copy()
+            if self.arr['seq'][slot] == seq:
+                return rec
+
+    def close(self):
+        self.arr = None
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+
+    def __del__(self):
+        # drop the numpy export before SharedMemory.__del__ closes the segment
+        self.arr = None
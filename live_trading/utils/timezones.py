@@ -0,0 +1,87 @@
+import time
+import datetime
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = 'America/New_York'
+SECS_PER_DAY = 86400
+UNKNOWN_YEAR = 1900  # datetime.strptime of a bare time
+
+
+class UtcOffsets:
+    def __init__(self, tz=None):
+        """
+        UTC offset of a timezone by unix timestamp, looked up in a table of the day's
+        transitions that is computed once per day instead of per call.
+        :param tz: IANA name, e.g. 'Europe/Copenhagen', the host's timezone if None
+        """
+        self.tz = tz
+        self._zone = ZoneInfo(tz) if tz is not None else None
+        self._days = {}  # day since epoch: (offset at 00:00 UTC, transition ts or None, offset after it)
+
+    def _offset(self, ts):
+        if self._zone is None:
+            return time.localtime(ts).tm_gmtoff
+        return int(datetime.datetime.fromtimestamp(ts, self._zone).utcoffset().total_seconds())
+
+    def _load(self, day):
+        lo, hi = day * SECS_PER_DAY, (day + 1) * SECS_PER_DAY
+        start_offset, end_offset = self._offset(lo), self._offset(hi)
+        transition = None
+        if start_offset != end_offset:
+            # at most one change per day, bisect to the second
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if self._offset(mid) == start_offset:
+                    lo = mid
+                else:
+                    hi = mid
+            transition = hi
+        self._days[day] = start_offset, transition, end_offset
+        return self._days[day]
+
+    def at(self, ts):
+        """
+        :return: seconds east of UTC
+        """
+        day = int(ts // SECS_PER_DAY)
+        entry = self._days.get(day)
+        if entry is None:
+            entry = self._load(day)
+        start_offset, transition, end_offset = entry
+        if transition is not None and ts >= transition:
+            return end_offset
+        return start_offset
+
+    def wall_to_ts(self, dt_obj):
+        """
+        :param dt_obj: naive wall time in this timezone
+        """
+        wall = (dt_obj - datetime.datetime(1970, 1, 1)).total_seconds()
+        return wall - self.at(wall - self.at(wall))
+
+
+class ExchangeTime:
+    def __init__(self, exchange_tz=EXCHANGE_TZ, local_tz=None):
+        """
+        Converts the host's naive wall times, as returned by datetime.datetime.now(),
+        into naive wall times of the exchange, for any year and host timezone.
+        :param local_tz: IANA name of the host's timezone, read from the OS if None
+        """
+        self.exchange = UtcOffsets(exchange_tz)
+        self.local = UtcOffsets(local_tz)
+
+    def to_exchange(self, dt_obj):
+        """
+        :param dt_obj: naive local datetime, of today if the year is 1900
+        :return: naive exchange datetime
+        """
+        if not isinstance(dt_obj, datetime.datetime):
+            raise TypeError
+        ref = dt_obj
+        if dt_obj.year == UNKNOWN_YEAR:
+            ref = datetime.datetime.combine(datetime.date.today(), dt_obj.time())
+        ts = self.local.wall_to_ts(ref)
+        return dt_obj + datetime.timedelta(seconds=self.exchange.at(ts) - self.local.at(ts))
+
+
+exchange_time = ExchangeTime()  # one offset table per process
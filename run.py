@@ -7,9 +7,24 @@ from live_trading.strategies.scannerbased.instrumentselection.scanners1 import S
 from live_trading.strategies.scannerbased.instrumentselection.scanners2 import  Scanners_2
 from live_trading.strategies.scannerbased.signals.simplemovingaverage import SimpleMovingAverage
 from live_trading.utils.heartbeatmonitor import HeartbeatMonitor
+from live_trading.utils.pacinggovernor import PacingGovernor
+from live_trading.utils.sharedmemory import MktDataLineCounter
+from live_trading.utils.lineallocator import LineAllocator
+from live_trading.utils.clock import VirtualClock
+from live_trading.utils.metricsboard import MetricsBoard
+from live_trading.utils.metricsregistry import METRICS_PORT
+from live_trading.mktdatahub import HubClient, book_board, run_hub
+from live_trading.strategyhost import StrategyHost
+from live_trading.live_trading import IB_PACING, POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE
 from live_trading.utils import helpers
 from live_trading.logging_ import logging_
 
+MKT_DATA_HUB = True  # one depth subscription per symbol for all strategies, owned by a hub process
+STRATEGY_HOST = False  # all strategies in one process on one IB connection, instead of a process each
+VIRTUAL_CLOCK = False  # sleeps advance time instantly, for dummy data sessions faster than real time
+RECORD_SESSION = False  # record depth, scanner and fundamental data for replay.ReplaySession
+FAKE_TWS = False  # serve generated market data on the TWS port instead of IB, for load and latency tests
+
 def main():
     universe = 'NSDQ TotalView'
     trade_rate = OrderedDict({'trade_rate': ['INSERT YOUR SCANNERS HERE', 'scanner']})
@@ -24,9 +39,30 @@ def main():
 
     traded_instr = Manager().list()
     heartbeat_q = Queue()
-    manager_ = Manager().dict()
+    manager_ = None  # strategy state is on metrics_board
+    metrics_board = MetricsBoard(strats)
+    pacing_governor = PacingGovernor(IB_PACING)  # one set of IB pacing windows for all strategy processes
+    mkt_data_lines = MktDataLineCounter(IB_PACING['mkt_data_lines'], POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE)
+    # depth lines per strategy, granted at runtime by how many instruments each has in play
+    line_allocator = LineAllocator(IB_PACING['mkt_data_lines'], len(strats), POTENTIAL_MKT_DATA_LINES_ALREADY_IN_USE)
     procs = []
-    p = Process(target=HeartbeatMonitor, args=(manager_, heartbeat_q, strats, traded_instr))
+    if FAKE_TWS:
+        from live_trading.faketws import run_fake_tws
+        fake_tws = Process(target=run_fake_tws, daemon=True)
+        fake_tws.start()
+        time.sleep(1)  # listening before anyone connects
+    hub_clients = {client_id: None for client_id in range(len(strats))}
+    host = StrategyHost(mkt_data_lines, len(strats)) if STRATEGY_HOST else None
+    if MKT_DATA_HUB and not STRATEGY_HOST:
+        board = book_board(IB_PACING['mkt_data_lines'])
+        hub_cmd_q = Queue()
+        hub_reply_qs = {client_id: Queue() for client_id in hub_clients}
+        hub_clients = {client_id: HubClient(board, hub_cmd_q, hub_reply_qs[client_id], client_id)
+                       for client_id in hub_clients}
+        hub = Process(target=run_hub, args=(board, hub_cmd_q, hub_reply_qs, mkt_data_lines, len(strats)))
+        hub.start()
+    p = Process(target=HeartbeatMonitor, args=(manager_, heartbeat_q, strats, traded_instr),
+                kwargs={'mkt_data_lines': mkt_data_lines, 'metrics_board': metrics_board, 'metrics_port': METRICS_PORT})
     p.start()
     procs.append(p)
 
@@ -41,9 +77,25 @@ def main():
         instr_select_rules = k_v[val_tup_ix][4]
         signals = k_v[val_tup_ix][5]
         signal_rules = k_v[val_tup_ix][6]
+        if STRATEGY_HOST:
+            # depth subscriptions go through the host's shared cache
+            host.add(strat_name, k_v[val_tup_ix][0], len(strats), client_id, universe, traded_instr, heartbeat_q,
+                     manager_, bar_size_secs, order_type, instr_select, instr_select_rules, signals, signal_rules,
+                     pacing_governor=pacing_governor, mkt_data_lines=mkt_data_lines, metrics_board=metrics_board,
+                     line_allocator=line_allocator, clock=VirtualClock() if VIRTUAL_CLOCK else None,
+                     record_session=RECORD_SESSION)
+            continue
         p = Process(target=k_v[val_tup_ix][0], args=(strat_name, len(strats), client_id, universe, traded_instr,
                                                      heartbeat_q, manager_, bar_size_secs, order_type, instr_select,
-                                                     instr_select_rules, signals, signal_rules))
+                                                     instr_select_rules, signals, signal_rules),
+                    kwargs={'pacing_governor': pacing_governor, 'mkt_data_lines': mkt_data_lines,
+                            'mkt_data_hub': hub_clients[client_id], 'metrics_board': metrics_board,
+                            'line_allocator': line_allocator, 'clock': VirtualClock() if VIRTUAL_CLOCK else None,
+                            'record_session': RECORD_SESSION})
+        p.start()
+        procs.append(p)
+    if STRATEGY_HOST:
+        p = Process(target=host.run)
         p.start()
         procs.append(p)
 
@@ -62,11 +114,20 @@ def main():
             pass
         else:
             p.join()
+    if MKT_DATA_HUB and not STRATEGY_HOST:
+        hub_cmd_q.put(('stop',))
+        hub.join()
+        board.close()
+    mkt_data_lines.close()
+    line_allocator.close()
+    metrics_board.close()
 
 if __name__ == "__main__":
     # rk_logging.Logging().reader("1539042136") #run with debugger
     # rk_logging.Logging().export_csv("1536102988")
     # logging_.Logging(datetime.datetime.now(),datetime.datetime.now(),'').folder_concat_n_export_csv("1539042136")
+    # logging_.export.export_runs(["1539042136", "1544959041"], "parquet") # many runs across a process pool
+    # live_trading.replay.ReplaySession(live_trading.replay.session_path("1544959041", "market_open_trade_rate_sma_30_15")).run(...) # offline, max speed
     main()
     # conn_test()
 
@@ -0,0 +1,65 @@
+import unittest
+import os
+import tempfile
+
+from live_trading.logging_ import binarylog
+from live_trading.logging_.binarylog import BinaryLogWriter
+
+
+class BinaryLogWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'run', '1.bin')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    # commands
+    def test_put_flushed_recordsReadBackInOrder(self):
+        # arrange
+        expected_records = [[['1544959041.0', 12, 'Scanners_1,run_', -1]], [[-1, 'Scanners_1,run_', -1, i]
+                                                                             for i in range(3)]]
+
+        # act
+        w = BinaryLogWriter(self.path)
+        for record in expected_records:
+            w.put(record)
+        w.flush()
+        read_ = list(binarylog.read_records(self.path))
+        w.close()
+
+        # assert
+        self.assertEqual(read_, expected_records)
+        self.assertEqual(w.stats()['n_written'], 2)
+
+    def test_put_queueOverCeiling_dropsAndCounts(self):
+        # arrange
+        expected_payload = 'x' * 1000
+
+        # act
+        w = BinaryLogWriter(self.path, max_queued_bytes=2500, flush_secs=60)
+        accepted = [w.put(expected_payload) for _ in range(3)]
+        w.close()
+
+        # assert
+        self.assertEqual(accepted, [True, True, False])
+        self.assertEqual(w.stats()['n_dropped'], 1)
+        self.assertEqual(len(list(binarylog.read_records(self.path))), 2)
+
+    def test_read_records_truncatedTail_stopsAtLastCompleteRecord(self):
+        # arrange
+        w = BinaryLogWriter(self.path)
+        w.put('first')
+        w.put('second')
+        w.close()
+
+        # act
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        # assert
+        self.assertEqual(list(binarylog.read_records(self.path)), ['first'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+
+from live_trading.logging_ import binarylog, export, logsegment
+from live_trading.logging_.logsegment import SegmentLogWriter
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.run_id = '1544959041'
+        self.run_dir = os.path.join(self.tmp_dir.name, self.run_id)
+        os.makedirs(self.run_dir)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    # queries
+    def test_iter_chunks_segmentLongerThanChunk_chunksBoundedAndComplete(self):
+        # arrange
+        expected_n = 2500
+        self._write_segment([[[-1, 'Scanners_1,collect_hist_ticks', -1, i]] for i in range(expected_n)],
+                            ts=[1000.0 + i for i in range(expected_n)])
+
+        # act
+        chunks = list(export.iter_chunks(self.run_id, chunk_rows=1000, log_dir=self.tmp_dir.name))
+
+        # assert
+        self.assertEqual([len(c) for c in chunks], [1000, 1000, 500])
+        df = pd.concat(chunks, ignore_index=True)
+        self.assertEqual(list(df.columns), export.COLUMNS)
+        self.assertEqual(list(df['value']), [repr(i) for i in range(expected_n)])
+        self.assertEqual(set(df['meth']), {'Scanners_1,collect_hist_ticks'})
+
+    def test_iter_chunks_legacyFiles_sameColumnsAsSegments(self):
+        # arrange
+        with open(os.path.join(self.run_dir, '1544959042'), 'wb') as p:
+            pickle.dump([['1544959042.0', 120, 'LiveTrading,buy', -1], [-1, 'LiveTrading,buy', -1, 'GOOG']], p)
+        w = binarylog.BinaryLogWriter(os.path.join(self.run_dir, '100' + binarylog.SEGMENT_EXT))
+        w.put([[-1, 'LiveTrading,sell', -1, 3]])
+        w.close()
+
+        # act
+        chunks = list(export.iter_chunks(self.run_id, chunk_rows=2, log_dir=self.tmp_dir.name))
+
+        # assert
+        df = pd.concat(chunks, ignore_index=True)
+        self.assertEqual([len(c) for c in chunks], [2, 1])
+        self.assertEqual(list(df['kind']), [logsegment.KIND_VALUE, logsegment.KIND_TIMING, logsegment.KIND_VALUE])
+        self.assertEqual(list(df['dur_us']), [logsegment.NO_DURATION, 120, logsegment.NO_DURATION])
+        self.assertEqual(list(df['value'].fillna('')), ['3', '', repr('GOOG')])
+
+    # commands
+    def test_export_csv_severalChunks_oneHeaderAllRows(self):
+        # arrange
+        self._write_segment([[[-1, 'A,a', -1, i]] for i in range(25)], ts=[float(i) for i in range(25)])
+        out_path = os.path.join(self.tmp_dir.name, 'out.csv')
+
+        # act
+        n_rows = export.export_csv(self.run_id, out_path, chunk_rows=10, log_dir=self.tmp_dir.name)
+
+        # assert
+        df = pd.read_csv(out_path)
+        self.assertEqual(n_rows, 25)
+        self.assertEqual(list(df['value']), list(range(25)))
+
+    @unittest.skipUnless(pyarrow, 'pyarrow not installed')
+    def test_export_run_parquet_onePartPerChunk(self):
+        # arrange
+        self._write_segment([[[-1, 'A,a', -1, i]] for i in range(25)], ts=[float(i) for i in range(25)])
+        out_dir = os.path.join(self.tmp_dir.name, 'parquet')
+
+        # act
+        n_rows = export.export_run(self.run_id, out_dir, chunk_rows=10, log_dir=self.tmp_dir.name)
+
+        # assert
+        part_dir = os.path.join(out_dir, 'run_id=' + self.run_id)
+        self.assertEqual(n_rows, 25)
+        self.assertEqual(sorted(os.listdir(part_dir)), ['part-00000.parquet', 'part-00001.parquet',
+                                                        'part-00002.parquet'])
+        self.assertEqual(len(pd.read_parquet(part_dir)), 25)
+
+    # helpers
+    def _write_segment(self, records, ts):
+        w = SegmentLogWriter(os.path.join(self.run_dir, '100' + logsegment.RECORDS_EXT), clock=iter(ts).__next__)
+        for record in records:
+            w.put(record)
+        w.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
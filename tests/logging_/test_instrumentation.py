@@ -0,0 +1,53 @@
+import unittest
+
+from live_trading.logging_ import instrumentation
+from live_trading.logging_.instrumentation import LatencyHistogram, timed
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.histograms.clear()
+
+    # queries
+    def test_timed_disabled_returnsFunctionUnchanged(self):
+        # arrange
+        def expected_meth(x):
+            return x
+
+        # assert
+        self.assertIs(timed(expected_meth, enabled=False), expected_meth)
+
+    def test_percentile_ns_knownSamples_returnsBucketUpperBound(self):
+        # arrange
+        expected_samples = [1000] * 99 + [1000000]
+
+        # act
+        hist = LatencyHistogram()
+        for ns in expected_samples:
+            hist.record(ns)
+
+        # assert
+        self.assertEqual(hist.percentile_ns(50), 1024)
+        self.assertEqual(hist.percentile_ns(100), 1000000)
+        self.assertEqual(hist.report()['n'], 100)
+
+    # commands
+    def test_timed_enabled_recordsPerMethodAndCurrMeth(self):
+        # arrange
+        class expected_cls:
+            def meth(self, x):
+                return instrumentation.curr_meth(), x
+
+        # act
+        expected_cls.meth = timed(expected_cls.meth, enabled=True)
+        results = [expected_cls().meth(i) for i in range(3)]
+        report = instrumentation.report()
+
+        # assert
+        name = 'InstrumentationTestCase,test_timed_enabled_recordsPerMethodAndCurrMeth,<locals>,expected_cls,meth'
+        self.assertEqual(results[-1], (name, 2))
+        self.assertEqual(report[name]['n'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
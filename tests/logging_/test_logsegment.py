@@ -0,0 +1,88 @@
+import unittest
+import os
+import tempfile
+
+from live_trading.logging_ import logsegment
+from live_trading.logging_.logsegment import SegmentLogWriter, LogSegment, LogRun
+
+
+class LogSegmentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.stem = os.path.join(self.tmp_dir.name, '1544959041', '100')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    # queries
+    def test_time_range_acrossIndexStrides_returnsExactlyTheRange(self):
+        # arrange
+        expected_n = 5000
+
+        # act
+        self._write([[[-1, 'Scanners_1,collect_hist_ticks', -1, i]] for i in range(expected_n)],
+                    ts=[1000.0 + i for i in range(expected_n)])
+        seg = LogSegment(self.stem)
+        records = seg.time_range(1000.0 + 2047, 1000.0 + 3100)
+
+        # assert
+        self.assertEqual(len(seg.index), 5)
+        self.assertEqual(len(records), 3100 - 2047)
+        self.assertEqual(seg.value(records[0]), 2047)
+        self.assertEqual(seg.value(records[-1]), 3099)
+
+    def test_by_meth_mixedMethods_returnsOnlyThatMethod(self):
+        # arrange
+        expected_records = [[['1544959041.0', 120, 'LiveTrading,buy', -1]],
+                            [[-1, 'LiveTrading,buy', -1, ['GOOG', 10]]],
+                            [[-1, 'SimpleMovingAverage,__ma_calc', -1, 1.5]]]
+
+        # act
+        self._write(expected_records, ts=[1.0, 2.0, 3.0])
+        seg = LogSegment(self.stem)
+        buys = seg.by_meth('LiveTrading,buy')
+        df = seg.to_frame(buys)
+
+        # assert
+        self.assertEqual(list(df['kind']), [logsegment.KIND_TIMING, logsegment.KIND_VALUE])
+        self.assertEqual(list(df['dur_us']), [120, logsegment.NO_DURATION])
+        self.assertEqual(df['value'].iloc[1], ['GOOG', 10])
+        self.assertEqual(len(seg.by_meth('NotLogged,meth')), 0)
+
+    def test_init_tornPayloadTail_dropsRecordsPointingPastIt(self):
+        # arrange
+        self._write([[[-1, 'LiveTrading,buy', -1, 'x' * 100]] for _ in range(3)], ts=[1.0, 2.0, 3.0])
+        payload_path = self.stem + logsegment.PAYLOAD_EXT
+
+        # act
+        with open(payload_path, 'r+b') as f:
+            f.truncate(os.path.getsize(payload_path) - 1)
+        seg = LogSegment(self.stem)
+
+        # assert
+        self.assertEqual(len(seg), 2)
+
+    def test_to_frame_runWithTwoSegments_mergedInTimeOrder(self):
+        # arrange
+        other_stem = os.path.join(self.tmp_dir.name, '1544959041', '200')
+
+        # act
+        self._write([[[-1, 'A,a', -1, 'first']], [[-1, 'A,a', -1, 'third']]], ts=[1.0, 3.0])
+        self._write([[[-1, 'B,b', -1, 'second']]], ts=[2.0], stem=other_stem)
+        df = LogRun('1544959041', log_dir=self.tmp_dir.name).to_frame()
+
+        # assert
+        self.assertEqual(list(df['value']), ['first', 'second', 'third'])
+        self.assertEqual(list(df['segment']), ['100', '200', '100'])
+
+    # helpers
+    def _write(self, records, ts, stem=None):
+        w = SegmentLogWriter((self.stem if stem is None else stem) + logsegment.RECORDS_EXT,
+                             clock=iter(ts).__next__)
+        for record in records:
+            w.put(record)
+        w.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
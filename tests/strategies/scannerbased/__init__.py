@@ -0,0 +1,10 @@
+import sys
+import types
+
+try:
+    import live_trading.reporting
+except ImportError:
+    # reporting is not in every checkout, the scannerbased modules only need it importable
+    _reporting = types.ModuleType('live_trading.reporting')
+    _reporting.Reporting = type('Reporting', (), {'__init__': lambda self, *args, **kwargs: None})
+    sys.modules['live_trading.reporting'] = _reporting
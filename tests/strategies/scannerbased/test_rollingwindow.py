@@ -0,0 +1,60 @@
+import unittest
+import math
+import random
+
+from live_trading.strategies.scannerbased.signals.rollingwindow import RollingMean, MovingAverageEngine
+
+
+class RollingMeanTestCase(unittest.TestCase):
+    # queries
+    def test_value_manyPushes_equalsMeanOfLastPeriods(self):
+        # arrange
+        expected_periods = 15
+        random.seed(1)
+        expected_prices = [random.uniform(10.0, 500.0) for _ in range(1000)]
+
+        # act
+        rm = RollingMean(expected_periods)
+        for p in expected_prices:
+            rm.push(p)
+
+        # assert
+        self.assertAlmostEqual(rm.value, sum(expected_prices[-expected_periods:]) / expected_periods, places=9)
+
+
+class MovingAverageEngineTestCase(unittest.TestCase):
+    # queries
+    def test_latest_longWindowNotFilled_returnsNan(self):
+        # act
+        engine = MovingAverageEngine(short_periods=2, long_periods=3)
+        engine.update('GOOG', 1, 0, 1, 10.0)
+        engine.update('GOOG', 1, 0, 2, 11.0)
+        long_ma, short_ma = engine.latest('GOOG', 1, 0)
+
+        # assert
+        self.assertTrue(math.isnan(long_ma) and math.isnan(short_ma))
+
+    def test_latest_keyedBySymbolSideRank_returnsLongShort(self):
+        # act
+        engine = MovingAverageEngine(short_periods=2, long_periods=3)
+        for unix_ts, price in enumerate([10.0, 11.0, 12.0, 13.0]):
+            engine.update('GOOG', 1, 0, unix_ts, price)
+            engine.update('GOOG', 0, 0, unix_ts, 2 * price)
+
+        # assert
+        self.assertEqual(engine.latest('GOOG', 1, 0), (12.0, 12.5))
+        self.assertEqual(engine.latest('GOOG', 0, 0), (24.0, 25.0))
+        self.assertTrue(math.isnan(engine.latest('AAPL', 1, 0)[0]))
+
+    def test_history_moreUpdatesThanHistoryLen_isBounded(self):
+        # act
+        engine = MovingAverageEngine(short_periods=1, long_periods=1, history_len=5)
+        for unix_ts in range(20):
+            engine.update('GOOG', 1, 0, unix_ts, float(unix_ts))
+
+        # assert
+        self.assertEqual([h[0] for h in engine.history('GOOG', 1, 0)], [15, 16, 17, 18, 19])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,335 @@
+import time
+import random
+import asyncio
+import unittest
+import datetime
+import tempfile
+from collections import OrderedDict
+from eventkit import Event
+from ib_insync import util
+
+from live_trading.logging_ import binarylog, logsegment
+from live_trading.strategies.scannerbased.instrumentselection.scanners1 import Scanners_1
+from live_trading.strategies.scannerbased.riskmanagement.riskmanagement import RiskManagement
+from live_trading.strategies.scannerbased.signals.simplemovingaverage import SimpleMovingAverage
+from live_trading.utils.clock import RealClock
+from live_trading.utils.helpers import Lines_
+from live_trading.utils.scheduleadgent.scheduleagent import ScheduleAgent
+
+RUNTIME_TM = datetime.datetime(2021, 3, 15, 9, 30)
+
+
+class Scanners1TestCase(unittest.TestCase):
+    def setUp(self):
+        # match_f logs its matches
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_dir, binarylog.LOG_DIR = binarylog.LOG_DIR, self.tmp.name
+
+    def tearDown(self):
+        logsegment.close_writer(int(time.mktime(RUNTIME_TM.timetuple())))
+        binarylog.LOG_DIR = self.log_dir
+        self.tmp.cleanup()
+
+    # queries
+    def test_relevance_discarding_notFirstIter_keepsOnlyThoseInEveryScan(self):
+        # arrange
+        expected_n_iters = 2
+        # consecutive discards, each used to let the next symbol through
+        factors = OrderedDict([('trade_rate', [['AMZN'], ['TSLA'], ['GOOG'],
+                                               ['AAPL'], ['MSFT'], ['GOOG']])])
+
+        # act
+        selection = Scanners_1._relevance_discarding(factors, expected_n_iters, datetime.datetime.now())
+
+        # assert
+        self.assertEqual(selection, OrderedDict([(0, ['GOOG', 'GOOG'])]))
+
+    def test_relevance_discarding_firstIter_keepsAllInOrder(self):
+        # arrange
+        factors = OrderedDict([('trade_rate', [['AMZN'], ['GOOG']]), ('chg', [['GOOG'], ['AAPL']])])
+
+        # act
+        selection = Scanners_1._relevance_discarding(factors, 2, datetime.datetime.now(), _first_iter=True)
+
+        # assert
+        self.assertEqual(selection, OrderedDict([(0, ['AMZN', 'GOOG']), (1, ['GOOG', 'AAPL'])]))
+
+    def test_relevance_discarding_firstIter_sameAsFlatCountImplementation(self):
+        # arrange
+        factors = self._random_factors(random.Random(0))
+
+        # act
+        old = self._flat_count_relevance_discarding(factors, 5, _first_iter=True)
+        new = Scanners_1._relevance_discarding(factors, 5, datetime.datetime.now(), _first_iter=True)
+
+        # assert
+        self.assertEqual(new, old)
+
+    def test_relevance_discarding_notFirstIter_flatCountImplementationWithoutItsLeftovers(self):
+        # arrange
+        expected_n_iters = 5
+        rng = random.Random(0)
+
+        for _ in range(50):
+            factors = self._random_factors(rng)
+
+            # act
+            old = self._flat_count_relevance_discarding(factors, expected_n_iters)
+            new = Scanners_1._relevance_discarding(factors, expected_n_iters, datetime.datetime.now())
+
+            # assert
+            # the old one deleted while enumerating, the entry after each discarded one was left over
+            for ix, scans in enumerate(factors.values()):
+                flat = [j for k in scans for j in k]
+                self.assertEqual(new[ix], [j for j in old[ix] if flat.count(j) >= expected_n_iters])
+
+    def test_match_f_inEveryScanOfAllFactors_onceEachInOrderOfAppearance(self):
+        # arrange
+        sc = self._scanners_1(['trade_rate', 'chg'])
+        positive_instr = OrderedDict([('trade_rate', [['NVDA'], ['GOOG'], ['AMZN'], ['GOOG'], ['NVDA'], ['AMZN']]),
+                                      ('chg', [['AMZN'], ['NVDA'], ['TSLA'], ['NVDA'], ['AMZN'], ['GOOG']])])
+
+        # act
+        matches = sc.match_f(positive_instr, OrderedDict(), 2)
+
+        # assert
+        self.assertEqual(matches, ['NVDA', 'AMZN'])
+
+    # commands
+    def test_run_event_driven_updateAndOrderStatusEvents_flowsRunOutsideCallbacks(self):
+        # arrange
+        loop = self._event_loop()
+        flows = []
+        sc = self._event_driven_scanners_1(flows, n_bars=3)
+        trade = self._trade('AAPL')
+
+        # act
+        loop.call_later(.02, lambda: sc._event_tickers['GOOG'].updateEvent.emit(sc._event_tickers['GOOG']))
+        loop.call_later(.04, lambda: sc.strat.lt.ib.orderStatusEvent.emit(trade))
+        sc.run_event_driven(['GOOG', 'AAPL'])
+
+        # assert
+        self.assertEqual(flows, ['GOOG', 'AAPL'])
+        self.assertEqual(sc.strat.concluded, True)
+        self.assertEqual(len(sc.strat.lt.ib.orderStatusEvent), 0)
+
+    def test_on_ticker_update_rotatedOutBeforeBarLoopRan_flowSkipped(self):
+        # arrange
+        self._event_loop()
+        flows = []
+        sc = self._event_driven_scanners_1(flows, n_bars=1)
+        sc._event_tickers = OrderedDict()
+        sc._book_seen_tm = {}
+        sc._queued_flows = OrderedDict()
+        for symbol in ('GOOG', 'AAPL'):
+            sc._subscribe_events(symbol)
+
+        # act
+        for ticker in list(sc._event_tickers.values()):
+            ticker.updateEvent.emit(ticker)
+        queued = list(sc._queued_flows)
+        del sc._event_tickers['GOOG']
+        sc._sleep_running_flows(0)
+
+        # assert
+        self.assertEqual((queued, flows), (['GOOG', 'AAPL'], ['AAPL']))
+
+    def test_fit_to_granted_lines_fewerGranted_releasedSymbolsMasDropped(self):
+        # arrange
+        released = []
+        sc = self._rotating_scanners_1(released, granted=1)
+        for symbol in ('GOOG', 'AAPL'):
+            for bar in range(3):
+                sc.signals.on_tick(symbol, 1000 + bar, 1, 0, 10. + bar, 100)
+
+        # act
+        in_play = sc._fit_to_granted_lines(['GOOG', 'AAPL'])
+
+        # assert
+        self.assertEqual((in_play, released), (['GOOG'], ['AAPL']))
+        self.assertEqual(len(sc.signals.ma_engine.history('GOOG', 1, 0)), 1)
+        self.assertEqual(sc.signals.ma_engine.history('AAPL', 1, 0), [])
+        self.assertEqual(sc._Scanners_1__winners, ['AAPL'])
+
+    # helpers
+    def _event_loop(self):
+        # the one current before is put back, a closed loop left installed breaks the later tests
+        previous = asyncio.get_event_loop_policy().get_event_loop()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, previous)
+        self.addCleanup(loop.close)
+        return loop
+
+    @staticmethod
+    def _rotating_scanners_1(released, granted):
+        class MktDptPool:
+            @staticmethod
+            def release(symbol):
+                released.append(symbol)
+
+        class Heartbeat:
+            def publish(self, key, value):
+                pass
+
+        class Lt:
+            mkt_dpt_pool = MktDptPool()
+            heartbeat = Heartbeat()
+            traded_instr = ['GOOG', 'AAPL']
+
+        class Strat:
+            lt = Lt()
+            runtime_tm = RUNTIME_TM
+
+            @staticmethod
+            def request_lines(n):
+                return granted
+
+        sc = Scanners_1.__new__(Scanners_1)  # __init__ starts scanning
+        sc.strat = Strat()
+        sc.signals = SimpleMovingAverage(sc.strat, 3, 2)
+        sc._Scanners_1__winners = []
+        sc._check_tradeability_of_instr = lambda instrs: instrs
+        return sc
+
+    @staticmethod
+    def _event_driven_scanners_1(flows, n_bars):
+        """
+        :param flows: symbols update_trade_flow ran for, which sleeps like its funds retry
+        :param n_bars: bars until _check_if_done ends run_event_driven
+        """
+        class Ticker:
+            def __init__(self, contract):
+                self.contract = contract
+                self.domBids = [Lines_(10.1, 100)]
+                self.domAsks = [Lines_(10.2, 200)]
+                self.updateEvent = Event('updateEvent')
+
+        class MktDptPool:
+            @staticmethod
+            def ticker(contract_):
+                return Ticker(contract_), 0
+
+            @staticmethod
+            def symbols():
+                return []
+
+        class Heartbeat:
+            def publish(self, key, value):
+                pass
+
+        class Registry:
+            def snapshot(self):
+                return {}
+
+        class Ib:
+            orderStatusEvent = Event('orderStatusEvent')
+
+        class Lt:
+            # ib_insync's util.sleep runs the loop like ib.sleep, which fails from inside its callbacks
+            clock = RealClock(sleep_fn=util.sleep)
+            sched = ScheduleAgent(clock=clock)
+            ib = Ib()
+            mkt_dpt_pool = MktDptPool()
+            heartbeat = Heartbeat()
+            registry = Registry()
+            traded_instr = ['GOOG', 'AAPL']
+
+            @staticmethod
+            def _ticker_len_n_type_check(bid_or_ask_li):
+                return len(bid_or_ask_li)
+
+        class Exc:
+            def handle_(self, e, raise_errors):
+                pass
+
+        class Debugging:
+            raise_errors = False
+
+        class Strat:
+            lt = Lt()
+            exc = Exc()
+            debugging = Debugging()
+            bar_size_secs = .1
+            iteration_timeout_secs = 60
+            parallel_traded_instr_per_strat = 2
+            concluded = False
+            n_done_checks = 0
+
+            def _init_trade_cnt(self, traded_instr):
+                pass
+
+            def request_lines(self, n):
+                return n
+
+            def update_trade_flow(self, ticker):
+                flows.append(ticker.contract.symbol)
+                self.lt.clock.sleep(.01)
+
+            def _check_if_done(self):
+                self.n_done_checks += 1
+                if self.n_done_checks >= n_bars:
+                    raise Exception('done')
+
+            def conclude_results(self):
+                self.concluded = True
+
+        sc = Scanners_1.__new__(Scanners_1)  # __init__ starts scanning
+        sc.strat = Strat()
+        sc._Scanners_1__winners = []
+        sc.collect_hist_ticks = lambda ticker, unix_ts: None
+        sc._check_tradeability_of_instr = lambda instrs: instrs
+        return sc
+
+    @staticmethod
+    def _trade(symbol):
+        class expected_contract: pass
+        expected_contract.symbol = symbol
+
+        class expected_trade: pass
+        expected_trade.contract = expected_contract
+        return expected_trade
+
+    @staticmethod
+    def _flat_count_relevance_discarding(factors, _n_iters, _first_iter=False):
+        # Scanners_1._relevance_discarding before it counted with Counter
+        selection_dict = OrderedDict()
+        for ix, i in enumerate(factors.values()):
+            flat = [j for k in i for j in k]
+            n = []
+            for f in flat:
+                n.append([f, flat.count(f)])
+            if not _first_iter:
+                for cix, c in enumerate(n):
+                    if c[1] < _n_iters:
+                        del n[cix]
+            fittest = [r[0] for r in n]
+            selection_dict[ix] = fittest
+        return selection_dict
+
+    @staticmethod
+    def _random_factors(rng):
+        # 10 scans of 8 rows per factor out of 20 symbols, like find_winners concatenates them
+        universe = ['S{:02d}'.format(i) for i in range(20)]
+        return OrderedDict((f, [[s] for _ in range(10) for s in rng.sample(universe, 8)])
+                           for f in ('trade_rate', 'chg'))
+
+    @staticmethod
+    def _scanners_1(positive_factors):
+        class ConsDisp:
+            def print_warning(self, val):
+                pass
+
+        class Strat:
+            runtime_tm = RUNTIME_TM
+
+        sc = Scanners_1.__new__(Scanners_1)  # __init__ starts scanning
+        sc.strat = Strat()
+        sc.strat.rm = RiskManagement(sc.strat)
+        sc.positive_factors = OrderedDict((f, ['', 'scanner']) for f in positive_factors)
+        sc.cons_disp = ConsDisp()
+        return sc
+
+
+if __name__ == '__main__':
+    unittest.main()
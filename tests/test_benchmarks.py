@@ -0,0 +1,92 @@
+import os
+import unittest
+import tempfile
+from collections import OrderedDict
+
+from benchmarks import harness
+from benchmarks.__main__ import main
+
+
+class HarnessTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        for name in ('test.noop', 'test.missing'):
+            harness.benchmarks.pop(name, None)
+
+    # queries
+    def test_compare_slowerBeyondThreshold_flaggedRegression(self):
+        # arrange
+        baseline = self._report(a=1., b=1., c=1.)
+        current = self._report(a=1.05, b=1.5, c=.5, d=1.)
+
+        # act
+        statuses = {row[0]: row[-1] for row in harness.compare(baseline, current, threshold=.1)}
+
+        # assert
+        self.assertEqual(statuses, {'a': 'ok', 'b': 'regression', 'c': 'improvement', 'd': 'new'})
+
+    def test_compare_skippedCase_notCompared(self):
+        # arrange
+        baseline = self._report(a=1.)
+        current = self._report(a=None)
+
+        # act
+        rows = harness.compare(baseline, current)
+
+        # assert
+        self.assertEqual(rows, [['a', None, None, None, 'skipped']])
+
+    # commands
+    def test_run_importErrorInSetUp_recordedSkipped(self):
+        # arrange
+        @harness.benchmark('test.noop')
+        def noop(n_symbols, session_mins):
+            return (lambda: print('not in the report')), n_symbols * session_mins
+
+        @harness.benchmark('test.missing')
+        def missing(n_symbols, session_mins):
+            import live_trading.not_installed
+
+        # act
+        report = harness.run(['test.noop', 'test.missing'], symbols=(2,), session_mins=(3,), repeat=2)
+
+        # assert
+        self.assertEqual(report['results']['test.noop[symbols=2,session_mins=3]']['n_ops'], 6)
+        self.assertIn('skipped', report['results']['test.missing[symbols=2,session_mins=3]'])
+
+    def test_run_strategyBenchmarks_notSkipped(self):
+        # act
+        report = harness.run(['Scanners_1._relevance_discarding', 'FinRatios.mkt_cap'], symbols=(2,),
+                             session_mins=(2,), repeat=1)
+
+        # assert
+        self.assertEqual([case.get('skipped') for case in report['results'].values()], [None, None])
+
+    def test_main_compareRegressed_exitsNonZero(self):
+        # arrange
+        baseline_path = harness.save(self._report(a=1.), os.path.join(self.tmp.name, 'baseline.json'))
+        ok_path = harness.save(self._report(a=1.), os.path.join(self.tmp.name, 'ok.json'))
+        slow_path = harness.save(self._report(a=2.), os.path.join(self.tmp.name, 'slow.json'))
+
+        # act
+        exit_ok = main(['compare', ok_path, '--baseline', baseline_path])
+        exit_slow = main(['compare', slow_path, '--baseline', baseline_path])
+
+        # assert
+        self.assertEqual((exit_ok, exit_slow), (0, 1))
+
+    # helpers
+    @staticmethod
+    def _report(**min_secs):
+        results = OrderedDict()
+        for key, secs in min_secs.items():
+            results[key] = OrderedDict([('skipped', 'reason')]) if secs is None else \
+                OrderedDict([('n_ops', 1), ('min_secs', secs), ('median_secs', secs), ('us_per_op', secs * 1e6)])
+        return OrderedDict([('meta', OrderedDict([('created', '2021-03-15T09:30:00')])), ('results', results)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import time
+import xmltodict
+from ib_insync import IB, LimitOrder, MarketOrder, ScannerSubscription, Stock
+
+from live_trading import faketws
+from live_trading.faketws import FakeTws, RandomWalkData
+
+
+class FakeTwsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tws = FakeTws(RandomWalkData(seed=7), port=0, depth_update_secs=.05, max_mkt_depth_reqs=2,
+                           hist_pacing=(2, 600))
+        self.tws.start_thread()
+        self.ib = IB()
+        self.ib.connect(faketws.FAKE_TWS_HOST, self.tws.port, clientId=3, timeout=5)
+        self.errors = []
+        self.ib.errorEvent += lambda req_id, code, msg, contract: self.errors.append(code)
+
+    def tearDown(self):
+        self.ib.disconnect()
+        self.tws.stop()
+
+    # queries
+    def test_connect_unchangedClient_accountValuesServed(self):
+        # act
+        tags = {v.tag for v in self.ib.accountValues()}
+
+        # assert
+        self.assertTrue(self.ib.isConnected())
+        self.assertIn('NetLiquidation', tags)
+
+    def test_reqScannerData_nRows_rankedSymbols(self):
+        # arrange
+        expected_n_rows = 4
+
+        # act
+        scan = self.ib.reqScannerData(ScannerSubscription(instrument='STK', locationCode='STK.US.MAJOR',
+                                                          scanCode='TOP_PERC_GAIN', numberOfRows=expected_n_rows))
+
+        # assert
+        self.assertEqual([s.rank for s in scan], list(range(expected_n_rows)))
+        self.assertTrue(all(s.contractDetails.contract.symbol in faketws.DEFAULT_SYMBOLS for s in scan))
+
+    def test_reqFundamentalData_reports_parseLikeMktCap(self):
+        # arrange
+        contract = Stock('GOOG', 'ISLAND', 'USD')
+
+        # act
+        snapshot = xmltodict.parse(self.ib.reqFundamentalData(contract, 'ReportSnapshot'))
+        fin_stat = xmltodict.parse(self.ib.reqFundamentalData(contract, 'ReportsFinStatements'))['ReportFinancialStatements']
+
+        # assert
+        self.assertGreater(float(snapshot['ReportSnapshot']['Ratios']['Group'][0]['Ratio'][0]['#text']), 0)
+        coa = fin_stat['FinancialStatements']['COAMap']['mapItem']
+        line_items = fin_stat['FinancialStatements']['AnnualPeriods']['FiscalPeriod'][0]['Statement'][1]['lineItem']
+        where = [m['@coaItem'] for m in coa if m['#text'] == 'Total Common Shares Outstanding'][0]
+        self.assertEqual(len([l for l in line_items if l['@coaCode'] == where]), 1)
+
+    def test_reqHistoricalData_beyondPacing_error162(self):
+        # arrange
+        contract = Stock('AAPL', 'SMART', 'USD')
+
+        # act
+        bars = [self.ib.reqHistoricalData(contract, '', '1800 S', '1 min', 'TRADES', True) for _ in range(3)]
+
+        # assert
+        self.assertEqual([len(b) for b in bars], [30, 30, 0])
+        self.assertEqual(self.errors, [faketws.ERR_HIST_PACING])
+
+    def test_reqCurrentTime_latency_answerDelayed(self):
+        # arrange
+        expected_latency_secs = .2
+        self.tws.latency_secs = expected_latency_secs
+
+        # act
+        t0 = time.perf_counter()
+        self.ib.reqCurrentTime()
+        round_trip_secs = time.perf_counter() - t0
+
+        # assert
+        self.assertGreaterEqual(round_trip_secs, expected_latency_secs)
+
+    # commands
+    def test_reqMktDepth_subscribed_bookStreamed(self):
+        # arrange
+        updates = []
+
+        # act
+        ticker = self.ib.reqMktDepth(Stock('AAPL', 'ISLAND', 'USD'), numRows=5)
+        ticker.updateEvent += updates.append
+        self.ib.sleep(.3)
+
+        # assert
+        self.assertEqual((len(ticker.domBids), len(ticker.domAsks)), (faketws.DEPTH_ROWS, faketws.DEPTH_ROWS))
+        self.assertLess(ticker.domBids[0].price, ticker.domAsks[0].price)
+        self.assertGreater(len(updates), 1)
+
+    def test_reqMktDepth_beyondMaxReqs_error309(self):
+        # act
+        for symbol in ('AAPL', 'AMZN', 'GOOG'):
+            self.ib.reqMktDepth(Stock(symbol, 'ISLAND', 'USD'))
+        self.ib.sleep(.2)
+
+        # assert
+        self.assertEqual(self.errors, [faketws.ERR_MAX_MKT_DEPTH])
+
+    def test_placeOrder_market_filledAtTopOfBook(self):
+        # act
+        trade = self.ib.placeOrder(Stock('MSFT', 'ISLAND', 'USD'), MarketOrder('BUY', 100))
+        self.ib.sleep(.2)
+
+        # assert
+        self.assertEqual(trade.orderStatus.status, 'Filled')
+        self.assertEqual(trade.orderStatus.filled, 100)
+        self.assertGreater(trade.orderStatus.avgFillPrice, 0)
+
+    def test_placeOrder_injectedError_orderRejected(self):
+        # arrange
+        self.tws.inject_error(faketws.PLACE_ORDER, 201, 'Order rejected - reason:injected')
+
+        # act
+        trade = self.ib.placeOrder(Stock('MSFT', 'ISLAND', 'USD'), LimitOrder('BUY', 100, 10.))
+        self.ib.sleep(.2)
+
+        # assert
+        self.assertEqual(self.errors, [201])
+        self.assertEqual(trade.orderStatus.status, 'Cancelled')
+
+
+if __name__ == '__main__':
+    unittest.main()
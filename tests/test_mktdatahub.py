@@ -0,0 +1,179 @@
+import unittest
+import asyncio
+import queue
+from eventkit import Event
+from ib_insync import IB, Stock
+
+from live_trading import faketws
+from live_trading.faketws import FakeTws, RandomWalkData
+from live_trading.mktdatahub import MktDataHub, HubClient, book_board
+from live_trading.utils.helpers import Lines_
+from live_trading.utils.sharedmemory import MktDataLineCounter
+
+
+class MktDataHubTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.board = book_board(4)
+        self.lines = MktDataLineCounter(100, 6)
+        self.cmd_q = queue.Queue()
+        self.reply_qs = {0: queue.Queue(), 1: queue.Queue()}
+        self.ib = self._ib()
+        self.hub = MktDataHub(self.board, self.cmd_q, self.reply_qs, self.lines, 2, ib=self.ib, confirm_secs=0)
+
+    def tearDown(self):
+        self.loop.close()
+        self.board.close()
+        self.lines.close()
+
+    # queries
+    def test_subscribe_twoClientsSameSymbol_requestsOnceAndTakesOneLine(self):
+        # arrange
+        expected_contract = self._contract('GOOG')
+
+        # act
+        first, first_status = self._client(0).subscribe(expected_contract, sleep_fn=self._serve)
+        second, second_status = self._client(1).subscribe(expected_contract, sleep_fn=self._serve)
+
+        # assert
+        self.assertEqual((first_status, second_status), (0, 0))
+        self.assertEqual(first.slot, second.slot)
+        self.assertEqual(len(self.ib.requested), 1)
+        self.assertEqual(self.lines.in_use(), 7)
+        self.assertEqual(self.hub.n_refs('GOOG'), 2)
+
+    def test_poll_bookUpdated_clientSeesBookAndEmits(self):
+        # arrange
+        expected_contract = self._contract('GOOG')
+        updates = []
+
+        # act
+        client = self._client(0)
+        ticker, _ = client.subscribe(expected_contract, sleep_fn=self._serve)
+        ticker.updateEvent += updates.append
+        client.poll()
+        no_book_yet = len(updates)
+        hub_ticker = self.ib.tickers['GOOG']
+        hub_ticker.domBids = [Lines_(10.1, 100), Lines_(10.0, 300)]
+        hub_ticker.domAsks = [Lines_(10.2, 200)]
+        hub_ticker.updateEvent.emit(hub_ticker)
+        client.poll()
+
+        # assert
+        self.assertEqual(no_book_yet, 0)
+        self.assertEqual(updates, [ticker])
+        self.assertEqual([(l.price, l.size) for l in ticker.domBids], [(10.1, 100), (10.0, 300)])
+        self.assertEqual([(l.price, l.size) for l in ticker.domAsks], [(10.2, 200)])
+
+    # commands
+    def test_unsubscribe_lastReference_cancelsAndReleasesLine(self):
+        # arrange
+        expected_contract = self._contract('GOOG')
+
+        # act
+        clients = [self._client(0), self._client(1)]
+        for client in clients:
+            client.subscribe(expected_contract, sleep_fn=self._serve)
+        clients[0].unsubscribe('GOOG')
+        self._serve()
+        cancelled_after_first = list(self.ib.cancelled)
+        clients[1].unsubscribe('GOOG')
+        self._serve()
+
+        # assert
+        self.assertEqual(cancelled_after_first, [])
+        self.assertEqual(self.ib.cancelled, ['GOOG'])
+        self.assertEqual(self.lines.in_use(), 6)
+        self.assertEqual(len(self.hub.free_slots), 4)
+
+    def test_subscribe_boardFull_refused(self):
+        # act
+        client = self._client(0)
+        statuses = [client.subscribe(self._contract(s), sleep_fn=self._serve)[1]
+                    for s in ['GOOG', 'AAPL', 'FB', 'AMZN', 'TSLA']]
+
+        # assert
+        self.assertEqual(statuses, [0, 0, 0, 0, 1])
+        self.assertEqual(self.lines.in_use(), 10)
+
+    # helpers
+    def _serve(self, *_):
+        self.hub.handle_cmds()
+
+    def _client(self, client_id):
+        return HubClient(self.board, self.cmd_q, self.reply_qs[client_id], client_id, self.loop)
+
+    @staticmethod
+    def _contract(symbol):
+        class expected_contract: pass
+        expected_contract.symbol = symbol
+        return expected_contract
+
+    @staticmethod
+    def _ib():
+        class expected_ticker:
+            def __init__(self, contract):
+                self.contract = contract
+                self.domBids = []
+                self.domAsks = []
+                self.updateEvent = Event('updateEvent')
+
+        class expected_ib:
+            requested = []
+            cancelled = []
+            tickers = {}
+            errorEvent = Event('errorEvent')
+
+            @classmethod
+            def reqMktDepth(cls, contract):
+                cls.requested.append(contract.symbol)
+                cls.tickers[contract.symbol] = expected_ticker(contract)
+                return cls.tickers[contract.symbol]
+
+            @classmethod
+            def cancelMktDepth(cls, contract):
+                cls.cancelled.append(contract.symbol)
+        return expected_ib
+
+
+class MktDataHubFakeTwsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.tws = FakeTws(RandomWalkData(seed=7), port=0, depth_update_secs=.05, max_mkt_depth_reqs=2)
+        self.tws.start_thread()
+        self.ib = IB()
+        self.ib.connect(faketws.FAKE_TWS_HOST, self.tws.port, clientId=3, timeout=5)
+        self.board = book_board(4)
+        self.lines = MktDataLineCounter(100, 6)
+        self.cmd_q = queue.Queue()
+        self.reply_qs = {0: queue.Queue()}
+        self.hub = MktDataHub(self.board, self.cmd_q, self.reply_qs, self.lines, 2, ib=self.ib)
+
+    def tearDown(self):
+        self.ib.disconnect()
+        self.tws.stop()
+        self.loop.close()
+        self.board.close()
+        self.lines.close()
+
+    # commands
+    def test_subscribe_beyondMaxMktDepthReqs_refusedAndLineAndSlotReleased(self):
+        # act
+        client = HubClient(self.board, self.cmd_q, self.reply_qs[0], 0, self.loop)
+        statuses = [client.subscribe(Stock(s, 'ISLAND', 'USD'), sleep_fn=self._serve)[1]
+                    for s in ['AAPL', 'AMZN', 'GOOG']]
+
+        # assert
+        self.assertEqual(statuses, [0, 0, 1])
+        self.assertEqual(self.lines.in_use(), 8)
+        self.assertEqual(len(self.hub.free_slots), 2)
+        self.assertEqual(list(self.hub.subscriptions.keys()), ['AAPL', 'AMZN'])
+
+    # helpers
+    def _serve(self, *_):
+        self.ib.sleep(.05)
+        self.hub.handle_cmds()
+
+
+if __name__ == '__main__':
+    unittest.main()
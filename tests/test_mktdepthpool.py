@@ -0,0 +1,144 @@
+import os
+import unittest
+import tempfile
+from eventkit import Event
+
+from live_trading.mktdepthpool import MktDepthPool
+from live_trading.replay import SessionRecorder, load_session
+from live_trading.utils.clock import VirtualClock
+from live_trading.utils.helpers import Lines_
+
+
+class MktDepthPoolTestCase(unittest.TestCase):
+    # queries
+    def test_ticker_subscribedTwice_requestsOnce(self):
+        # arrange
+        expected_live_trading = self._live_trading()
+        expected_contract = self._contract('GOOG')
+
+        # act
+        pool = MktDepthPool(expected_live_trading)
+        first_ticker, _ = pool.ticker(expected_contract)
+        second_ticker, status = pool.ticker(expected_contract)
+
+        # assert
+        self.assertEqual(len(expected_live_trading.requested), 1)
+        self.assertIs(first_ticker, second_ticker)
+        self.assertEqual(status, 0)
+
+    def test_ticker_requestRefused_linesHandedBack(self):
+        # arrange
+        expected_live_trading = self._live_trading(status=1)
+        expected_contract = self._contract('GOOG')
+
+        # act
+        pool = MktDepthPool(expected_live_trading)
+        pool.ticker(expected_contract)
+
+        # assert
+        self.assertFalse(pool.is_subscribed('GOOG'))
+        self.assertEqual(expected_live_trading.cancelled, ['GOOG'])
+
+    # commands
+    def test_release_rotatedOut_cancelsOnlyThatSymbol(self):
+        # arrange
+        expected_live_trading = self._live_trading()
+
+        # act
+        pool = MktDepthPool(expected_live_trading)
+        pool.ticker(self._contract('GOOG'))
+        pool.ticker(self._contract('AAPL'))
+        pool.release('GOOG')
+        pool.release('NOT_SUBSCRIBED')
+
+        # assert
+        self.assertEqual(expected_live_trading.cancelled, ['GOOG'])
+        self.assertEqual(pool.symbols(), ['AAPL'])
+
+    def test_release_all_sessionEnd_poolEmpty(self):
+        # arrange
+        expected_live_trading = self._live_trading()
+
+        # act
+        pool = MktDepthPool(expected_live_trading)
+        pool.ticker(self._contract('GOOG'))
+        pool.ticker(self._contract('AAPL'))
+        pool.release_all()
+
+        # assert
+        self.assertEqual(sorted(expected_live_trading.cancelled), ['AAPL', 'GOOG'])
+        self.assertEqual(pool.symbols(), [])
+
+    def test_ticker_hubWhileRecording_hubUpdatesRecordedUntilRelease(self):
+        # arrange
+        expected_live_trading = self._live_trading()
+        tmp = tempfile.TemporaryDirectory()
+        recorder = SessionRecorder(os.path.join(tmp.name, 'strat.jsonl'))
+        recorder.clock = VirtualClock()
+        expected_live_trading.recorder = recorder
+
+        # act
+        pool = MktDepthPool(expected_live_trading, hub=self._hub())
+        ticker, _ = pool.ticker(self._contract('GOOG'))
+        ticker.domBids, ticker.domAsks = [Lines_(10.1, 100)], [Lines_(10.2, 200)]
+        ticker.updateEvent.emit(ticker)
+        pool.release('GOOG')
+        ticker.updateEvent.emit(ticker)
+        recorder.close()
+        records = load_session(recorder.path)
+        tmp.cleanup()
+
+        # assert
+        self.assertEqual([r[1:] for r in records], [['depth', 'GOOG', [[[10.1, 100]], [[10.2, 200]]]]])
+
+    # helpers
+    @staticmethod
+    def _hub():
+        class expected_ticker:
+            def __init__(self, contract):
+                self.contract = contract
+                self.domBids = []
+                self.domAsks = []
+                self.updateEvent = Event('updateEvent')
+
+        class expected_hub:
+            @staticmethod
+            def subscribe(contract_, sleep_fn=None):
+                return expected_ticker(contract_), 0
+
+            @staticmethod
+            def unsubscribe(symbol):
+                pass
+        return expected_hub
+
+    @staticmethod
+    def _contract(symbol):
+        class expected_contract: pass
+        expected_contract.symbol = symbol
+        return expected_contract
+
+    @staticmethod
+    def _live_trading(status=0):
+        class expected_live_trading:
+            requested = []
+            cancelled = []
+            recorder = None
+
+            class ib:
+                @staticmethod
+                def sleep(secs):
+                    pass
+
+            @classmethod
+            def req_mkt_dpt_ticker_(cls, contract_):
+                cls.requested.append(contract_.symbol)
+                return object(), status
+
+            @classmethod
+            def cancel_mkt_dpt_ticker_(cls, contract_):
+                cls.cancelled.append(contract_.symbol)
+        return expected_live_trading
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import asyncio
+from eventkit import Event
+
+from live_trading import ordermanager
+from live_trading.ordermanager import OrderManager
+
+
+class OrderManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    # queries
+    def test_has_pending_twoOrdersInFlight_bothPending(self):
+        # arrange
+        expected_ib = self._ib()
+
+        # act
+        om = OrderManager(expected_ib, 10, self.loop)
+        om.place(self._contract('GOOG'), self._order('BUY', 10))
+        om.place(self._contract('AAPL'), self._order('BUY', 5))
+
+        # assert
+        self.assertTrue(om.has_pending('GOOG') and om.has_pending('AAPL'))
+        self.assertEqual(om.n_in_flight(), 2)
+
+    # commands
+    def test_place_filled_resolvesFutureAndCallback(self):
+        # arrange
+        expected_ib = self._ib()
+        done = []
+
+        # act
+        om = OrderManager(expected_ib, 10, self.loop)
+        ticket = om.place(self._contract('GOOG'), self._order('BUY', 10), on_done=done.append)
+        trade = expected_ib.trades[0]
+        trade.orderStatus.status = 'Filled'
+        trade.filledEvent.emit(trade)
+
+        # assert
+        self.assertEqual(ticket.state, ordermanager.FILLED)
+        self.assertIs(ticket.future.result(), ticket)
+        self.assertEqual(done, [ticket])
+        self.assertFalse(om.has_pending('GOOG'))
+
+    def test_place_notFilledInTime_cancelsAndResolvesTimedOut(self):
+        # arrange
+        expected_ib = self._ib()
+        expected_timeout_secs = .05
+
+        # act
+        om = OrderManager(expected_ib, expected_timeout_secs, self.loop)
+        ticket = om.place(self._contract('GOOG'), self._order('SELL', 10))
+        self.loop.run_until_complete(asyncio.sleep(.1))
+        pending_after_timeout = om.has_pending('GOOG')
+        trade = expected_ib.trades[0]
+        trade.orderStatus.status = 'Cancelled'
+        trade.cancelledEvent.emit(trade)
+
+        # assert
+        self.assertEqual(expected_ib.cancelled, [trade.order])
+        self.assertTrue(pending_after_timeout)
+        self.assertEqual(ticket.state, ordermanager.TIMED_OUT)
+        self.assertFalse(om.has_pending('GOOG'))
+
+    def test_place_rejected_resolvesRejected(self):
+        # arrange
+        expected_ib = self._ib(initial_status='Inactive')
+
+        # act
+        om = OrderManager(expected_ib, 10, self.loop)
+        ticket = om.place(self._contract('GOOG'), self._order('BUY', 10))
+
+        # assert
+        self.assertEqual(ticket.state, ordermanager.REJECTED)
+        self.assertEqual(om.n_in_flight(), 0)
+
+    # helpers
+    @staticmethod
+    def _contract(symbol):
+        class expected_contract: pass
+        expected_contract.symbol = symbol
+        return expected_contract
+
+    @staticmethod
+    def _order(action, size):
+        class expected_order: pass
+        expected_order.action = action
+        expected_order.totalQuantity = size
+        return expected_order
+
+    @staticmethod
+    def _ib(initial_status='Submitted'):
+        class expected_trade:
+            def __init__(self, order):
+                class expected_order_status: pass
+                expected_order_status.status = initial_status
+                expected_order_status.avgFillPrice = 0.0
+                self.order = order
+                self.orderStatus = expected_order_status
+                self.filledEvent = Event('filledEvent')
+                self.cancelledEvent = Event('cancelledEvent')
+                self.statusEvent = Event('statusEvent')
+
+        class expected_ib:
+            trades = []
+            cancelled = []
+
+            @classmethod
+            def placeOrder(cls, contract, order):
+                order.orderId = len(cls.trades) + 1
+                trade = expected_trade(order)
+                cls.trades.append(trade)
+                return trade
+
+            @classmethod
+            def cancelOrder(cls, order):
+                cls.cancelled.append(order)
+        return expected_ib
+
+
+if __name__ == '__main__':
+    unittest.main()
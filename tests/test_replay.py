@@ -0,0 +1,123 @@
+import os
+import unittest
+import tempfile
+import datetime
+from ib_insync import ScannerSubscription, Stock, MarketOrder, DOMLevel
+
+from live_trading import replay
+from live_trading.replay import SessionRecorder, ReplayIB, ReplaySession, load_session
+from live_trading.utils import exceptions_
+from live_trading.utils.clock import VirtualClock
+
+
+class ReplayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'run', 'strat.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # queries
+    def test_load_session_recorded_floatsUnchanged(self):
+        # arrange
+        expected_bids = [[236.39000000000001, 120], [0.1 + 0.2, 7]]
+
+        # act
+        self._record([[1.5, 'depth', 'GOOG', [expected_bids, [[237.1, 50]]]]])
+        records = load_session(self.path)
+
+        # assert
+        self.assertEqual(records[0][replay.PAYLOAD_IX][replay.BIDS_IX], expected_bids)
+
+    def test_reqScannerData_askedTwice_recordedAnswersInOrder(self):
+        # arrange
+        ib = ReplayIB(self._session(), VirtualClock(datetime.datetime.fromtimestamp(1000)))
+        ss = ScannerSubscription(scanCode='TOP_PERC_GAIN')
+
+        # act
+        first = [s.contractDetails.contract.symbol for s in ib.reqScannerData(ss)]
+        second = [s.contractDetails.contract.symbol for s in ib.reqScannerData(ss)]
+
+        # assert
+        self.assertEqual((first, second), (['GOOG', 'AMZN'], ['AMZN', 'GOOG']))
+        self.assertEqual(ib.clock.time(), 1060)
+
+    # commands
+    def test_sleep_subscribed_bookAppliedAndUpdateEmitted(self):
+        # arrange
+        clock = VirtualClock(datetime.datetime.fromtimestamp(1000))
+        ib = ReplayIB(self._session(), clock)
+        updates = []
+
+        # act
+        ticker = ib.reqMktDepth(Stock('GOOG', 'ISLAND', 'USD'))
+        ticker.updateEvent += updates.append
+        clock.sleep(2)
+
+        # assert
+        self.assertEqual(len(updates), 2)
+        self.assertEqual((ticker.domAsks[0].price, ticker.domBids[0].price), (101.0, 99.5))
+        self.assertEqual(ib.n_ticks, 3)
+
+    def test_sleep_pastLastRecord_raisesEndOfSession(self):
+        # arrange
+        clock = VirtualClock(datetime.datetime.fromtimestamp(1000))
+        ReplayIB(self._session(), clock)
+
+        # act / assert
+        with self.assertRaises(exceptions_.ReplayEndOfSession):
+            clock.sleep(60 + replay.END_GRACE_SECS + 1)
+
+    def test_run_sameSession_identicalDecisionsAndReport(self):
+        # arrange
+        self._record(self._session())
+
+        # act
+        first = ReplaySession(self.path).run('strat', self._buy_below, 101.0)
+        second = ReplaySession(self.path).run('strat', self._buy_below, 101.0)
+
+        # assert
+        self.assertEqual((first['n_ticks'], first['n_decisions']), (3, 1))
+        self.assertEqual(first['digest'], second['digest'])
+        self.assertGreater(first['ticks_per_sec'], 0)
+
+    # helpers
+    def _record(self, rows):
+        class Clock:
+            ts = 0
+
+            def time(clock):
+                return clock.ts
+
+        rec = SessionRecorder(self.path)
+        rec.clock = Clock()
+        for ts, kind, key, payload in rows:
+            rec.clock.ts = ts
+            if kind == 'depth':
+                rec.depth(key, *[[DOMLevel(price, size, '') for price, size in levels] for levels in payload])
+            elif kind == 'scan':
+                rec.scan(key, payload)
+        rec.close()
+
+    @staticmethod
+    def _session():
+        return [[1000., 'scan', 'TOP_PERC_GAIN', ['GOOG', 'AMZN']],
+                [1000.5, 'depth', 'GOOG', [[[99., 10]], [[101.5, 10]]]],
+                [1001., 'depth', 'AMZN', [[[50., 10]], [[51., 10]]]],
+                [1001.5, 'depth', 'GOOG', [[[99.5, 10]], [[101., 10]]]],
+                [1060., 'scan', 'TOP_PERC_GAIN', ['AMZN', 'GOOG']]]
+
+    @staticmethod
+    def _buy_below(strat_name, max_ask, ib=None, clock=None):
+        ticker = ib.reqMktDepth(Stock('GOOG', 'ISLAND', 'USD'))
+        bought = False
+        while True:
+            clock.sleep(.5)
+            if not bought and ticker.domAsks and ticker.domAsks[0].price <= max_ask:
+                ib.placeOrder(ticker.contract, MarketOrder('BUY', 10))
+                bought = True
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+import asyncio
+from eventkit import Event
+from ib_insync import util
+
+from live_trading.strategyhost import StrategyHost, SharedDepthCache
+from live_trading.utils.sharedmemory import MktDataLineCounter
+
+ENDLESS_STRAT_CAP = 200
+
+
+class StrategyHostTestCase(unittest.TestCase):
+    def setUp(self):
+        self.previous_loop = asyncio.get_event_loop_policy().get_event_loop()
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        self.lines = MktDataLineCounter(100, 6)
+        self.ib = self._ib()
+
+    def tearDown(self):
+        asyncio.get_event_loop().close()
+        asyncio.set_event_loop(self.previous_loop)
+        self.lines.close()
+
+    # queries
+    def test_subscribe_twoStratsSameSymbol_oneRequestOneLineSameTicker(self):
+        # arrange
+        cache = SharedDepthCache(self.ib, self.lines)
+
+        # act
+        first, first_status = cache.client(0).subscribe(self._contract('GOOG'))
+        second, second_status = cache.client(1).subscribe(self._contract('GOOG'))
+
+        # assert
+        self.assertEqual((first_status, second_status), (0, 0))
+        self.assertIs(first, second)
+        self.assertEqual(self.ib.requested, ['GOOG'])
+        self.assertEqual(self.lines.in_use(), 7)
+
+    def test_subscribe_noLineFree_refused(self):
+        # arrange
+        lines = MktDataLineCounter(7, 6)
+        cache = SharedDepthCache(self.ib, lines)
+
+        # act
+        cache.client(0).subscribe(self._contract('GOOG'))
+        ticker, status = cache.client(0).subscribe(self._contract('AAPL'))
+        lines.close()
+
+        # assert
+        self.assertIsNone(ticker)
+        self.assertEqual(status, 1)
+
+    # commands
+    def test_unsubscribe_lastStrat_cancelsAndFreesLine(self):
+        # arrange
+        cache = SharedDepthCache(self.ib, self.lines)
+        cache.client(0).subscribe(self._contract('GOOG'))
+        cache.client(1).subscribe(self._contract('GOOG'))
+
+        # act
+        cache.client(0).unsubscribe('GOOG')
+        cancelled_after_first = list(self.ib.cancelled)
+        cache.client(1).unsubscribe('GOOG')
+
+        # assert
+        self.assertEqual(cancelled_after_first, [])
+        self.assertEqual(self.ib.cancelled, ['GOOG'])
+        self.assertEqual(self.lines.in_use(), 6)
+
+    def test_run_twoStrats_interleaveOnOneConnection(self):
+        # arrange
+        log = []
+        host = StrategyHost(self.lines, 9, ib=self.ib)
+        host.add('strat_a', self._strat, log, 'GOOG')
+        host.add('strat_b', self._strat, log, 'GOOG')
+
+        # act
+        results = host.run()
+
+        # assert
+        self.assertEqual(log[:2], [('strat_a', 0), ('strat_b', 0)])
+        self.assertEqual(sorted(log), [(s, i) for s in ('strat_a', 'strat_b') for i in range(3)])
+        self.assertIs(results['strat_a'][0], results['strat_b'][0])
+        self.assertEqual(self.ib.requested, ['GOOG'])
+        self.assertEqual(self.ib.cancelled, ['GOOG'])
+
+    def test_run_neverEndingStrat_otherNotStarved(self):
+        # arrange
+        log = []
+        stop = []
+        host = StrategyHost(self.lines, 9, ib=self.ib)
+        host.add('strat_a', self._stopping_strat, log, stop, 'GOOG')
+        host.add('strat_b', self._endless_strat, log, stop)
+
+        # act
+        host.run()
+
+        # assert
+        a_done_ix = log.index(('strat_a', 2))
+        self.assertLess(len([e for e in log[:a_done_ix] if e[0] == 'strat_b']), 10)
+        self.assertLess(len([e for e in log if e[0] == 'strat_b']), ENDLESS_STRAT_CAP)
+
+    def test_run_oneStratRaises_othersFinish(self):
+        # arrange
+        log = []
+        host = StrategyHost(self.lines, 9, ib=self.ib)
+        host.add('strat_a', self._failing_strat)
+        host.add('strat_b', self._strat, log, 'GOOG')
+
+        # act
+        results = host.run()
+
+        # assert
+        self.assertIsInstance(results['strat_a'], ValueError)
+        self.assertEqual(len(log), 3)
+
+    # helpers
+    def _strat(self, strat_name, log, symbol, ib=None, mkt_data_hub=None):
+        ticker, _ = mkt_data_hub.subscribe(self._contract(symbol))
+        for i in range(3):
+            log.append((strat_name, i))
+            ib.sleep(.01)
+        return ticker, ib
+
+    def _stopping_strat(self, strat_name, log, stop, symbol, ib=None, mkt_data_hub=None):
+        result = self._strat(strat_name, log, symbol, ib=ib, mkt_data_hub=mkt_data_hub)
+        stop.append(strat_name)
+        return result
+
+    @staticmethod
+    def _endless_strat(strat_name, log, stop, ib=None, mkt_data_hub=None):
+        # capped, a starved strategy would otherwise hang the test
+        for i in range(ENDLESS_STRAT_CAP):
+            if stop:
+                return
+            log.append((strat_name, i))
+            ib.sleep(.01)
+
+    @staticmethod
+    def _failing_strat(strat_name, ib=None, mkt_data_hub=None):
+        ib.sleep(.01)
+        raise ValueError(strat_name)
+
+    @staticmethod
+    def _contract(symbol):
+        class expected_contract: pass
+        expected_contract.symbol = symbol
+        return expected_contract
+
+    @staticmethod
+    def _ib():
+        class expected_ticker:
+            def __init__(self, contract):
+                self.contract = contract
+                self.domBids = []
+                self.domAsks = []
+                self.updateEvent = Event('updateEvent')
+
+        class expected_ib:
+            def __init__(self):
+                self.requested = []
+                self.cancelled = []
+
+            def reqMktDepth(self, contract):
+                self.requested.append(contract.symbol)
+                return expected_ticker(contract)
+
+            def cancelMktDepth(self, contract):
+                self.cancelled.append(contract.symbol)
+
+            @staticmethod
+            def sleep(secs):
+                util.sleep(secs)
+        return expected_ib()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import time
+import datetime
+
+from live_trading.utils.clock import RealClock, VirtualClock
+from live_trading.utils.scheduleadgent.scheduleagent import ScheduleAgent
+
+
+class RealClockTestCase(unittest.TestCase):
+    # queries
+    def test_now_offset_shiftedAgainstHost(self):
+        # arrange
+        expected_offset_secs = -3600.
+
+        # act
+        c = RealClock(offset_secs=expected_offset_secs)
+        delta = (datetime.datetime.now() - c.now()).total_seconds()
+
+        # assert
+        self.assertAlmostEqual(delta, -expected_offset_secs, delta=1)
+
+    # commands
+    def test_sleep_sleepFn_calledWithSecs(self):
+        # arrange
+        slept = []
+
+        # act
+        RealClock(sleep_fn=slept.append).sleep(5)
+
+        # assert
+        self.assertEqual(slept, [5])
+
+
+class VirtualClockTestCase(unittest.TestCase):
+    # queries
+    def test_now_start_returnsStart(self):
+        # arrange
+        expected_start = datetime.datetime(2021, 3, 15, 15, 30)
+
+        # act
+        c = VirtualClock(expected_start)
+
+        # assert
+        self.assertEqual(c.now(), expected_start)
+
+    # commands
+    def test_sleep_advancesInstantlyAndServesLoop(self):
+        # arrange
+        served = []
+        c = VirtualClock(datetime.datetime(2021, 3, 15, 15, 30), sleep_fn=served.append)
+
+        # act
+        t0 = time.perf_counter()
+        c.sleep(60)
+        c.sleep(-1)
+        real_secs = time.perf_counter() - t0
+
+        # assert
+        self.assertEqual(c.now(), datetime.datetime(2021, 3, 15, 15, 31))
+        self.assertEqual((c.elapsed(), served), (60, [0, 0]))
+        self.assertLess(real_secs, 1)
+
+    def test_sleep_until_next_bar_fullSession_runsInSeconds(self):
+        # arrange
+        expected_bar_size_secs = 10
+        expected_n_bars = int(6.5 * 3600 / expected_bar_size_secs)
+        c = VirtualClock(datetime.datetime(2021, 3, 15, 15, 30))
+        sa = ScheduleAgent(clock=c)
+
+        # act
+        t0 = time.perf_counter()
+        boundaries = [sa.sleep_until_next_bar(expected_bar_size_secs, c.sleep) for _ in range(expected_n_bars)]
+        real_secs = time.perf_counter() - t0
+
+        # assert
+        self.assertEqual(boundaries[-1] - boundaries[0], (expected_n_bars - 1) * expected_bar_size_secs)
+        self.assertEqual(sa.jitter.max_secs, 0)
+        self.assertLess(real_secs, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
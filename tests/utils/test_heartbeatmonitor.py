@@ -1,8 +1,11 @@
 import unittest
 import multiprocessing
+import queue
 import time
+from collections import OrderedDict
 
-from live_trading.utils.heartbeatmonitor import HeartbeatMonitor
+from live_trading.utils import metricsregistry
+from live_trading.utils.heartbeatmonitor import HeartbeatMonitor, HeartbeatPublisher
 
 
 class HeartbeatMonitorTestCase(unittest.TestCase):
@@ -39,9 +42,194 @@ class HeartbeatMonitorTestCase(unittest.TestCase):
         # assert
         self.assertTrue(status)
 
+    def test_get_q_burstOfMessages_coalescedToLatestPerKey(self):
+        # arrange
+        hbm = self._hbm()
+        for i in range(1000):
+            hbm.q_.put(['strat_a', 'curr_meth', i])
+        hbm.q_.put(['strat_b', 'curr_meth', 'x'])
+        hbm.q_.put(['strat_a', 'continuous_err_cnt', 2])
+
+        # act
+        msgs = hbm.get_q()
+
+        # assert
+        self.assertEqual(msgs, [['strat_a', 'curr_meth', 999], ['strat_b', 'curr_meth', 'x'],
+                                ['strat_a', 'continuous_err_cnt', 2]])
+
+    def test_get_q_deltasAfterFullValue_foldedIntoIt(self):
+        # arrange
+        hbm = self._hbm()
+        pub = HeartbeatPublisher(hbm.q_, 'strat_a', flush_secs=0)
+        cnt = {'GOOG': 0, 'AAPL': 0, 'MSFT': 0}
+        pub.publish('curr_meth', cnt)
+        cnt['GOOG'] += 1
+        pub.publish('curr_meth', cnt)
+        del cnt['MSFT']
+        pub.publish('curr_meth', cnt)
+
+        # act
+        msgs = hbm.get_q()
+
+        # assert
+        self.assertEqual(msgs, [['strat_a', 'curr_meth', {'GOOG': 1, 'AAPL': 0}]])
+
+    def test_render_metrics_registryDeltas_servedAsWhole(self):
+        # arrange
+        hbm = self._hbm()
+        hbm.mkt_data_lines = None
+        reg = metricsregistry.Registry({'strat': 'strat_a'})
+        pub = HeartbeatPublisher(hbm.q_, 'strat_a', flush_secs=0)
+        reg.inc(metricsregistry.ORDERS, symbol='GOOG', action='BUY', state='Filled')
+        reg.inc(metricsregistry.ORDERS, symbol='FB', action='BUY', state='Filled')
+        pub.publish(metricsregistry.METRICS_LINE, reg.snapshot())
+        hbm.update(hbm.get_q())
+
+        # act
+        reg.inc(metricsregistry.ORDERS, symbol='GOOG', action='BUY', state='Filled')
+        pub.publish(metricsregistry.METRICS_LINE, reg.snapshot())
+        msgs = hbm.get_q()
+        hbm.update(msgs)
+        text = hbm.render_metrics()
+
+        # assert
+        self.assertEqual(len(msgs[0]), 4)
+        self.assertIn('live_trading_orders_total{strat="strat_a",symbol="GOOG",action="BUY",state="Filled"} 2', text)
+        self.assertIn('live_trading_orders_total{strat="strat_a",symbol="FB",action="BUY",state="Filled"} 1', text)
+
+    def test_render_unchangedTable_notRebuilt(self):
+        # arrange
+        hbm = self._hbm()
+        hbm.update([['strat_a', 'curr_meth', 'buy'], ['strat_b', 'continuous_err_cnt', 1]])
+        expected_str = hbm.render()
+
+        # act
+        changed = hbm.update([['strat_a', 'curr_meth', 'buy']])
+
+        # assert
+        self.assertFalse(changed)
+        self.assertIs(hbm.render(), expected_str)
+        self.assertIn('buy', expected_str)
+
     # commands
+    def test_update_unknownStratOrLine_ignored(self):
+        # arrange
+        hbm = self._hbm()
+
+        # act
+        changed = hbm.update([['strat_c', 'curr_meth', 'buy'], ['strat_a', 'not_monitored', 1]])
+
+        # assert
+        self.assertFalse(changed)
+        self.assertEqual(len(hbm.table), 0)
+
+    def test_update_newValue_replacesInPlace(self):
+        # arrange
+        hbm = self._hbm()
+        hbm.update([['strat_a', 'continuous_err_cnt', 1]])
+
+        # act
+        changed = hbm.update([['strat_a', 'continuous_err_cnt', 2]])
+
+        # assert
+        self.assertTrue(changed)
+        self.assertEqual(hbm.table, {('strat_a', 'continuous_err_cnt'): '2'})
+        self.assertIn('2', hbm.render())
+
+    def test_update_deltaWithoutBaseInQueue_appliedToLastValue(self):
+        # arrange
+        hbm = self._hbm()
+        pub = HeartbeatPublisher(hbm.q_, 'strat_a', flush_secs=0)
+        cnt = {'GOOG': 0, 'AAPL': 0, 'MSFT': 0}
+        pub.publish('curr_meth', cnt)
+        hbm.update(hbm.get_q())
+        cnt['AAPL'] = 2
+
+        # act
+        pub.publish('curr_meth', cnt)
+        msgs = hbm.get_q()
+        hbm.update(msgs)
+
+        # assert
+        self.assertEqual(msgs[0][2], ({'AAPL': 2}, []))
+        self.assertEqual(hbm.values[('strat_a', 'curr_meth')], {'GOOG': 0, 'AAPL': 2, 'MSFT': 0})
+
+    def test_publish_withinInterval_coalescedIntoOneTimedFlush(self):
+        # arrange
+        hbm = self._hbm()
+        now = [100.0]
+        loop = self._loop()
+        pub = HeartbeatPublisher(hbm.q_, 'strat_a', flush_secs=6, clock=lambda: now[0], loop=loop)
+        pub.publish('continuous_err_cnt', 0)
+
+        # act
+        for i in range(1, 50):
+            now[0] += .1
+            pub.publish('continuous_err_cnt', i)
+        n_before_timer = pub.n_msgs
+        loop.calls[0][1]()
+
+        # assert
+        self.assertEqual(n_before_timer, 1)
+        self.assertEqual(len(loop.calls), 1)
+        self.assertEqual(hbm.get_q(), [['strat_a', 'continuous_err_cnt', 49]])
+
+    def test_flush_unchangedValues_nothingSent(self):
+        # arrange
+        hbm = self._hbm()
+        pub = HeartbeatPublisher(hbm.q_, 'strat_a', flush_secs=0)
+        pub.publish('__winners', ['GOOG'])
+        pub.publish('continuous_err_cnt', 0)
+
+        # act
+        pub.publish('__winners', ['GOOG'])
+        pub.publish('continuous_err_cnt', 0)
+
+        # assert
+        self.assertEqual(pub.n_msgs, 2)
 
     # helpers
+    @staticmethod
+    def _loop():
+        class Handle:
+            def cancel(self):
+                pass
+
+        class Loop:
+            def __init__(self):
+                self.calls = []
+
+            def call_later(self, delay, callback):
+                self.calls.append((delay, callback))
+                return Handle()
+
+        return Loop()
+
+    @staticmethod
+    def _hbm():
+        class Q:
+            def __init__(self):
+                self.msgs = []
+
+            def put(self, msg):
+                self.msgs.append(msg)
+
+            def get(self, block):
+                if not self.msgs:
+                    raise queue.Empty
+                return self.msgs.pop(0)
+
+        # __init__ runs the display loop
+        hbm = HeartbeatMonitor.__new__(HeartbeatMonitor)
+        hbm.q_ = Q()
+        hbm.strats = {'strat_a': None, 'strat_b': None}
+        hbm.monitor_lines = ['curr_meth', 'continuous_err_cnt']
+        hbm._monitor_lines = set(hbm.monitor_lines)
+        hbm.values = {}
+        hbm.table = OrderedDict()
+        hbm._table_str = None
+        return hbm
+
     @staticmethod
     def _timer(sleeper):
         time.sleep(sleeper)
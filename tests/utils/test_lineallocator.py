@@ -0,0 +1,132 @@
+import unittest
+import multiprocessing
+
+from live_trading.utils.lineallocator import LineAllocator, fair_shares
+
+
+class FairSharesTestCase(unittest.TestCase):
+    # queries
+    def test_fair_shares_enoughCapacity_everyoneGetsWanted(self):
+        self.assertEqual(fair_shares([2, 0, 5], 100), [2, 0, 5])
+
+    def test_fair_shares_scarceCapacity_smallWantsFirstRestSplit(self):
+        # arrange
+        expected_targets = [2, 4, 4]
+
+        # act
+        targets = fair_shares([2, 9, 7], 10)
+
+        # assert
+        self.assertEqual(targets, expected_targets)
+
+    def test_fair_shares_leftoverOfDivision_goesToLowestSlots(self):
+        self.assertEqual(fair_shares([9, 9, 9], 10), [4, 3, 3])
+
+    def test_fair_shares_noCapacity_allZero(self):
+        self.assertEqual(fair_shares([3, 3], -2), [0, 0])
+
+
+class LineAllocatorTestCase(unittest.TestCase):
+    # queries
+    def test_request_aloneWithReserved_grantedUpToCapacity(self):
+        # arrange
+        expected_capacity = 100 - 6
+
+        # act
+        a = LineAllocator(100, 2, 6)
+        granted = a.request(0, 200)
+        available = a.available()
+        a.close()
+
+        # assert
+        self.assertEqual((granted, available), (expected_capacity, 0))
+
+    def test_request_notShared_grantedLikeShared(self):
+        # act
+        a = LineAllocator(100, 2, 6, shared=False)
+        granted = [a.request(0, 60), a.request(1, 60)]
+        a.close()
+
+        # assert
+        self.assertEqual(granted, [60, 34])
+
+    # commands
+    def test_request_othersOverTheirShare_growsOnlyIntoFreeLines(self):
+        # arrange
+        a = LineAllocator(10, 2)
+        first = a.request(0, 10)
+
+        # act
+        second = a.request(1, 10)
+        shrunk = a.request(0, 10)
+        grown = a.request(1, 10)
+        a.close()
+
+        # assert
+        self.assertEqual((first, second, shrunk, grown), (10, 0, 5, 5))
+
+    def test_release_finishedStrategy_linesGoToOthers(self):
+        # arrange
+        a = LineAllocator(10, 2)
+        a.request(0, 10)
+        a.request(1, 10)
+        a.request(0, 10)
+        a.request(1, 10)
+
+        # act
+        a.release(0)
+        granted = a.request(1, 10)
+        wanted = a.wanted(0)
+        a.close()
+
+        # assert
+        self.assertEqual((granted, wanted), (10, 0))
+
+    def test_request_fewerWanted_linesReclaimed(self):
+        # arrange
+        a = LineAllocator(10, 1)
+        a.request(0, 8)
+
+        # act
+        granted = a.request(0, 3)
+        total = a.total_granted()
+        a.close()
+
+        # assert
+        self.assertEqual((granted, total), (3, 3))
+
+    def test_request_acrossSpawnedProcesses_neverOversubscribes(self):
+        # arrange
+        expected_limit = 20
+        expected_n_procs = 4
+        ctx = multiprocessing.get_context('spawn')
+
+        # act
+        a = LineAllocator(expected_limit, expected_n_procs, ctx=ctx)
+        granted = ctx.Queue()
+        procs = [ctx.Process(target=self._request_n, args=(a, slot, 50, granted)) for slot in range(expected_n_procs)]
+        for p in procs:
+            p.start()
+        max_total = max(granted.get() for _ in procs)
+        for p in procs:
+            p.join()
+        total = a.total_granted()
+        a.close()
+
+        # assert
+        self.assertLessEqual(max_total, expected_limit)
+        self.assertLessEqual(total, expected_limit)
+
+    # helpers
+    @staticmethod
+    def _request_n(a, slot, n, granted):
+        max_total = 0
+        for i in range(n):
+            a.request(slot, i % 12)
+            max_total = max(max_total, a.total_granted())
+        granted.put(max_total)
+        a.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import multiprocessing
+
+from live_trading.logging_ import instrumentation
+from live_trading.utils.helpers import ClientSharedMemory
+from live_trading.utils.metricsboard import MetricsBoard, CURR_METH_LEN
+
+
+class MetricsBoardTestCase(unittest.TestCase):
+    def setUp(self):
+        self.board = MetricsBoard(['strat_a', 'strat_b'])
+
+    def tearDown(self):
+        self.board.close()
+
+    # queries
+    def test_msgs_onlyWrittenStrats_asHeartbeatMessages(self):
+        # arrange
+        self.board.set('strat_b', 'continuous_err_cnt', 3)
+
+        # act
+        msgs = self.board.msgs()
+
+        # assert
+        self.assertEqual({m[0] for m in msgs}, {'strat_b'})
+        self.assertIn(['strat_b', 'continuous_err_cnt', 3], msgs)
+        self.assertIn(['strat_b', 'curr_meth', ''], msgs)
+
+    def test_snapshot_longMethName_cutToField(self):
+        # arrange
+        expected_meth = 'Scanners_1,' + 'x' * 100
+
+        # act
+        self.board.set_curr_meth('strat_a', expected_meth)
+
+        # assert
+        self.assertEqual(self.board.snapshot('strat_a')['curr_meth'], expected_meth[:CURR_METH_LEN])
+
+    def test_snapshot_writtenInSpawnedProcess_visibleWithoutIpc(self):
+        # arrange
+        ctx = multiprocessing.get_context('spawn')
+
+        # act
+        p = ctx.Process(target=self._count, args=(self.board, 'strat_b', 1000))
+        p.start()
+        p.join()
+
+        # assert
+        self.assertEqual(self.board.snapshot('strat_b')['n loops update_trade_flow'], 1000)
+        self.assertEqual(self.board.snapshot('strat_a')['n loops update_trade_flow'], 0)
+
+    # commands
+    def test_add_to_manager_boardLines_writtenOthersIgnored(self):
+        # arrange
+        hlprs = ClientSharedMemory(self.board)
+
+        # act
+        hlprs.add_to_manager('strat_a', 'n False buy_conditions', 'increment_1')
+        hlprs.add_to_manager('strat_a', 'n False buy_conditions', 'increment_1')
+        hlprs.add_to_manager('strat_a', 'cap_usd', 2500.5)
+        hlprs.add_to_manager('strat_a', 'portfolio', [['GOOG', None, 1.0, 10]])
+        snapshot = self.board.snapshot('strat_a')
+
+        # assert
+        self.assertEqual(snapshot['n False buy_conditions'], 2)
+        self.assertEqual(snapshot['cap_usd'], 2500.5)
+
+    def test_publish_curr_meth_timedMethod_shownOnBoard(self):
+        # arrange
+        class Strat:
+            def buy(self):
+                return 'bought'
+
+        buy = instrumentation.timed(Strat.buy, enabled=True)
+        instrumentation.publish_curr_meth(lambda meth: self.board.set_curr_meth('strat_a', meth))
+
+        # act
+        try:
+            buy(Strat())
+        finally:
+            instrumentation.publish_curr_meth(None)
+
+        # assert
+        self.assertEqual(self.board.snapshot('strat_a')['curr_meth'], instrumentation.curr_meth()[:CURR_METH_LEN])
+        self.assertIn('Strat,buy', instrumentation.curr_meth())
+
+    # helpers
+    @staticmethod
+    def _count(board, strat, n):
+        for _ in range(n):
+            board.incr(strat, 'n loops update_trade_flow')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import urllib.request
+import urllib.error
+
+from live_trading.utils import metricsregistry
+from live_trading.utils.metricsregistry import Registry, MetricsServer, observed, render
+
+
+class MetricsRegistryTestCase(unittest.TestCase):
+    # queries
+    def test_render_histogram_cumulativeBucketsSumAndCount(self):
+        # arrange
+        reg = Registry({'strat': 'strat_a'})
+
+        # act
+        for secs in (.0004, .0005, .003, 100.):
+            reg.observe(metricsregistry.TICK_TO_DECISION, secs, symbol='GOOG')
+        text = reg.render()
+
+        # assert
+        self.assertIn('# TYPE live_trading_tick_to_decision_seconds histogram', text)
+        self.assertIn('live_trading_tick_to_decision_seconds_bucket{strat="strat_a",symbol="GOOG",le="0.0005"} 2', text)
+        self.assertIn('live_trading_tick_to_decision_seconds_bucket{strat="strat_a",symbol="GOOG",le="0.005"} 3', text)
+        self.assertIn('live_trading_tick_to_decision_seconds_bucket{strat="strat_a",symbol="GOOG",le="30.0"} 3', text)
+        self.assertIn('live_trading_tick_to_decision_seconds_bucket{strat="strat_a",symbol="GOOG",le="+Inf"} 4', text)
+        self.assertIn('live_trading_tick_to_decision_seconds_count{strat="strat_a",symbol="GOOG"} 4', text)
+
+    def test_render_severalProcesses_oneTypeLinePerMetric(self):
+        # arrange
+        reg_a, reg_b = Registry({'strat': 'strat_a'}), Registry({'strat': 'strat_b'})
+
+        # act
+        reg_a.inc(metricsregistry.ORDERS, symbol='GOOG', action='BUY', state='Filled')
+        reg_b.inc(metricsregistry.ORDERS, 2, symbol='FB', action='SELL', state='Cancelled')
+        text = render([reg_a.snapshot(), reg_b.snapshot()])
+
+        # assert
+        self.assertEqual(text.count('# TYPE live_trading_orders_total counter'), 1)
+        self.assertIn('live_trading_orders_total{strat="strat_a",symbol="GOOG",action="BUY",state="Filled"} 1', text)
+        self.assertIn('live_trading_orders_total{strat="strat_b",symbol="FB",action="SELL",state="Cancelled"} 2', text)
+
+    def test_render_labelWithQuote_escaped(self):
+        # arrange
+        reg = Registry()
+
+        # act
+        reg.set(metricsregistry.MKT_DATA_LINES, 3, note='a "b"\n')
+
+        # assert
+        self.assertIn('live_trading_mkt_data_lines{note="a \\"b\\"\\n"} 3', reg.render())
+
+    def test_snapshot_laterObservation_snapshotUnchanged(self):
+        # arrange
+        reg = Registry()
+        reg.observe(metricsregistry.ORDER_TO_FILL, .2)
+        snapshot = reg.snapshot()
+
+        # act
+        reg.observe(metricsregistry.ORDER_TO_FILL, .2)
+
+        # assert
+        self.assertNotEqual(snapshot, reg.snapshot())
+
+    # commands
+    def test_observed_tickerArg_labelledByMethAndSymbol(self):
+        # arrange
+        class Contract:
+            symbol = 'GOOG'
+
+        class Ticker:
+            contract = Contract()
+
+        class Strat:
+            @observed('update_trade_flow')
+            def update_trade_flow(self, ticker):
+                return 'done'
+
+        samples = metricsregistry.registry.samples
+        key = (metricsregistry.METHOD_DURATION, metricsregistry.registry.const_labels
+               + (('meth', 'update_trade_flow'), ('symbol', 'GOOG')))
+        n_before = sum(samples.get(key, [0])[:-1])
+
+        # act
+        result = Strat().update_trade_flow(Ticker())
+
+        # assert
+        self.assertEqual(result, 'done')
+        self.assertEqual(sum(samples[key][:-1]) - n_before, 1)
+
+    def test_metrics_server_get_servesRenderedText(self):
+        # arrange
+        expected_text = 'live_trading_mkt_data_lines 7\n'
+        server = MetricsServer(lambda: expected_text, port=0)
+
+        # act
+        try:
+            with urllib.request.urlopen(server.url, timeout=5) as resp:
+                text, content_type = resp.read().decode(), resp.headers['Content-Type']
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(server.url.replace('/metrics', '/other'), timeout=5)
+        finally:
+            server.close()
+
+        # assert
+        self.assertEqual(text, expected_text)
+        self.assertEqual(content_type, metricsregistry.CONTENT_TYPE)
+
+
+if __name__ == '__main__':
+    unittest.main()
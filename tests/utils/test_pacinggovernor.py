@@ -0,0 +1,98 @@
+import time
+import datetime
+import unittest
+import multiprocessing
+
+from live_trading.utils.clock import VirtualClock
+from live_trading.utils.pacinggovernor import PacingGovernor
+
+IB_PACING = {'mkt_data_lines': 100,
+             'hist_data_general_reqs_per_interval': {'secs': 10 * 60, 'reqs': 60},
+             'hist_data_similar': {'secs': 2, 'reqs': 6},
+             'hist_data_identical': {'secs': 15, 'reqs': 1},
+             'funda_data_reqs': {'secs': 600, 'reqs': 60}}
+
+
+class PacingGovernorTestCase(unittest.TestCase):
+    # queries
+    def test_try_acquire_identicalWithin15Secs_returnsWaitUntilWindowLeft(self):
+        # arrange
+        expected_contract = self._contract('GOOG')
+        expected_now = 1000.0
+
+        # act
+        pg = PacingGovernor(IB_PACING, margin_secs=0)
+        keys = pg.hist_data_keys(expected_contract, 'TRADES', '', '600 S', '15 secs')
+        first = pg.try_acquire('histData', keys, now=expected_now)
+        second = pg.try_acquire('histData', keys, now=expected_now + 3)
+        third = pg.try_acquire('histData', keys, now=expected_now + 15)
+
+        # assert
+        self.assertEqual((first, second, third), (0.0, 12.0, 0.0))
+
+    def test_try_acquire_sixSimilarWithin2Secs_sixthWaits(self):
+        # arrange
+        expected_contract = self._contract('GOOG')
+        expected_now = 1000.0
+
+        # act
+        pg = PacingGovernor(IB_PACING, margin_secs=0)
+        waits = [pg.try_acquire('histData', pg.hist_data_keys(expected_contract, 'TRADES', i), now=expected_now + i * .1)
+                 for i in range(6)]
+
+        # assert
+        self.assertEqual(waits[:5], [0.0] * 5)
+        self.assertAlmostEqual(waits[5], 1.5)
+
+    def test_try_acquire_fundaAcrossProcesses_sharesWindow(self):
+        # arrange
+        expected_n_procs = 3
+        expected_reqs_per_proc = 25
+
+        # act
+        pg = PacingGovernor(IB_PACING)
+        procs = [multiprocessing.Process(target=self._acquire_n, args=(pg, expected_reqs_per_proc))
+                 for _ in range(expected_n_procs)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+
+        # assert
+        self.assertEqual(pg.usage()['funda_data_reqs'], IB_PACING['funda_data_reqs']['reqs'])
+        self.assertGreater(pg.try_acquire('fundaData'), 0)
+
+    # commands
+    def test_acquire_virtualClock_waitsInClockTime(self):
+        # arrange
+        clock = VirtualClock(datetime.datetime(2021, 3, 15, 9, 30))
+        expected_contract = self._contract('GOOG')
+
+        # act
+        pg = PacingGovernor(IB_PACING, margin_secs=0, clock=clock)
+        keys = pg.hist_data_keys(expected_contract, 'TRADES', '', '600 S', '15 secs')
+        t0 = time.perf_counter()
+        waited = [pg.acquire('histData', keys, sleep_fn=clock.sleep) for _ in range(2)]
+        wall_secs = time.perf_counter() - t0
+
+        # assert
+        self.assertEqual(waited, [0.0, 15.0])
+        self.assertEqual(clock.elapsed(), 15.0)
+        self.assertLess(wall_secs, 1)
+
+    # helpers
+    @staticmethod
+    def _acquire_n(pg, n):
+        for _ in range(n):
+            pg.try_acquire('fundaData')
+
+    @staticmethod
+    def _contract(symbol):
+        class expected_contract: pass
+        expected_contract.symbol = symbol
+        expected_contract.exchange = 'SMART'
+        return expected_contract
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import time
+
+from live_trading.utils.scheduleadgent.scheduleagent import ScheduleAgent
+
+
+class ScheduleAgentTestCase(unittest.TestCase):
+    # queries
+    def test_next_boundary_midBar_returnsNextWallClockMultiple(self):
+        # arrange
+        expected_bar_size_secs = 10
+        expected_now = 1544959041.7
+
+        # assert
+        self.assertEqual(ScheduleAgent.next_boundary(expected_bar_size_secs, expected_now), 1544959050)
+
+    def test_next_boundary_onBoundary_returnsFollowingBoundary(self):
+        self.assertEqual(ScheduleAgent.next_boundary(10, 1544959050.0), 1544959060)
+
+    # commands
+    def test_sleep_until_next_bar_returnsNotBeforeBoundaryAndRecordsJitter(self):
+        # arrange
+        expected_bar_size_secs = .05
+
+        # act
+        sa = ScheduleAgent()
+        boundary = sa.sleep_until_next_bar(expected_bar_size_secs)
+
+        # assert
+        self.assertGreaterEqual(time.time(), boundary)
+        self.assertEqual(sa.jitter.report()['n'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
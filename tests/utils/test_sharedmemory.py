@@ -0,0 +1,122 @@
+import os
+import unittest
+import multiprocessing
+import numpy as np
+
+from live_trading.utils.sharedmemory import MktDataLineCounter, SeqLockArray
+
+
+class MktDataLineCounterTestCase(unittest.TestCase):
+    # queries
+    def test_in_use_reservedLines_countedFromStart(self):
+        # arrange
+        expected_reserved = 6
+
+        # act
+        c = MktDataLineCounter(100, expected_reserved)
+        in_use, available = c.in_use(), c.available()
+        c.close()
+
+        # assert
+        self.assertEqual((in_use, available), (expected_reserved, 100 - expected_reserved))
+
+    # commands
+    def test_try_acquire_limitReached_returnsFalseUntilReleased(self):
+        # arrange
+        expected_limit = 3
+
+        # act
+        c = MktDataLineCounter(expected_limit, 1)
+        granted = [c.try_acquire() for _ in range(3)]
+        c.release()
+        after_release = c.try_acquire()
+        peak = c.peak()
+        c.close()
+
+        # assert
+        self.assertEqual(granted, [True, True, False])
+        self.assertTrue(after_release)
+        self.assertEqual(peak, expected_limit)
+
+    def test_try_acquire_notShared_countsWithoutShmSegment(self):
+        # arrange
+        shm_before = set(os.listdir('/dev/shm'))
+
+        # act
+        c = MktDataLineCounter(3, 1, shared=False)
+        granted = [c.try_acquire() for _ in range(3)]
+        shm_while_open = set(os.listdir('/dev/shm'))
+        c.close()
+
+        # assert
+        self.assertEqual(granted, [True, True, False])
+        self.assertEqual(shm_while_open, shm_before)
+
+    def test_release_belowReserved_raisesValueError(self):
+        c = MktDataLineCounter(100, 6)
+        with self.assertRaises(ValueError):
+            c.release()
+        c.close()
+
+    def test_try_acquire_acrossSpawnedProcesses_neverOversubscribes(self):
+        # arrange
+        expected_limit = 50
+        expected_n_procs = 4
+        ctx = multiprocessing.get_context('spawn')
+
+        # act
+        c = MktDataLineCounter(expected_limit, ctx=ctx)
+        granted = ctx.Queue()
+        procs = [ctx.Process(target=self._acquire_n, args=(c, 20, granted)) for _ in range(expected_n_procs)]
+        for p in procs:
+            p.start()
+        n_granted = sum(granted.get() for _ in procs)
+        for p in procs:
+            p.join()
+        in_use = c.in_use()
+        c.close()
+
+        # assert
+        self.assertEqual(n_granted, expected_limit)
+        self.assertEqual(in_use, expected_limit)
+
+    # helpers
+    @staticmethod
+    def _acquire_n(c, n, granted):
+        granted.put(sum(c.try_acquire() for _ in range(n)))
+
+
+class SeqLockArrayTestCase(unittest.TestCase):
+    # queries
+    def test_read_afterWrite_returnsCopyAndEvenSeq(self):
+        # arrange
+        expected_dtype = [('seq', np.int64), ('val', np.float64, (3,))]
+
+        # act
+        arr = SeqLockArray(expected_dtype, 2)
+        arr.write(1, val=[1.0, 2.0, 3.0])
+        rec = arr.read(1)
+        arr.write(1, val=[4.0, 5.0, 6.0])
+        arr.close()
+
+        # assert
+        self.assertEqual(list(rec['val']), [1.0, 2.0, 3.0])
+        self.assertEqual(rec['seq'], 2)
+
+    def test_read_notShared_writesVisibleAndCloses(self):
+        # act
+        arr = SeqLockArray([('seq', np.int64), ('val', np.float64)], 2, shared=False)
+        arr.write(0, val=1.5)
+        rec = arr.read(0)
+        arr.close()
+
+        # assert
+        self.assertEqual((rec['val'], rec['seq']), (1.5, 2))
+
+    def test_init_seqNotFirstField_raisesValueError(self):
+        with self.assertRaises(ValueError):
+            SeqLockArray([('val', np.float64), ('seq', np.int64)], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
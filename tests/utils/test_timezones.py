@@ -0,0 +1,71 @@
+import unittest
+import datetime
+
+from live_trading.utils.timezones import ExchangeTime, UtcOffsets
+
+
+class UtcOffsetsTestCase(unittest.TestCase):
+    # queries
+    def test_at_dayOfDstStart_switchesAtTransition(self):
+        # arrange
+        o = UtcOffsets('America/New_York')
+        transition = datetime.datetime(2021, 3, 14, 7, tzinfo=datetime.timezone.utc).timestamp()  # 02:00 EST
+
+        # act
+        before, after = o.at(transition - 1), o.at(transition)
+
+        # assert
+        self.assertEqual((before, after), (-5 * 3600, -4 * 3600))
+
+    def test_at_sameDay_loadedOnce(self):
+        # arrange
+        o = UtcOffsets('America/New_York')
+        ts = datetime.datetime(2030, 7, 1, 12, tzinfo=datetime.timezone.utc).timestamp()
+
+        # act
+        offsets = {o.at(ts + secs) for secs in range(0, 3600, 60)}
+
+        # assert
+        self.assertEqual(offsets, {-4 * 3600})
+        self.assertEqual(len(o._days), 1)
+
+
+class ExchangeTimeTestCase(unittest.TestCase):
+    # queries
+    def test_to_exchange_danishWinter_sixHoursBack(self):
+        # arrange
+        et = ExchangeTime(local_tz='Europe/Copenhagen')
+
+        # act
+        dt_obj = et.to_exchange(datetime.datetime(2019, 1, 15, 15, 30))
+
+        # assert
+        self.assertEqual(dt_obj, datetime.datetime(2019, 1, 15, 9, 30))
+
+    def test_to_exchange_usDstEuropeNot_fiveHoursBack(self):
+        # arrange
+        et = ExchangeTime(local_tz='Europe/Copenhagen')
+
+        # act
+        dt_obj = et.to_exchange(datetime.datetime(2025, 3, 20, 14, 30))
+
+        # assert
+        self.assertEqual(dt_obj, datetime.datetime(2025, 3, 20, 9, 30))
+
+    def test_to_exchange_earlyMorning_noLongerRaises(self):
+        # arrange
+        et = ExchangeTime(local_tz='Asia/Tokyo')
+
+        # act
+        dt_obj = et.to_exchange(datetime.datetime(2024, 6, 3, 2, 0))
+
+        # assert
+        self.assertEqual(dt_obj, datetime.datetime(2024, 6, 2, 13, 0))
+
+    def test_to_exchange_dtObj_isNotDt(self):
+        with self.assertRaises(TypeError):
+            ExchangeTime(local_tz='UTC').to_exchange('hh.mm.ss')
+
+
+if __name__ == '__main__':
+    unittest.main()